@@ -1,11 +1,9 @@
 
 import time
+import shutil
+import tempfile
 import pandas as pd
-import numpy as np
-import yfinance as yf
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
 
 # --- ensure repo root in sys.path ---
 import os, sys
@@ -16,19 +14,31 @@ if ROOT_DIR not in sys.path:
 # ------------------------------------
 
 from core.pairs import PAIRS
-from core.metrics import summarize_pair
+from core.metrics import universe_ci
+from core.online import OnlineUniverse
 from core.hedge import hedge_shares
-from core.hedge_adv import (
-    returns, rolling_beta, beta_ols, beta_robust_theilsen, beta_wls,
-    hedge_ratio_cointegration, simulate_hedge_pnl, hedge_effectiveness
-)
+from core.store import PriceStore, source_from_spec
+from core.cache import shared_cache, memo_stats
+from core import profiling
+from core.quotes import QuoteService, quotes_from_spec
+from core.leaderboard import hedge_leaderboard, best_by_pair
+from core.screen import screen_universe
+from core.portfolio import hedge_model
+from core import export
+from core.intraday import INTERVALS, YF_MAX_AGE, bars_per_session, is_intraday
+from core.montecarlo import MODELS as MC_MODELS
+from app import views
 
 st.set_page_config(page_title="Pairs Lab — v6 (Spread)", page_icon="🌙", layout="wide")
+profiling.enable(st.session_state.get("diag_profile", profiling.enabled()))
+profiling.begin_run("rerun")
 st.title("Leveraged Pairs Lab — v6")
 
 with st.sidebar:
     st.header("⚙️ Parámetros")
     lookback = st.selectbox("Ventana", ["1M","3M","6M","YTD","1Y","3Y","MAX"], index=3)
+    interval_sel = st.selectbox("Intervalo", INTERVALS, index=0,
+                                help="Barras intradía: yfinance solo sirve historia reciente (1m: 30 días; 5m–30m: 60 días; 1h: 730 días).")
     start_date = st.date_input("Inicio (override)", value=None)
     end_date = st.date_input("Fin (override)", value=None)
     emisores = sorted({p["emisor"] for p in PAIRS})
@@ -50,201 +60,187 @@ def get_default_start(lookback: str) -> pd.Timestamp:
     if lookback == "3Y": return today - pd.DateOffset(years=3)
     return pd.Timestamp("2005-01-01")
 
-def resolve_window():
+SOURCE_SPEC = os.environ.get("PAIRS_LAB_SOURCE")
+
+def resolve_window(interval: str="1d"):
     s = pd.to_datetime(start_date) if start_date else get_default_start(lookback)
     e = pd.to_datetime(end_date) if end_date else pd.Timestamp.today().normalize()
+    if is_intraday(interval) and not (SOURCE_SPEC or "").startswith("csv:"):
+        # yfinance no devuelve barras intradía más antiguas que YF_MAX_AGE días
+        s = max(s, pd.Timestamp.today().normalize() - pd.Timedelta(days=YF_MAX_AGE[interval] - 1))
     return s, e
 
-def download_data(tickers, start, end):
-    data = yf.download(
-        tickers=tickers, start=start, end=end + pd.Timedelta(days=1),
-        auto_adjust=True, progress=False, group_by="ticker", threads=True, interval="1d"
-    )
-    return data
+STORE_DIR = os.environ.get("PAIRS_LAB_STORE", os.path.join(ROOT_DIR, ".data", "prices"))
 
-def extract_series(data, ticker, field):
-    try:
-        if isinstance(data.columns, pd.MultiIndex):
-            return data[ticker][field].rename(ticker)
-        else:
-            return data[field].rename(ticker)
-    except Exception:
-        return pd.Series(dtype=float, name=ticker)
+@st.cache_resource
+def get_store(interval: str="1d") -> PriceStore:
+    # un almacén por intervalo (los intradía en <STORE_DIR>/<intervalo>/, float32)
+    return PriceStore(STORE_DIR, source_from_spec(SOURCE_SPEC, interval), interval=interval)
 
-pairs = [p for p in PAIRS if p["emisor"] in emisores_sel and p["base"] in bases_sel]
+@st.cache_resource
+def get_quotes() -> QuoteService:
+    # un único servicio por proceso: refresco en lote en segundo plano, lecturas sin bloqueo
+    return QuoteService(quotes_from_spec(SOURCE_SPEC)).start()
 
-if run_btn or "last_run" not in st.session_state:
-    st.session_state["last_run"] = time.time()
-    start, end = resolve_window()
-    st.info(f"Descargando datos {start.date()} → {end.date()}...")
+def download_data(tickers, start, end, interval="1d"):
+    # Solo se piden a la fuente los rangos que faltan en el almacén local; se devuelve un PricePanel
+    # (índice común, matrices contiguas): las series por ticker son vistas sin copia
+    return get_store(interval).load_panel(tickers, start, end)
+
+BOOT_RESAMPLES = 2000   # remuestreos del bootstrap por bloques (intervalos de β en Resumen)
+
+def load_universe(pairs, start, end, interval="1d", refresh=False):
+    # Caché de proceso compartida por todas las sesiones: una única descarga por (tickers, ventana, intervalo)
+    # aunque varias sesiones la pidan a la vez. Los objetos devueltos son compartidos: solo lectura.
+    # refresh=True (botón Actualizar) descarta el panel de esta ventana antes de volver a pedirlo al almacén
+    cache = shared_cache()
     tickers = sorted({x for p in pairs for x in (p["base"], p["alt"])})
-    data = download_data(tickers, start, end)
+    span = (str(start.date()), str(end.date()), interval)
+    pair_keys = [(p["base"], p["alt"], p.get("target_ratio")) for p in pairs]
+    panel_key = cache.key("panel", tickers, *span)
+    if refresh:
+        cache.invalidate(panel_key)
+    with profiling.span("load_universe.panel", tickers=len(tickers)):
+        panel = cache.get_or_compute(panel_key, lambda: download_data(tickers, start, end, interval))
+    with profiling.span("load_universe.metrics", pairs=len(pairs)):
+        # métricas puntuales: estado en línea (core.online) construido una vez por ventana; cada carga solo
+        # le añade las barras nuevas del panel y sustituye la última si seguía abierta
+        online = cache.get_or_compute(cache.key("online", pair_keys, *span),
+                                      lambda: OnlineUniverse.from_panel(panel, pairs, interval=interval))
+        online.extend(panel)
+        # intervalos bootstrap: una vez por ventana; los refrescos del mismo día no los recalculan
+        ci = cache.get_or_compute(cache.key("ci", pair_keys, *span, BOOT_RESAMPLES),
+                                  lambda: universe_ci(panel, pairs, n_boot=BOOT_RESAMPLES))
+        metrics = online.metrics_frame().merge(ci, on=["base", "alt"], how="left")
+        metrics["start"], metrics["end"] = span[0], span[1]
+    return panel, metrics
 
-    close = {}; vol = {}
-    for t in tickers:
-        close[t] = extract_series(data, t, "Close")
-        vol[t]   = extract_series(data, t, "Volume")
+pairs = [p for p in PAIRS if p["emisor"] in emisores_sel and p["base"] in bases_sel]
 
-    rows = []
-    for p in pairs:
-        m = summarize_pair(close[p["base"]], close[p["alt"]], vol[p["base"]], vol[p["alt"]],
-                           target_ratio=p.get("target_ratio"), start=str(start.date()), end=str(end.date()))
-        rows.append(m.__dict__)
-    df = pd.DataFrame(rows)
+# La sesión solo guarda qué ventana y pares pidió; los datos viven en la caché compartida
+if run_btn or "start_end" not in st.session_state:
+    st.session_state["last_run"] = time.time()
+    st.session_state["interval"] = interval_sel
+    st.session_state["start_end"] = resolve_window(interval_sel)
+    st.session_state["data_pairs"] = pairs
 
-    st.session_state["metrics_df"] = df
-    st.session_state["close_dict"] = close
-    st.session_state["start_end"] = (start, end)
+start, end = st.session_state["start_end"]
+interval = st.session_state["interval"]
+with st.spinner(f"Cargando datos {start.date()} → {end.date()} ({interval})..."):
+    panel, df = load_universe(st.session_state["data_pairs"], start, end, interval, refresh=run_btn)
 
-df = st.session_state.get("metrics_df")
-close_dict = st.session_state.get("close_dict")
-start, end = st.session_state.get("start_end", resolve_window())
+with st.sidebar:
+    cs = shared_cache().stats()
+    st.caption(f"Caché compartida: {cs['entries']} entradas · {cs['bytes']/2**20:.1f}/{cs['max_bytes']/2**20:.0f} MB · "
+               f"aciertos {cs['hits']} · fallos {cs['misses']} · coalescidas {cs['coalesced']}")
 
 if df is None or df.empty:
     st.warning("No hay resultados. Ajusta filtros y pulsa **Actualizar datos**.")
+    profiling.end_run()
     st.stop()
 
 tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Resumen","📈 Gráficos","🛡️ Cobertura","🧠 Avanzado", "ℹ️ Acerca de / Autor"])
 
-with tab1:
+# Cada pestaña es un fragmento: un widget dentro de ella solo re-ejecuta esa pestaña, y los cálculos
+# pesados (app/views.py) se memoizan por sus entradas, así que solo se recalcula lo que cambió.
+s0, e0 = str(start.date()), str(end.date())
+
+# st.plotly_chart serializa la figura (JSON de plotly) dentro de la llamada: se mide como una etapa propia
+plotly_chart = profiling.timed("st.plotly_chart")(st.plotly_chart)
+
+def visible_range(key: str):
+    # acercar el rango vuelve a pedir los datos de ese tramo: con el mismo presupuesto de puntos
+    # por gráfico, un tramo corto se dibuja a resolución completa
+    lo, hi = st.slider("Rango visible", min_value=start.date(), max_value=end.date(),
+                       value=(start.date(), end.date()), format="YYYY-MM-DD", key=key)
+    return None if (lo, hi) == (start.date(), end.date()) else (str(lo), str(hi))
+
+def window_slider(label: str, key: str):
+    # ventanas rodantes en barras del intervalo; en intradía la clave incluye el intervalo para no
+    # arrastrar una ventana diaria (60 días) como 60 barras de 1m
+    bps = bars_per_session(interval)
+    if bps == 1:
+        return int(st.slider(f"{label} (días)", 20, 200, 60, step=5, key=key))
+    hi = max(200, 5 * bps)
+    step = max(1, hi // 200)
+    w = int(st.slider(f"{label} (barras {interval})", 20, hi, min(hi, max(20, bps)), step=step, key=f"{key}_{interval}"))
+    st.caption(f"≈ {w / bps:.1f} sesiones")
+    return w
+
+@st.fragment
+@profiling.traced_run("tab:resumen")
+def render_resumen():
     st.subheader("Tabla de métricas")
     st.dataframe(df, use_container_width=True, height=450)
+    plotly_chart(views.deviation_figure(df, template), use_container_width=True, key="deviation_chart")
+    st.caption(f"Barras de error: intervalo del 90% por bootstrap estacionario por bloques ({BOOT_RESAMPLES} remuestreos). "
+               "En ventanas cortas (1M, 3M) suele ser ancho: una desviación dentro del intervalo no es concluyente.")
+
+    with st.expander("🔎 Verificar bases y apalancamiento"):
+        # cada ALT contra todas las bases cargadas (matrices β/R² de una vez): mejor base por R², β implícito
+        # y avisos si no coincide con la base o el target_ratio declarados
+        data_pairs = st.session_state["data_pairs"]
+        cache = shared_cache()
+        scr = cache.get_or_compute(
+            cache.key("screen", [(p["base"], p["alt"], p.get("target_ratio")) for p in data_pairs], s0, e0, interval),
+            lambda: screen_universe(panel, data_pairs))
+        only_bad = st.toggle("Solo discrepancias", value=True, key="scr_bad")
+        view = scr[scr["mismatch"]] if only_bad else scr
+        if view.empty:
+            st.success("Todas las bases y apalancamientos declarados coinciden con los datos.")
+        else:
+            st.dataframe(view, use_container_width=True, hide_index=True)
+        st.caption("Avisos: base (otra base explica mejor el ALT, +5 pp de R²), signo, leverage (|β − target| > 15%), "
+                   "sin_datos.")
 
-    d = df.copy(); d["pair"] = d["base"] + "→" + d["alt"]
-    d["deviation"] = d["beta_alt_on_base"] - d["target_ratio"]
-    d = d.sort_values(by="deviation", key=lambda s: s.abs(), ascending=False)
-    fig_dev = px.bar(d, x="pair", y="deviation", color="deviation", color_continuous_scale="Turbo",
-                     hover_data={"beta_alt_on_base":":.2f","target_ratio":":.2f","corr":":.2f","r2":":.2f"},
-                     template=template, title="Desviación (β efectivo - target)")
-    fig_dev.update_layout(xaxis_tickangle=-45, yaxis_title="Desviación")
-    st.plotly_chart(fig_dev, use_container_width=True, key="deviation_chart")
-
-with tab2:
+@st.fragment
+@profiling.traced_run("tab:graficos")
+def render_graficos():
     st.subheader("Lollipop β vs Target")
-    l = df.copy(); l["pair"] = l["base"] + "→" + l["alt"]
-    fig_l = go.Figure()
-    fig_l.add_trace(go.Scatter(x=l["pair"], y=l["beta_alt_on_base"], mode="markers", name="β efectivo", marker=dict(size=10)))
-    fig_l.add_trace(go.Scatter(x=l["pair"], y=l["target_ratio"], mode="markers", name="Target", marker=dict(symbol="diamond", size=10)))
-    for i, row in l.iterrows():
-        fig_l.add_shape(type="line", x0=i, x1=i, y0=row["target_ratio"], y1=row["beta_alt_on_base"], line=dict(width=2))
-    fig_l.update_layout(template=template, xaxis_tickangle=-45, yaxis_title="Ratio")
-    st.plotly_chart(fig_l, use_container_width=True, key="lollipop_chart")
+    plotly_chart(views.lollipop_figure(df, template), use_container_width=True, key="lollipop_chart")
 
     st.subheader("Riesgo–Retorno (ALT, burbujas ~ vol. 30d)")
-
-    # Base de datos del gráfico
-    bub = df.copy()
-    bub["pair"] = bub["base"] + "→" + bub["alt"]
-    bub["ret"] = pd.to_numeric(bub["ret_alt"], errors="coerce")
-    bub["vol"] = pd.to_numeric(bub["vol_alt"], errors="coerce")
-    bub["volume"] = pd.to_numeric(bub["avg_vol_alt"], errors="coerce")
-    bub["deviation"] = pd.to_numeric(bub["beta_alt_on_base"] - bub["target_ratio"], errors="coerce")
-    bub["abs_dev"] = bub["deviation"].abs()
-    bub["corr_num"] = pd.to_numeric(bub["corr"], errors="coerce")
-    bub["tipo"] = np.where(pd.to_numeric(bub["target_ratio"], errors="coerce") >= 0, "Bull", "Bear")
-
-    # 👉 añadir columna 'emisor' desde PAIRS
-    emisor_map = {(p["base"], p["alt"]): p["emisor"] for p in PAIRS}
-    bub["emisor"] = [emisor_map.get((b, a), "Desconocido") for b, a in zip(bub["base"], bub["alt"])]
-    bub["emisor"] = bub["emisor"].astype("category")
-
-    # Saneado
-    bub.replace([np.inf, -np.inf], np.nan, inplace=True)
-    if bub["volume"].notna().any():
-        bub["volume"] = bub["volume"].fillna(bub["volume"].median())
-    else:
-        bub["volume"] = 1.0
-    bub["volume"] = bub["volume"].clip(lower=1)
-    bub = bub.dropna(subset=["ret", "vol"])
+    # 👉 columna 'emisor' desde PAIRS
+    bub = views.bubble_frame(df, {(p["base"], p["alt"]): p["emisor"] for p in PAIRS})
 
     # Selector de color
-    color_opt = st.selectbox(
-        "Color por:",
-        ["Ninguno", "Desviación β (efectivo − target)", "|Desviación β|", "Correlación", "Tipo ALT (bull/bear)", "Emisor"],
-        index=1,
-    )
-
-    color_kw = {}
-    if color_opt == "Ninguno":
-        pass
-    elif color_opt == "Desviación β (efectivo − target)":
-        color_kw = dict(color="deviation", color_continuous_scale="RdBu", color_continuous_midpoint=0)
-    elif color_opt == "|Desviación β|":
-        color_kw = dict(color="abs_dev", color_continuous_scale="Viridis")
-    elif color_opt == "Correlación":
-        color_kw = dict(color="corr_num", color_continuous_scale="RdYlGn", range_color=[0,1])
-    elif color_opt == "Tipo ALT (bull/bear)":
-        color_kw = dict(color="tipo", color_discrete_map={"Bull":"#2ca02c", "Bear":"#d62728"})
-    elif color_opt == "Emisor":
-        color_kw = dict(color="emisor")  # paleta discreta automática
-
+    color_opt = st.selectbox("Color por:", list(views.BUBBLE_COLORS), index=1, key="bub_color")
     if bub.empty:
         st.info("No hay datos válidos para el gráfico de burbujas (ret/vol).")
     else:
-        fig_bub = px.scatter(
-            bub,
-            x="vol",
-            y="ret",
-            size="volume",
-            hover_name="pair",
-            size_max=40,
-            template=template,
-            labels={"vol":"Vol anualizada","ret":"Retorno período"},
-            **color_kw
-        )
-    fig_bub.update_layout(title="Riesgo–Retorno (ALT, burbujas ~ vol. 30d)")
-    st.plotly_chart(fig_bub, use_container_width=True, key="bubble_chart")
+        plotly_chart(views.bubble_figure(bub, color_opt, template), use_container_width=True, key="bubble_chart")
 
+    xr = visible_range("graf_range")
 
     st.subheader("β rodante")
     pair_labels = [f'{p["base"]}→{p["alt"]}' for p in pairs]
     if pair_labels:
         choice = st.selectbox("Par", pair_labels, index=0, key="rb_choice")
         sel = pairs[pair_labels.index(choice)]
-        base, alt = sel["base"], sel["alt"]
-        b_close = close_dict[base].loc[str(start.date()):str(end.date())].dropna()
-        a_close = close_dict[alt].loc[str(start.date()):str(end.date())].dropna()
-        x_ret = returns(b_close); y_ret = returns(a_close)
-        window = st.slider("Ventana (días)", 20, 200, 60, step=5, key="rb_win")
-        rb = rolling_beta(x_ret, y_ret, window)
-        if rb is not None and not rb.empty:
-            fig_rb = px.line(x=rb.index, y=rb.values, template=template, labels={"x":"Fecha","y":"β"})
-            fig_rb.update_layout(title=f"β rodante {base}→{alt}")
-            st.plotly_chart(fig_rb, use_container_width=True, key="rb_chart_tab2")
+        window = window_slider("Ventana", "rb_win")
+        fig_rb = views.rolling_beta_figure(panel[sel["base"]], panel[sel["alt"]], s0, e0, int(window), template, xr)
+        if fig_rb is not None:
+            plotly_chart(fig_rb, use_container_width=True, key="rb_chart_tab2")
         else:
             st.info("No hay suficientes datos para β rodante.")
 
     st.subheader("Retornos acumulados (ALT normalizado)")
-    loaded_pairs = [f'{p["base"]}→{p["alt"]}' for p in pairs if p["base"] in close_dict and p["alt"] in close_dict]
+    loaded_pairs = [f'{p["base"]}→{p["alt"]}' for p in pairs if p["base"] in panel and p["alt"] in panel]
     sel_pairs = st.multiselect("Pares (ALT)", loaded_pairs, default=loaded_pairs[:4], key="cr_alt_sel")
     if sel_pairs:
-        fig_cr = go.Figure()
-        for label in sel_pairs:
-            base, alt = label.split("→")
-            s = close_dict[alt].loc[str(start.date()):str(end.date())].dropna()
-            if s.empty: continue
-            cum = (s / s.iloc[0]) * 100.0
-            fig_cr.add_trace(go.Scatter(x=cum.index, y=cum.values, mode="lines", name=f"{label} ALT"))
-        fig_cr.update_layout(template=template, yaxis_title="Índice 100 = inicio", title="Retornos acumulados — ALT")
-        st.plotly_chart(fig_cr, use_container_width=True, key="cum_alt_chart")
+        series = {label: (panel[label.split("→")[1]],) for label in sel_pairs}
+        plotly_chart(views.cumulative_figure(series, s0, e0, template, x_range=xr), use_container_width=True, key="cum_alt_chart")
 
     st.subheader("Retornos acumulados **BASE vs ALT** (multi-par)")
     sel_pairs_dual = st.multiselect("Pares (BASE y ALT)", loaded_pairs, default=loaded_pairs[:3], key="cr_dual_sel")
     if sel_pairs_dual:
-        fig_dual = go.Figure()
-        for label in sel_pairs_dual:
-            base, alt = label.split("→")
-            sb = close_dict[base].loc[str(start.date()):str(end.date())].dropna()
-            sa = close_dict[alt].loc[str(start.date()):str(end.date())].dropna()
-            if sb.empty or sa.empty: continue
-            cb = (sb / sb.iloc[0]) * 100.0
-            ca = (sa / sa.iloc[0]) * 100.0
-            fig_dual.add_trace(go.Scatter(x=cb.index, y=cb.values, mode="lines", name=f"{base} (BASE) — {label}", line=dict(dash="dash")))
-            fig_dual.add_trace(go.Scatter(x=ca.index, y=ca.values, mode="lines", name=f"{alt} (ALT) — {label}", line=dict(dash="solid")))
-        fig_dual.update_layout(template=template, yaxis_title="Índice 100 = inicio", title="Retornos acumulados — BASE vs ALT")
-        st.plotly_chart(fig_dual, use_container_width=True, key="cum_dual_chart")
+        series = {label: tuple(panel[t] for t in label.split("→")) for label in sel_pairs_dual}
+        plotly_chart(views.cumulative_figure(series, s0, e0, template, dual=True, x_range=xr),
+                        use_container_width=True, key="cum_dual_chart")
 
-with tab3:
+@st.fragment
+@profiling.traced_run("tab:cobertura")
+def render_cobertura():
     st.subheader("Calculadora de cobertura (beta & precios spot)")
     pair_labels = [f'{p["base"]}→{p["alt"]}' for p in pairs]
     if pair_labels:
@@ -256,105 +252,244 @@ with tab3:
             st.warning("No hay beta disponible para este par/ventana.")
         else:
             beta_val = float(df_row['beta_alt_on_base'].iloc[0])
-            b_last = yf.Ticker(sel_cov['base']).history(period="5d")['Close'].dropna().iloc[-1]
-            a_last = yf.Ticker(sel_cov['alt']).history(period="5d")['Close'].dropna().iloc[-1]
-            res = hedge_shares(qty_alt=float(qty_alt), price_alt=float(a_last), price_base=float(b_last), beta_alt_on_base=beta_val)
-            c1,c2,c3 = st.columns(3)
-            with c1:
-                st.metric("Precio ALT", f"${a_last:,.2f}")
-                st.metric("Precio BASE", f"${b_last:,.2f}")
-            with c2:
-                st.metric("β (ALT/BASE)", f"{beta_val:.4f}")
-                st.metric("Factor (BASE/1 ALT)", f"{res['factor_shares_per_alt']:.4f}")
-            with c3:
-                st.metric(f"Acciones BASE para {int(qty_alt):,} ALT", f"{res['shares_base_for_qty_alt']:,.0f}")
-                st.caption("Signo sugerido: BASE corta si ALT es largo (β>0).")
-            st.info("Fórmula: acciones_BASE ≈ β × (Precio_ALT / Precio_BASE) × cantidad_ALT")
-
-with tab4:
+            quotes = get_quotes()
+            quotes.watch({x for p in pairs for x in (p["base"], p["alt"])})
+            spot = quotes.get([sel_cov['base'], sel_cov['alt']], timeout=10)
+            b_last, a_last = spot[sel_cov['base']], spot[sel_cov['alt']]
+            if pd.isna(b_last) or pd.isna(a_last):
+                st.warning("Sin precio spot disponible para este par todavía.")
+            else:
+                res = hedge_shares(qty_alt=float(qty_alt), price_alt=float(a_last), price_base=float(b_last), beta_alt_on_base=beta_val)
+                c1,c2,c3 = st.columns(3)
+                with c1:
+                    st.metric("Precio ALT", f"${a_last:,.2f}")
+                    st.metric("Precio BASE", f"${b_last:,.2f}")
+                with c2:
+                    st.metric("β (ALT/BASE)", f"{beta_val:.4f}")
+                    st.metric("Factor (BASE/1 ALT)", f"{res['factor_shares_per_alt']:.4f}")
+                with c3:
+                    st.metric(f"Acciones BASE para {int(qty_alt):,} ALT", f"{res['shares_base_for_qty_alt']:,.0f}")
+                    st.caption("Signo sugerido: BASE corta si ALT es largo (β>0).")
+                st.info("Fórmula: acciones_BASE ≈ β × (Precio_ALT / Precio_BASE) × cantidad_ALT")
+
+                # Todos los pares a la vez con los precios en caché (sin esperar a la red)
+                with st.expander("Cobertura para todos los pares"):
+                    all_spot = pd.Series(quotes.get({x for p in pairs for x in (p["base"], p["alt"])}))
+                    tab_cov = df[["base", "alt", "beta_alt_on_base"]].copy()
+                    tab_cov["price_base"] = tab_cov["base"].map(all_spot)
+                    tab_cov["price_alt"] = tab_cov["alt"].map(all_spot)
+                    vec = hedge_shares(float(qty_alt), tab_cov["price_alt"], tab_cov["price_base"], tab_cov["beta_alt_on_base"])
+                    tab_cov["factor_shares_per_alt"] = vec["factor_shares_per_alt"]
+                    tab_cov["shares_base_for_qty_alt"] = vec["shares_base_for_qty_alt"]
+                    st.dataframe(tab_cov, use_container_width=True)
+                    qs = quotes.stats()
+                    st.caption(f"Precios en caché: {qs['tickers']} · descargas en lote: {qs['fetches']} · "
+                               f"antigüedad máx.: {qs['oldest_s']:.0f}s" + (f" · último error: {qs['last_error']}" if qs['last_error'] else ""))
+
+@st.fragment
+@profiling.traced_run("tab:cartera")
+def render_cartera():
+    st.subheader("Cobertura de cartera (mínima varianza)")
+    st.caption("Varios ALT a la vez cubiertos con las BASES permitidas usando la covarianza de todos los instrumentos: "
+               "con bases correlacionadas, sumar coberturas par a par sobredimensiona la cobertura.")
+    alts_all = list(dict.fromkeys(p["alt"] for p in pairs if p["alt"] in panel))
+    if not alts_all:
+        return
+    alts_sel = st.multiselect("ALT en cartera", alts_all, default=alts_all[:4], key="pf_alts")
+    if not alts_sel:
+        return
+    positions = st.data_editor(pd.DataFrame({"alt": alts_sel, "acciones": 1000.0}), hide_index=True,
+                               disabled=["alt"], key=f"pf_pos_{'_'.join(alts_sel)}", use_container_width=True)
+    declared = {p["alt"]: p["base"] for p in pairs}
+    bases_all = sorted({p["base"] for p in pairs if p["base"] in panel})
+    hedges = st.multiselect("Coberturas permitidas", bases_all,
+                            default=sorted({declared[a] for a in alts_sel if declared[a] in panel}), key="pf_hedges")
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        cov_method = st.selectbox("Covarianza", ["sample", "ewma"], key="pf_cov",
+                                  format_func=lambda m: {"sample": "Muestral", "ewma": "EWMA"}[m])
+        halflife = window_slider("Vida media EWMA", "pf_hl") if cov_method == "ewma" else None
+    with c2:
+        shrink_opt = st.selectbox("Contracción", ["Ledoit-Wolf", "Ninguna", "Fija"], key="pf_shrink")
+        shrinkage = {"Ledoit-Wolf": "lw", "Ninguna": None}.get(shrink_opt)
+        if shrink_opt == "Fija":
+            shrinkage = st.slider("Intensidad", 0.0, 1.0, 0.2, step=0.05, key="pf_shrink_val")
+    with c3:
+        integer = st.toggle("Acciones enteras", value=True, key="pf_int")
+    if not hedges:
+        st.info("Elige al menos una cobertura.")
+        return
+    # el modelo (covarianza y factorización) depende de tickers, ventana y estimador, no de las posiciones
+    cache = shared_cache()
+    model = cache.get_or_compute(
+        cache.key("hedge_model", alts_sel, hedges, s0, e0, interval, cov_method, halflife, shrinkage),
+        lambda: hedge_model(panel, alts_sel, hedges, s0, e0, method=cov_method, halflife=halflife, shrinkage=shrinkage))
+    qty = dict(zip(positions["alt"], positions["acciones"].fillna(0.0).astype(float)))
+    spot = get_quotes().get(model.tickers)
+    try:
+        sol = model.solve(qty, spot, integer=integer)
+    except ValueError as e:
+        st.warning(str(e))
+        return
+    # referencia: la suma de coberturas par a par (β de cada ALT contra su base declarada)
+    betas = df.drop_duplicates("alt").set_index("alt")["beta_alt_on_base"]
+    pairwise = {}
+    for a, q in qty.items():
+        b = declared.get(a)
+        if b in model.tickers and pd.notna(betas.get(a)):
+            res = hedge_shares(q, model.prices(spot, [a])[0], model.prices(spot, [b])[0], float(betas[a]))
+            if res is not None:
+                pairwise[b] = pairwise.get(b, 0.0) - res["shares_base_for_qty_alt"]
+    pair_vol = model.annualize(model.variance(qty, pairwise, spot)) if pairwise else None
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Vol. anual sin cubrir", f"${sol['unhedged_vol']:,.0f}")
+    m2.metric("Vol. residual cartera", f"${sol['residual_vol']:,.0f}",
+              f"{sol['residual_vol_pct']:.1%} del nominal", delta_color="off")
+    m3.metric("Reducción de varianza", f"{sol['variance_reduction']:.1%}")
+    if pair_vol is not None:
+        m4.metric("Vol. residual par a par", f"${pair_vol:,.0f}")
+    table = sol["hedges"].copy()
+    table["par_a_par"] = pd.Series(pairwise).reindex(table.index)
+    st.dataframe(table.round(2), use_container_width=True)
+    st.caption(f"Covarianza sobre {s0} → {e0} ({interval}), contracción {model.shrinkage:.2f}. "
+               "Signo: acciones negativas = corto. Sin precio spot se usa el último cierre de la ventana.")
+
+@st.fragment
+@profiling.traced_run("tab:avanzado")
+def render_avanzado():
     st.subheader("Cobertura avanzada")
     pair_labels = [f'{p["base"]}→{p["alt"]}' for p in pairs]
-    if pair_labels:
-        choice = st.selectbox("Par (BASE→ALT)", pair_labels, index=0, key="adv_choice")
-        sel = pairs[pair_labels.index(choice)]
-        base, alt = sel["base"], sel["alt"]
-        b_close = close_dict[base].loc[str(start.date()):str(end.date())].dropna()
-        a_close = close_dict[alt].loc[str(start.date()):str(end.date())].dropna()
-        x_ret = returns(b_close); y_ret = returns(a_close)
-
-        method = st.selectbox("Método", ["OLS","ROBUST","WLS","COINT"], index=0, key="adv_method")
-        roll_win = st.slider("Ventana β rodante", 20, 200, 60, step=5, key="adv_roll")
-        qty_alt_adv = st.number_input("Cantidad ALT (simulación)", min_value=1.0, value=1000.0, step=100.0, key="adv_qty")
-
-        # Hedge ratio
-        hr = None; coint_info = None
-        if method=="OLS":
-            hr = beta_ols(x_ret, y_ret)
-        elif method=="ROBUST":
-            hr = beta_robust_theilsen(x_ret, y_ret)
-        elif method=="WLS":
-            hr = beta_wls(x_ret, y_ret)
+    if not pair_labels:
+        return
+    choice = st.selectbox("Par (BASE→ALT)", pair_labels, index=0, key="adv_choice")
+    sel = pairs[pair_labels.index(choice)]
+    base, alt = sel["base"], sel["alt"]
+    bs, as_ = panel[base], panel[alt]
+
+    method = st.selectbox("Método", views.hedge_methods.names(), index=0, key="adv_method")
+    roll_win = window_slider("Ventana β rodante", "adv_roll")
+    kf = {}
+    if method=="KALMAN":
+        kc1, kc2 = st.columns(2)
+        with kc1:
+            kf_q = st.number_input("Ruido de proceso (var. β)", min_value=1e-7, max_value=1e-1, value=1e-4, format="%.1e", key="adv_kf_q")
+        with kc2:
+            kf_r = st.number_input("Ruido de observación", min_value=1e-8, max_value=1e-2, value=1e-5, format="%.1e", key="adv_kf_r")
+        kf = {"kf_q": float(kf_q), "kf_r": float(kf_r)}
+    qty_alt_adv = float(st.number_input("Cantidad ALT (simulación)", min_value=1.0, value=1000.0, step=100.0, key="adv_qty"))
+    xr = visible_range("adv_range")
+
+    # Hedge ratio
+    est = views.hedge_estimate(bs, as_, s0, e0, method, **kf)
+    hr, coint_info = est["hr"], est["coint_info"]
+    st.write(f"**Hedge ratio (β)**: {hr:.4f}" if hr is not None else "β no disponible.")
+    if coint_info:
+        st.caption(f"ADF={coint_info['adf_stat']:.3f}, p={coint_info['pvalue']:.3f} (p<0.05 sugiere cointegración).")
+
+    # Rolling beta (Theil–Sen si el método es ROBUST)
+    fig_rb = views.advanced_rolling_figure(bs, as_, s0, e0, method, roll_win, template, x_range=xr, **kf)
+    if fig_rb is not None:
+        plotly_chart(fig_rb, use_container_width=True, key="rb_chart_adv")
+
+    # Cointegración rodante: cuándo se rompe la relación
+    if method=="COINT":
+        fig_cs = views.coint_figure(bs, as_, s0, e0, roll_win, template, xr)
+        if fig_cs is not None:
+            plotly_chart(fig_cs, use_container_width=True, key="coint_chart_adv")
+
+    # --- Spread (ALT − β·BASE), ambos normalizados a 100 ---
+    fig_spread = views.spread_figure(bs, as_, s0, e0, method, template, x_range=xr, **kf)
+    if fig_spread is not None:
+        plotly_chart(fig_spread, use_container_width=True, key="spread_chart_adv")
+        st.caption("Si el spread es estacionario, tiende a oscilar alrededor de la media. Excursiones > ±2σ suelen revertir (no garantizado).")
+
+    # PnL simulado
+    pnl = views.pnl_view(bs, as_, s0, e0, method, qty_alt_adv, template, x_range=xr, **kf)
+    if pnl is not None:
+        c1,c2 = st.columns(2)
+        with c1:
+            plotly_chart(pnl["fig_pnl"], use_container_width=True, key="pnl_chart_adv")
+        with c2:
+            plotly_chart(pnl["fig_vol"], use_container_width=True, key="vol_chart_adv")
+        st.metric("Hedge Effectiveness", f"{pnl['heff']*100:.2f}%")
+    else:
+        st.info("No se pudo simular PnL de cobertura (faltan datos o β).")
+
+    # Backtest con β rodante (sin look-ahead), rebalanceo y costes
+    with st.expander("Backtest con rebalanceo y costes"):
+        bc1, bc2, bc3 = st.columns(3)
+        with bc1:
+            reb = st.selectbox("Rebalanceo", ["Diario", "Semanal (5)", "Mensual (21)", "Deriva 5%", "Deriva 10%"], index=1, key="bt_reb")
+        with bc2:
+            comm = st.number_input("Comisión ($/acción)", min_value=0.0, value=0.005, step=0.001, format="%.3f", key="bt_comm")
+        with bc3:
+            slip = st.number_input("Slippage (bps)", min_value=0.0, value=1.0, step=0.5, key="bt_slip")
+        reb_spec = {"Diario": 1, "Semanal (5)": 5, "Mensual (21)": 21, "Deriva 5%": "5%", "Deriva 10%": "10%"}[reb]
+        bt = views.backtest_view(bs, as_, s0, e0, method, roll_win, qty_alt_adv, reb_spec, float(comm), float(slip),
+                                 reb, template, x_range=xr, **kf)
+        bt_sum = bt["summary"]
+        if bt["fig"] is not None:
+            plotly_chart(bt["fig"], use_container_width=True, key="bt_chart_adv")
+            m1, m2, m3, m4 = st.columns(4)
+            m1.metric("PnL neto", f"${bt_sum['pnl_net']:,.0f}")
+            m2.metric("Costes", f"${bt_sum['costs']:,.0f}")
+            m3.metric("Rotación anual", f"{bt_sum['turnover_ann']:.1f}x")
+            m4.metric("Hedge Effectiveness", f"{bt_sum['hedge_eff']*100:.2f}%")
         else:
-            coint_info = hedge_ratio_cointegration(b_close, a_close)
-            hr = coint_info["beta"]
-
-        st.write(f"**Hedge ratio (β)**: {hr:.4f}" if hr is not None else "β no disponible.")
-        if coint_info:
-            st.caption(f"ADF={coint_info['adf_stat']:.3f}, p={coint_info['pvalue']:.3f} (p<0.05 sugiere cointegración).")
-
-        # Rolling beta
-        rb = None
-        try:
-            rb = rolling_beta(x_ret, y_ret, window=int(roll_win))
-        except Exception:
-            rb = None
-        if rb is not None and not rb.empty:
-            fig_rb = px.line(x=rb.index, y=rb.values, template=template, labels={"x":"Fecha","y":"β"})
-            fig_rb.update_layout(title=f"β rodante {base}→{alt}")
-            st.plotly_chart(fig_rb, use_container_width=True, key="rb_chart_adv")
-
-        # --- Spread (ALT − β·BASE), ambos normalizados a 100 ---
-        if hr is not None and not np.isnan(hr):
-            cb = (b_close / b_close.iloc[0]) * 100.0
-            ca = (a_close / a_close.iloc[0]) * 100.0
-            spread = ca - hr * cb
-            win = int(max(20, min(60, len(spread)//6)))  # 20–60 según tamaño
-            ma = spread.rolling(win).mean()
-            sd = spread.rolling(win).std()
-            upper = ma + 2*sd
-            lower = ma - 2*sd
-
-            fig_spread = go.Figure()
-            fig_spread.add_trace(go.Scatter(x=spread.index, y=spread.values, mode="lines", name="Spread (ALT − β·BASE)"))
-            fig_spread.add_trace(go.Scatter(x=ma.index, y=ma.values, mode="lines", name=f"Media {win}", line=dict(dash="dash")))
-            fig_spread.add_trace(go.Scatter(x=upper.index, y=upper.values, mode="lines", name="+2σ", line=dict(dash="dot")))
-            fig_spread.add_trace(go.Scatter(x=lower.index, y=lower.values, mode="lines", name="-2σ", line=dict(dash="dot")))
-            fig_spread.update_layout(template=template, title="Spread con bandas de Bollinger", yaxis_title="Índice (normalizado)")
-            st.plotly_chart(fig_spread, use_container_width=True, key="spread_chart_adv")
-            st.caption("Si el spread es estacionario, tiende a oscilar alrededor de la media. Excursiones > ±2σ suelen revertir (no garantizado).")
-
-        # PnL simulado
-        if hr is not None and not np.isnan(hr) and len(b_close)>1 and len(a_close)>1:
-            factor_last = float((hr * (a_close / b_close)).dropna().iloc[-1])
-            qty_base_adv = - factor_last * qty_alt_adv
-            pnl_df = simulate_hedge_pnl(qty_alt=qty_alt_adv, qty_base=qty_base_adv, alt_price=a_close, base_price=b_close)
-            unhedged_ret = a_close.pct_change().dropna()
-            hedged_val = (qty_alt_adv * a_close) + (qty_base_adv * b_close)
-            hedged_ret = hedged_val.pct_change().dropna()
-            heff = hedge_effectiveness(unhedged_ret, hedged_ret)
-
-            c1,c2 = st.columns(2)
-            with c1:
-                fig_pnl = px.line(x=pnl_df.index, y=pnl_df["cum_pnl"], template=template, labels={"x":"Fecha","y":"PnL acumulado"})
-                st.plotly_chart(fig_pnl, use_container_width=True, key="pnl_chart_adv")
-            with c2:
-                vols = pd.Series({"ALT solo": np.sqrt(252)*unhedged_ret.std(), "Cubierta": np.sqrt(252)*hedged_ret.std()})
-                fig_vol = px.bar(x=vols.index, y=vols.values, template=template, labels={"x":"","y":"Vol anualizada"})
-                st.plotly_chart(fig_vol, use_container_width=True, key="vol_chart_adv")
-
-            st.metric("Hedge Effectiveness", f"{heff*100:.2f}%")
+            st.info("No hay suficientes datos para el backtest con esta ventana.")
+
+    # Monte Carlo del decaimiento por apalancamiento (rebalanceo diario) del par seleccionado
+    with st.expander("Simulación Monte Carlo: deriva frente a target_ratio × BASE"):
+        if sel.get("target_ratio") is None:
+            st.info("El par no tiene target_ratio definido.")
         else:
-            st.info("No se pudo simular PnL de cobertura (faltan datos o β).")
+            mc1, mc2, mc3 = st.columns(3)
+            with mc1:
+                mc_model = st.selectbox("Modelo", list(MC_MODELS), index=0, key="mc_model")
+            with mc2:
+                mc_paths = st.select_slider("Trayectorias", [1_000, 5_000, 10_000, 50_000, 100_000], value=10_000, key="mc_paths")
+            with mc3:
+                mc_h = st.number_input("Horizonte (días)", min_value=5, max_value=1260, value=252, step=21, key="mc_h")
+            try:
+                mc = views.montecarlo_view(bs, float(sel["target_ratio"]), int(mc_paths), int(mc_h), mc_model, template)
+            except ValueError as e:
+                st.info(str(e))
+            else:
+                summ = mc["summary"]
+                s1, s2, s3 = st.columns(3)
+                s1.metric("Tracking gap mediano", f"{summ['tracking_gap_p50']*100:.2f}%")
+                s2.metric("Vol drag mediano (log)", f"{summ['vol_drag_p50']*100:.2f}%")
+                s3.metric("Ratio terminal mediano", f"{summ['terminal_ratio_p50']:.2f}x")
+                plotly_chart(mc["fig"], use_container_width=True, key="mc_hist_adv")
+
+    # Ranking walk-forward de métodos para todos los pares filtrados (fuera de muestra)
+    with st.expander("Leaderboard de métodos (walk-forward, fuera de muestra)"):
+        lc1, lc2 = st.columns(2)
+        with lc1:
+            lb_windows = st.multiselect("Ventanas de ajuste", [60, 126, 252, 504], default=[60, 126, 252], key="lb_windows")
+        with lc2:
+            lb_horizon = st.number_input("Horizonte de test (barras)", min_value=5, max_value=126, value=21, step=1, key="lb_horizon")
+        if st.button("▶️ Calcular leaderboard", key="lb_run") and lb_windows:
+            with st.spinner("Evaluando métodos por par..."):
+                st.session_state["leaderboard"] = hedge_leaderboard(panel, pairs, windows=lb_windows,
+                                                                    horizon=int(lb_horizon))
+        board = st.session_state.get("leaderboard")
+        if board is not None and not board.empty:
+            st.markdown("**Mejor método por par**")
+            st.dataframe(best_by_pair(board), use_container_width=True)
+            st.markdown("**Detalle**")
+            st.dataframe(board, use_container_width=True)
+
+with tab1:
+    render_resumen()
+with tab2:
+    render_graficos()
+with tab3:
+    render_cobertura()
+    st.divider()
+    render_cartera()
+with tab4:
+    render_avanzado()
 
 with tab5:
     st.subheader("ℹ️ Acerca de — Edwin Londoño - Trading Room en Vivo")
@@ -373,5 +508,89 @@ with tab5:
     - 🌐 [www.tradingroomenvivo.com](http://www.tradingroomenvivo.com)
     """)
 
-csv = df.to_csv(index=False).encode("utf-8")
-st.download_button("⬇️ Descargar métricas (CSV)", data=csv, file_name="leveraged_pairs_metrics.csv", mime="text/csv")
+@st.fragment
+@profiling.traced_run("export")
+def render_export():
+    # nada se calcula hasta pulsar "Generar": las series se escriben par a par en un fichero temporal
+    # (memoria acotada) y solo el fichero resultante se ofrece para descargar
+    with st.expander("⬇️ Exportar"):
+        st.download_button("Métricas (CSV)", data=views.metrics_csv(df), file_name="leveraged_pairs_metrics.csv",
+                           mime="text/csv", key="exp_csv")
+        st.markdown("**Series completas** de todos los pares cargados (β rodante, ratio de cobertura, "
+                    "spread con bandas de Bollinger, P&L simulado)")
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            series = st.multiselect("Series", export.SERIES, default=list(export.SERIES), key="exp_series")
+            layout = st.radio("Formato", ["Parquet (tabla larga)", "Arrow IPC (tabla larga)", "Parquet particionado (zip)"],
+                              key="exp_layout")
+        with c2:
+            method = st.selectbox("Método", views.hedge_methods.names(), key="exp_method")
+            window = window_slider("Ventana β rodante", "exp_win")
+        with c3:
+            qty = st.number_input("Cantidad ALT (P&L)", min_value=1.0, value=1000.0, step=100.0, key="exp_qty")
+        if st.button("Generar", key="exp_run", disabled=not series):
+            prev = st.session_state.pop("export_file", None)
+            if prev:
+                shutil.rmtree(os.path.dirname(prev[0]), ignore_errors=True)
+            tmp = tempfile.mkdtemp(prefix="pairs_lab_export_")
+            fmt, part = ("arrow", False) if layout.startswith("Arrow") else ("parquet", layout.endswith("(zip)"))
+            target = os.path.join(tmp, "series" if part else f"series.{'arrow' if fmt == 'arrow' else 'parquet'}")
+            with st.spinner("Exportando..."):
+                stats = export.write_export(panel, st.session_state["data_pairs"], target,
+                                            layout="partitioned" if part else "long", fmt=fmt, start=s0, end=e0,
+                                            method=method, window=window, qty_alt=float(qty), series=series)
+                if part:
+                    target = shutil.make_archive(target, "zip", target)
+            name = f"leveraged_pairs_series_{s0}_{e0}{os.path.splitext(target)[1]}"
+            st.session_state["export_file"] = (target, name, stats)
+        if "export_file" in st.session_state:
+            path, name, stats = st.session_state["export_file"]
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    st.download_button(f"Descargar {name}", data=f, file_name=name,
+                                       mime="application/octet-stream", key="exp_dl")
+                st.caption(f"{stats['rows']:,} filas · {stats['files']} ficheros · {os.path.getsize(path)/2**20:.1f} MB")
+
+render_export()
+
+@st.fragment
+def render_diagnostico():
+    # latencia por etapa de las últimas pasadas (todas las sesiones del proceso), aciertos de caché y memoria;
+    # es un fragmento: "Refrescar" incluye las re-ejecuciones de pestañas sin repetir la pasada completa
+    with st.expander("🩺 Diagnóstico"):
+        on = st.toggle("Perfilado", key="diag_profile", value=profiling.enabled(),
+                       help="Mide cada etapa instrumentada (descarga, métricas, β, figuras, serialización plotly). "
+                            "Afecta a todo el proceso; desactivado no añade coste apreciable.")
+        profiling.enable(on)
+        mem = profiling.memory()
+        cs = shared_cache().stats()
+        m1, m2 = st.columns(2)
+        m1.metric("RSS", f"{mem['rss_mb']:.0f} MB", help=f"pico {mem['peak_mb']:.0f} MB")
+        m2.metric("Aciertos caché", f"{cs['hit_rate']:.0%}" if pd.notna(cs["hit_rate"]) else "—")
+        memo = memo_stats()
+        memo = memo[(memo["hits"] + memo["misses"]) > 0]
+        if not memo.empty:
+            st.dataframe(memo.set_index("name")[["hits", "misses", "size", "hit_rate"]], use_container_width=True)
+        if not on:
+            return
+        n = st.slider("Últimas ejecuciones", 1, 50, 10, key="diag_n")
+        st.button("Refrescar", key="diag_refresh")
+        table = profiling.PROFILER.stage_table(n)
+        if table.empty:
+            st.caption("Aún no hay ejecuciones perfiladas.")
+            return
+        st.dataframe(table.set_index("etapa").round(2), use_container_width=True)
+        counters = profiling.PROFILER.counters
+        if counters:
+            st.caption(" · ".join(f"{k}: {v:,.0f}" for k, v in sorted(counters.items())))
+        d1, d2 = st.columns(2)
+        d1.download_button("JSON", profiling.PROFILER.to_json(n), file_name="pairs_lab_profile.json",
+                           mime="application/json", key="diag_json")
+        d2.download_button("Chrome trace", profiling.PROFILER.chrome_trace(n), file_name="pairs_lab_trace.json",
+                           mime="application/json", key="diag_trace",
+                           help="Abrir en chrome://tracing o ui.perfetto.dev")
+
+with st.sidebar:
+    render_diagnostico()
+profiling.end_run()
+
@@ -0,0 +1,270 @@
+# Cálculos y figuras de cada pestaña, memoizados por sus entradas reales (series del par, ventana,
+# método, parámetros). Viven fuera de streamlit_app.py porque el script se re-ejecuta en cada
+# interacción y un módulo importado conserva su caché. Los resultados se comparten: solo lectura.
+import os
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from core.cache import memoize
+from core.profiling import timed
+from core.downsample import downsample_series
+from core.intraday import infer_periods_per_year
+from core.coint import coint_scan
+from core.backtest import hedge_ratio_series, backtest_hedge
+from core.montecarlo import simulate_pair, summarize_paths
+from core.hedge_adv import returns, rolling_beta, spread_bands, hedge_pnl, hedge_effectiveness
+from core import methods as hedge_methods
+
+def _window(s: pd.Series, start: str, end: str) -> pd.Series:
+    return s.loc[start:end].dropna()
+
+# --- Capa de datos de gráficos de líneas ---
+# Cada serie se recorta al rango visible y se reduce a ~2 puntos por píxel (mín/máx por cubo, o LTTB),
+# así el navegador recibe lo mismo que puede dibujar; por encima de WEBGL_THRESHOLD puntos en total la
+# figura usa trazas WebGL (Scattergl). Al acercar el rango, el mismo presupuesto da resolución completa.
+CHART_WIDTH_PX = int(os.environ.get("PAIRS_LAB_CHART_WIDTH", 1400))
+WEBGL_THRESHOLD = 10_000
+DOWNSAMPLE = "minmax"
+
+XRange = Optional[Tuple[str, str]]
+
+def line_figure(lines: List[Tuple[str, pd.Series, dict]], template: str, x_range: XRange=None,
+                width_px: int=CHART_WIDTH_PX, method: str=DOWNSAMPLE, **layout) -> go.Figure:
+    # lines: (nombre, serie, kwargs de línea de plotly)
+    lo, hi = x_range if x_range else (None, None)
+    reduced = [(name, downsample_series(s, 2 * width_px, method, lo, hi), line) for name, s, line in lines]
+    scatter = go.Scattergl if sum(len(r) for _, r, _ in reduced) > WEBGL_THRESHOLD else go.Scatter
+    fig = go.Figure()
+    for name, r, line in reduced:
+        fig.add_trace(scatter(x=r.index, y=r.values, mode="lines", name=name, line=line or None))
+    fig.update_layout(template=template, **layout)
+    return fig
+
+# --- Resumen / Gráficos ---
+
+@timed()
+@memoize(4)
+def metrics_csv(df: pd.DataFrame) -> bytes:
+    # la tabla de métricas en CSV: pequeña, una vez por tabla (las series completas van por core.export)
+    return df.to_csv(index=False).encode("utf-8")
+
+@timed()
+@memoize(16)
+def deviation_figure(df: pd.DataFrame, template: str) -> go.Figure:
+    d = df.copy(); d["pair"] = d["base"] + "→" + d["alt"]
+    d["deviation"] = d["beta_alt_on_base"] - d["target_ratio"]
+    d = d.sort_values(by="deviation", key=lambda s: s.abs(), ascending=False)
+    err = {}
+    if "dev_lo" in d:
+        # barras de error: intervalo bootstrap por bloques de β − target
+        d["err_plus"] = d["dev_hi"] - d["deviation"]; d["err_minus"] = d["deviation"] - d["dev_lo"]
+        err = dict(error_y="err_plus", error_y_minus="err_minus")
+    fig_dev = px.bar(d, x="pair", y="deviation", color="deviation", color_continuous_scale="Turbo",
+                     hover_data={"beta_alt_on_base":":.2f","target_ratio":":.2f","corr":":.2f","r2":":.2f"},
+                     template=template, title="Desviación (β efectivo - target)", **err)
+    fig_dev.update_layout(xaxis_tickangle=-45, yaxis_title="Desviación")
+    return fig_dev
+
+@timed()
+@memoize(16)
+def lollipop_figure(df: pd.DataFrame, template: str) -> go.Figure:
+    l = df.copy(); l["pair"] = l["base"] + "→" + l["alt"]
+    fig_l = go.Figure()
+    err = None
+    if "beta_lo" in l:
+        err = dict(type="data", array=l["beta_hi"] - l["beta_alt_on_base"], arrayminus=l["beta_alt_on_base"] - l["beta_lo"])
+    fig_l.add_trace(go.Scatter(x=l["pair"], y=l["beta_alt_on_base"], mode="markers", name="β efectivo", marker=dict(size=10),
+                               error_y=err))
+    fig_l.add_trace(go.Scatter(x=l["pair"], y=l["target_ratio"], mode="markers", name="Target", marker=dict(symbol="diamond", size=10)))
+    for i, row in l.iterrows():
+        fig_l.add_shape(type="line", x0=i, x1=i, y0=row["target_ratio"], y1=row["beta_alt_on_base"], line=dict(width=2))
+    fig_l.update_layout(template=template, xaxis_tickangle=-45, yaxis_title="Ratio")
+    return fig_l
+
+@timed()
+@memoize(16)
+def bubble_frame(df: pd.DataFrame, emisor_map: Dict[Tuple[str, str], str]) -> pd.DataFrame:
+    bub = df.copy()
+    bub["pair"] = bub["base"] + "→" + bub["alt"]
+    bub["ret"] = pd.to_numeric(bub["ret_alt"], errors="coerce")
+    bub["vol"] = pd.to_numeric(bub["vol_alt"], errors="coerce")
+    bub["volume"] = pd.to_numeric(bub["avg_vol_alt"], errors="coerce")
+    bub["deviation"] = pd.to_numeric(bub["beta_alt_on_base"] - bub["target_ratio"], errors="coerce")
+    bub["abs_dev"] = bub["deviation"].abs()
+    bub["corr_num"] = pd.to_numeric(bub["corr"], errors="coerce")
+    bub["tipo"] = np.where(pd.to_numeric(bub["target_ratio"], errors="coerce") >= 0, "Bull", "Bear")
+    bub["emisor"] = [emisor_map.get((b, a), "Desconocido") for b, a in zip(bub["base"], bub["alt"])]
+    bub["emisor"] = bub["emisor"].astype("category")
+
+    # Saneado
+    bub.replace([np.inf, -np.inf], np.nan, inplace=True)
+    if bub["volume"].notna().any():
+        bub["volume"] = bub["volume"].fillna(bub["volume"].median())
+    else:
+        bub["volume"] = 1.0
+    bub["volume"] = bub["volume"].clip(lower=1)
+    return bub.dropna(subset=["ret", "vol"])
+
+BUBBLE_COLORS = {
+    "Ninguno": {},
+    "Desviación β (efectivo − target)": dict(color="deviation", color_continuous_scale="RdBu", color_continuous_midpoint=0),
+    "|Desviación β|": dict(color="abs_dev", color_continuous_scale="Viridis"),
+    "Correlación": dict(color="corr_num", color_continuous_scale="RdYlGn", range_color=[0,1]),
+    "Tipo ALT (bull/bear)": dict(color="tipo", color_discrete_map={"Bull":"#2ca02c", "Bear":"#d62728"}),
+    "Emisor": dict(color="emisor"),  # paleta discreta automática
+}
+
+@timed()
+@memoize(32)
+def bubble_figure(bub: pd.DataFrame, color_opt: str, template: str) -> go.Figure:
+    fig_bub = px.scatter(
+        bub,
+        x="vol",
+        y="ret",
+        size="volume",
+        hover_name="pair",
+        size_max=40,
+        template=template,
+        labels={"vol":"Vol anualizada","ret":"Retorno período"},
+        **BUBBLE_COLORS[color_opt]
+    )
+    fig_bub.update_layout(title="Riesgo–Retorno (ALT, burbujas ~ vol. 30d)")
+    return fig_bub
+
+@timed()
+@memoize(64)
+def rolling_beta_figure(base_s: pd.Series, alt_s: pd.Series, start: str, end: str, window: int,
+                        template: str, x_range: XRange=None) -> Optional[go.Figure]:
+    x_ret = returns(_window(base_s, start, end)); y_ret = returns(_window(alt_s, start, end))
+    rb = rolling_beta(x_ret, y_ret, window)
+    if rb is None or rb.empty:
+        return None
+    return line_figure([("β", rb, {})], template, x_range, title=f"β rodante {base_s.name}→{alt_s.name}",
+                       xaxis_title="Fecha", yaxis_title="β", showlegend=False)
+
+@timed()
+@memoize(32)
+def cumulative_figure(series: Dict[str, Tuple[pd.Series, ...]], start: str, end: str, template: str,
+                      dual: bool=False, x_range: XRange=None) -> go.Figure:
+    # series: etiqueta "BASE→ALT" -> (ALT,) o (BASE, ALT) si dual; índice 100 al inicio del período
+    lines = []
+    for label, ss in series.items():
+        ws = [_window(s, start, end) for s in ss]
+        if any(w.empty for w in ws):
+            continue
+        cums = [(w / w.iloc[0]) * 100.0 for w in ws]
+        if dual:
+            base, alt = label.split("→")
+            lines.append((f"{base} (BASE) — {label}", cums[0], dict(dash="dash")))
+            lines.append((f"{alt} (ALT) — {label}", cums[1], dict(dash="solid")))
+        else:
+            lines.append((f"{label} ALT", cums[0], {}))
+    title = "Retornos acumulados — BASE vs ALT" if dual else "Retornos acumulados — ALT"
+    return line_figure(lines, template, x_range, yaxis_title="Índice 100 = inicio", title=title)
+
+# --- Avanzado ---
+
+@timed()
+@memoize(64)
+def hedge_estimate(base_s: pd.Series, alt_s: pd.Series, start: str, end: str, method: str,
+                   kf_q: Optional[float]=None, kf_r: Optional[float]=None) -> dict:
+    # β de cobertura del método; con KALMAN además la serie temporal de β (sin mirar al futuro)
+    # (el método se resuelve en core.methods: su módulo se importa la primera vez que se elige)
+    return hedge_methods.estimate(method, _window(base_s, start, end), _window(alt_s, start, end),
+                                  kf_q=None if kf_q is None else float(kf_q), kf_r=None if kf_r is None else float(kf_r))
+
+@timed()
+@memoize(64)
+def advanced_rolling_figure(base_s: pd.Series, alt_s: pd.Series, start: str, end: str, method: str, window: int,
+                            template: str, kf_q: Optional[float]=None, kf_r: Optional[float]=None,
+                            x_range: XRange=None) -> Optional[go.Figure]:
+    # β rodante (Theil–Sen si el método es ROBUST, la serie del filtro si es KALMAN)
+    try:
+        rb = hedge_estimate(base_s, alt_s, start, end, method, kf_q, kf_r)["hr_series"]
+        if rb is None:
+            rb = hedge_methods.rolling(method, _window(base_s, start, end), _window(alt_s, start, end), window)
+    except Exception:
+        rb = None
+    if rb is None or rb.empty:
+        return None
+    rb_label = {"ROBUST": "β rodante Theil–Sen", "KALMAN": "β Kalman"}.get(method, "β rodante")
+    return line_figure([("β", rb, {})], template, x_range, title=f"{rb_label} {base_s.name}→{alt_s.name}",
+                       xaxis_title="Fecha", yaxis_title="β", showlegend=False)
+
+@timed()
+@memoize(32)
+def coint_figure(base_s: pd.Series, alt_s: pd.Series, start: str, end: str, window: int,
+                 template: str, x_range: XRange=None) -> Optional[go.Figure]:
+    cs = coint_scan(_window(base_s, start, end), _window(alt_s, start, end), window=window)
+    if cs.empty:
+        return None
+    fig_cs = line_figure([("p-valor", cs["pvalue"], {})], template, x_range, xaxis_title="Fecha",
+                         yaxis_title="p-valor ADF", showlegend=False,
+                         title=f"Cointegración rodante {base_s.name}→{alt_s.name} (ventana {window})")
+    fig_cs.add_hline(y=0.05, line_dash="dot")
+    return fig_cs
+
+@timed()
+@memoize(32)
+def spread_figure(base_s: pd.Series, alt_s: pd.Series, start: str, end: str, method: str, template: str,
+                  kf_q: Optional[float]=None, kf_r: Optional[float]=None, x_range: XRange=None) -> Optional[go.Figure]:
+    # Spread (ALT − β·BASE), ambos normalizados a 100, con bandas de Bollinger
+    est = hedge_estimate(base_s, alt_s, start, end, method, kf_q, kf_r)
+    hr, hr_series = est["hr"], est["hr_series"]
+    if hr is None or np.isnan(hr):
+        return None
+    bands = spread_bands(_window(base_s, start, end), _window(alt_s, start, end), hr, hr_series)
+    win = bands.attrs["window"]
+    return line_figure([("Spread (ALT − β·BASE)", bands["spread"], {}), (f"Media {win}", bands["mid"], dict(dash="dash")),
+                        ("+2σ", bands["upper"], dict(dash="dot")), ("-2σ", bands["lower"], dict(dash="dot"))],
+                       template, x_range, title="Spread con bandas de Bollinger", yaxis_title="Índice (normalizado)")
+
+@timed()
+@memoize(32)
+def pnl_view(base_s: pd.Series, alt_s: pd.Series, start: str, end: str, method: str, qty_alt: float, template: str,
+             kf_q: Optional[float]=None, kf_r: Optional[float]=None, x_range: XRange=None) -> Optional[dict]:
+    # PnL simulado de la cobertura, vol cubierta vs sin cubrir y hedge effectiveness
+    est = hedge_estimate(base_s, alt_s, start, end, method, kf_q, kf_r)
+    hr, hr_series = est["hr"], est["hr_series"]
+    b_close = _window(base_s, start, end); a_close = _window(alt_s, start, end)
+    if hr is None or np.isnan(hr) or len(b_close) <= 1 or len(a_close) <= 1:
+        return None
+    sim = hedge_pnl(b_close, a_close, hr, hr_series, qty_alt)
+    pnl_df, hedged_ret, unhedged_ret = sim["pnl"], sim["hedged_ret"], sim["unhedged_ret"]
+    heff = hedge_effectiveness(unhedged_ret, hedged_ret)
+
+    fig_pnl = line_figure([("PnL", pnl_df["cum_pnl"], {})], template, x_range, xaxis_title="Fecha",
+                          yaxis_title="PnL acumulado", showlegend=False)
+    ann = np.sqrt(infer_periods_per_year(unhedged_ret.index))
+    vols = pd.Series({"ALT solo": ann*unhedged_ret.std(), "Cubierta": ann*hedged_ret.std()})
+    fig_vol = px.bar(x=vols.index, y=vols.values, template=template, labels={"x":"","y":"Vol anualizada"})
+    return {"fig_pnl": fig_pnl, "fig_vol": fig_vol, "heff": heff}
+
+@timed()
+@memoize(32)
+def backtest_view(base_s: pd.Series, alt_s: pd.Series, start: str, end: str, method: str, window: int,
+                  qty_alt: float, rebalance, commission: float, slippage_bps: float, label: str, template: str,
+                  kf_q: Optional[float]=None, kf_r: Optional[float]=None, x_range: XRange=None) -> dict:
+    b_close = _window(base_s, start, end); a_close = _window(alt_s, start, end)
+    hr_bt = hedge_ratio_series(b_close, a_close, method, window,
+                               **({"process_var": float(kf_q), "obs_var": float(kf_r)} if method=="KALMAN" else {}))
+    bt_daily, bt_sum = backtest_hedge(a_close, b_close, hr_bt, qty_alt=qty_alt, rebalance=rebalance,
+                                      commission=commission, slippage_bps=slippage_bps)
+    fig_bt = None
+    if bt_sum["n_days"] > 0:
+        fig_bt = line_figure([("PnL neto", bt_daily["cum_pnl"], {})], template, x_range, xaxis_title="Fecha",
+                             yaxis_title="PnL neto acumulado", showlegend=False,
+                             title=f"Backtest {method} (ventana {window}, rebalanceo {label})")
+    return {"summary": bt_sum, "fig": fig_bt}
+
+@timed()
+@memoize(16)
+def montecarlo_view(base_s: pd.Series, target_ratio: float, n_paths: int, horizon: int, model: str,
+                    template: str) -> dict:
+    paths = simulate_pair(base_s, target_ratio, n_paths=n_paths, horizon=horizon, model=model)
+    fig_mc = px.histogram(paths, x="tracking_gap", nbins=80, template=template,
+                          labels={"tracking_gap": "ALT − target_ratio × BASE (rend. total)"})
+    return {"summary": summarize_paths(paths), "fig": fig_mc}
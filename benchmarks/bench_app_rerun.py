@@ -0,0 +1,58 @@
+# Latencia de rerun de la app para las interacciones habituales (AppTest, fuente CSV sintética, sin red).
+#   python benchmarks/bench_app_rerun.py [--repeat 3]
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+from common import ROOT_DIR, write_csv_universe
+from core.pairs import PAIRS
+
+APP = os.path.join(ROOT_DIR, "app", "streamlit_app.py")
+
+# (nombre, widget, clave, valores alternados entre repeticiones)
+INTERACTIONS = [
+    ("rerun sin cambios", None, None, None),
+    ("Gráficos: color burbujas", "selectbox", "bub_color", ["Correlación", "Emisor"]),
+    ("Gráficos: ventana β rodante", "slider", "rb_win", [90, 120]),
+    ("Cobertura: cantidad ALT", "number_input", "cov_qty", [2500.0, 3000.0]),
+    ("Avanzado: ventana β rodante", "slider", "adv_roll", [80, 100]),
+    ("Avanzado: cantidad ALT", "number_input", "adv_qty", [2000.0, 3000.0]),
+    ("Avanzado: método", "selectbox", "adv_method", ["WLS", "OLS"]),
+]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--lookback", default="3Y")
+    args = ap.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+    tmp = tempfile.mkdtemp(prefix="pairs_lab_bench_")
+    write_csv_universe(os.path.join(tmp, "csv"), PAIRS, n=1300)
+    os.environ["PAIRS_LAB_SOURCE"] = "csv:" + os.path.join(tmp, "csv")
+    os.environ["PAIRS_LAB_STORE"] = os.path.join(tmp, "store")
+
+    at = AppTest.from_file(APP, default_timeout=600)
+    t0 = time.perf_counter(); at.run(); cold = time.perf_counter() - t0
+    if at.exception:
+        print(at.exception); return 1
+    at.sidebar.selectbox[0].set_value(args.lookback)
+    at.sidebar.button[0].click()
+    at.run()
+    print(f"{'interacción':<32} {'mejor s':>8} {'media s':>8}")
+    print(f"{'primera carga (fría)':<32} {cold:>8.3f} {cold:>8.3f}")
+    for name, kind, key, values in INTERACTIONS:
+        times = []
+        for i in range(args.repeat):
+            if kind:
+                getattr(at, kind)(key=key).set_value(values[i % len(values)])
+            t0 = time.perf_counter(); at.run(); times.append(time.perf_counter() - t0)
+            if at.exception:
+                print(name, at.exception); return 1
+        print(f"{name:<32} {min(times):>8.3f} {sum(times)/len(times):>8.3f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
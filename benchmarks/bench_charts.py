@@ -0,0 +1,84 @@
+# Tamaño del payload (JSON de plotly que viaja al navegador) y tiempo de construcción + serialización de
+# los gráficos de líneas, a resolución completa (figuras anteriores) frente a reducidos por ancho en píxeles.
+#   python benchmarks/bench_charts.py [--bars 5200] [--pairs 10] [--width 1400]
+import argparse
+
+import plotly.express as px
+import plotly.graph_objects as go
+
+from common import synthetic_pair, best_of
+from app import views
+
+def full_cumulative(series, template, dual=False):
+    # construcción anterior: una traza go.Scatter por serie, todos los puntos
+    fig = go.Figure()
+    for label, ss in series.items():
+        for s in ss:
+            c = s / s.iloc[0] * 100.0
+            fig.add_trace(go.Scatter(x=c.index, y=c.values, mode="lines", name=f"{s.name} — {label}"))
+    fig.update_layout(template=template, yaxis_title="Índice 100 = inicio")
+    return fig
+
+def full_spread(base, alt, template):
+    spread = alt / alt.iloc[0] * 100 - 3.0 * (base / base.iloc[0] * 100)
+    ma = spread.rolling(60).mean(); sd = spread.rolling(60).std()
+    fig = go.Figure()
+    for name, s in [("spread", spread), ("ma", ma), ("+2σ", ma + 2 * sd), ("-2σ", ma - 2 * sd)]:
+        fig.add_trace(go.Scatter(x=s.index, y=s.values, mode="lines", name=name))
+    fig.update_layout(template=template)
+    return fig
+
+def full_line(s, template):
+    return px.line(x=s.index, y=s.values, template=template)
+
+def measure(build):
+    payload = len(build().to_json())
+    t = best_of(lambda: build().to_json())
+    return payload, t
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bars", type=int, default=5200)
+    ap.add_argument("--pairs", type=int, default=10)
+    ap.add_argument("--width", type=int, default=views.CHART_WIDTH_PX)
+    args = ap.parse_args()
+
+    template = "plotly_white"
+    universe = {}
+    for i in range(args.pairs):
+        base, alt = synthetic_pair(args.bars, seed=i)
+        universe[f"B{i}→A{i}"] = (base.rename(f"B{i}"), alt.rename(f"A{i}"))
+    start, end = str(base.index[0].date()), str(base.index[-1].date())
+    alts = {k: (v[1],) for k, v in universe.items()}
+    base0, alt0 = universe["B0→A0"]
+    zoom = (str(base0.index[-260].date()), end)
+
+    cum = views.cumulative_figure.__wrapped__
+    spread = views.spread_figure.__wrapped__
+    pnl = views.pnl_view.__wrapped__
+    line = lambda s, xr=None: views.line_figure([("y", s, {})], template, xr, width_px=args.width)
+    views.CHART_WIDTH_PX = args.width
+    cases = [
+        (f"acumulados ALT ({args.pairs} series)",
+         lambda: full_cumulative(alts, template), lambda: cum(alts, start, end, template)),
+        (f"acumulados BASE vs ALT ({2 * args.pairs} series)",
+         lambda: full_cumulative(universe, template, dual=True), lambda: cum(universe, start, end, template, dual=True)),
+        ("spread + bandas (4 series)",
+         lambda: full_spread(base0, alt0, template), lambda: spread(base0, alt0, start, end, "OLS", template)),
+        ("PnL de cobertura (1 serie)",
+         lambda: full_line(alt0 - base0, template), lambda: pnl(base0, alt0, start, end, "OLS", 1000.0, template)["fig_pnl"]),
+        ("zoom último año (1 serie)",
+         lambda: full_line((alt0 - base0).loc[zoom[0]:], template), lambda: line(alt0 - base0, zoom)),
+    ]
+
+    print(f"{args.bars} barras, ancho {args.width}px (presupuesto {2 * args.width} puntos/serie)")
+    print(f"{'gráfico':<34}{'KB antes':>10}{'KB ahora':>10}{'ms antes':>10}{'ms ahora':>10}  traza")
+    for name, before, after in cases:
+        pb, tb = measure(before)
+        pa, ta = measure(after)
+        kind = type(after().data[0]).__name__
+        print(f"{name:<34}{pb/1024:>10.0f}{pa/1024:>10.0f}{tb*1e3:>10.1f}{ta*1e3:>10.1f}  {kind}")
+    # el tiempo de dibujo en el navegador no se mide aquí; escala con el número de puntos enviados
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Exportación de series (β rodante, ratio, spread + Bollinger, P&L) de todo el universo: tabla larga
+# materializada en pandas y escrita de una vez, frente a lotes Arrow generados par a par y volcados al
+# Parquet según llegan. Memoria pico de Python (tracemalloc) más la del pool de Arrow.
+#   python benchmarks/bench_export.py [--pairs 200] [--bars 2520]
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+import pyarrow as pa
+
+from common import leveraged_universe
+from core.export import iter_batches, write_export
+from core.panel import PricePanel
+
+def _measure(fn, queue):
+    pool = pa.default_memory_pool()
+    arrow0 = pool.max_memory()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queue.put((elapsed, peak / 2**20, max(pool.max_memory() - arrow0, 0) / 2**20))
+
+def measure(fn):
+    # cada modo en un proceso hijo: el máximo del pool de Arrow no se arrastra de un modo al siguiente
+    ctx = mp.get_context("fork")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(fn, queue))
+    proc.start()
+    out = queue.get()
+    proc.join()
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pairs", type=int, default=200)
+    ap.add_argument("--bars", type=int, default=2520)
+    ap.add_argument("--batch-rows", type=int, default=250_000)
+    args = ap.parse_args()
+
+    close, _, pairs = leveraged_universe(args.pairs, args.bars)
+    panel = PricePanel.from_series(close)
+    out = tempfile.mkdtemp()
+    print(f"{len(pairs)} pares × {args.bars} barras")
+
+    def materialized():
+        # todo el universo en un DataFrame largo y después a Parquet
+        frames = [b.to_pandas() for b in iter_batches(panel, pairs, by_pair=True)]
+        pd.concat(frames, ignore_index=True).to_parquet(os.path.join(out, "full.parquet"))
+
+    def streamed():
+        write_export(panel, pairs, os.path.join(out, "stream.parquet"), batch_rows=args.batch_rows)
+
+    def partitioned():
+        write_export(panel, pairs, os.path.join(out, "part"), layout="partitioned")
+
+    print(f"{'modo':<22} {'s':>7} {'pico Python MB':>15} {'pico Arrow MB':>14} {'fichero MB':>11}")
+    for label, fn, path in (("materializado", materialized, "full.parquet"),
+                            ("lotes (largo)", streamed, "stream.parquet"),
+                            ("lotes (particionado)", partitioned, "part")):
+        t, py_mb, arrow_mb = measure(fn)
+        full = os.path.join(out, path)
+        size = (sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(full) for f in fs)
+                if os.path.isdir(full) else os.path.getsize(full))
+        print(f"{label:<22} {t:>7.2f} {py_mb:>15.1f} {arrow_mb:>14.1f} {size / 2**20:>11.1f}")
+    rows = pd.read_parquet(os.path.join(out, "stream.parquet"), columns=["value"]).shape[0]
+    print(f"filas exportadas: {rows:,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Métricas del universo con barras de 1m: panel completo en memoria frente a lectura por tramos de sesiones.
+#   python benchmarks/bench_intraday.py [--sessions 252] [--minutes 1] [--chunk 5]
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from common import best_of, write_csv_intraday
+from core.metrics import summarize_universe
+from core.online import summarize_chunked
+from core.pairs import PAIRS
+from core.store import CSVSource, PriceStore
+
+def peak_mb(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, default=252)
+    ap.add_argument("--minutes", type=int, default=1)
+    ap.add_argument("--chunk", type=int, default=5)
+    ap.add_argument("--pairs", type=int, default=10)
+    args = ap.parse_args()
+    interval = f"{args.minutes}m"
+    pairs = PAIRS[:args.pairs]
+    tickers = sorted({x for p in pairs for x in (p["base"], p["alt"])})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        end = pd.Timestamp("2025-12-31")
+        start = pd.bdate_range(end=end, periods=args.sessions)[0]
+        write_csv_intraday(f"{tmp}/csv", pairs, args.sessions, args.minutes, end=end)
+        store = PriceStore(f"{tmp}/store", CSVSource(f"{tmp}/csv"), interval=interval)
+        store.update(tickers, start, end)
+        probe = store.window(tickers[0], start, end)
+        print(f"{len(pairs)} pares, {len(tickers)} tickers × {len(probe):,} barras de {interval} (float32 en disco)")
+
+        full = lambda: summarize_universe(store.panel(tickers, start, end), None, pairs, str(start.date()), str(end.date()), interval=interval)
+        chunked = lambda: summarize_chunked(store, pairs, start, end, chunk_sessions=args.chunk)
+        a, b = full(), chunked()
+        err = np.nanmax(np.abs(a["beta_alt_on_base"].to_numpy() - b["beta_alt_on_base"].to_numpy()))
+        print(f"panel completo:  {best_of(full)*1e3:8.1f} ms · pico {peak_mb(full):8.1f} MB")
+        print(f"por tramos ({args.chunk}s): {best_of(chunked)*1e3:8.1f} ms · pico {peak_mb(chunked):8.1f} MB · |Δβ| máx {err:.1e}")
+
+if __name__ == "__main__":
+    main()
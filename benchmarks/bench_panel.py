@@ -0,0 +1,68 @@
+# Memoria y coste de recorte/alineación: dict de Series por ticker (cada una con su índice) frente a PricePanel.
+#   python benchmarks/bench_panel.py [--tickers 400] [--bars 5200]
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from common import best_of
+from core.cache import sizeof
+from core.metrics import summarize_universe
+from core.panel import PricePanel
+
+def synthetic_universe(n_tickers: int, n_bars: int, seed: int=0):
+    # historias de longitud distinta (ETFs más recientes) sobre días hábiles comunes
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end="2025-12-31", periods=n_bars, name="Date")
+    close, vol = {}, {}
+    for i in range(n_tickers):
+        t = f"T{i:04d}"
+        first = int(rng.integers(0, n_bars // 2)) if i % 3 else 0
+        r = rng.normal(0.0003, 0.02, n_bars - first)
+        close[t] = pd.Series(100 * np.cumprod(1 + r), idx[first:], name=t)
+        vol[t] = pd.Series(rng.integers(10_000, 5_000_000, n_bars - first).astype(float), idx[first:], name=t)
+    pairs = [{"base": f"T{i:04d}", "alt": f"T{i + 1:04d}", "target_ratio": 2.0} for i in range(0, n_tickers - 1, 2)]
+    return close, vol, pairs
+
+def align_dict(close, pairs, start, end):
+    out = []
+    for p in pairs:
+        b = close[p["base"]].loc[start:end].dropna(); a = close[p["alt"]].loc[start:end].dropna()
+        idx = b.index.intersection(a.index)
+        out.append((b.loc[idx].pct_change(), a.loc[idx].pct_change()))
+    return out
+
+def align_panel(panel, pairs, start, end):
+    w = panel.window(start, end)
+    return [w.pair_returns(p["base"], p["alt"]) for p in pairs]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tickers", type=int, default=400)
+    ap.add_argument("--bars", type=int, default=5200)
+    args = ap.parse_args()
+
+    close, vol, pairs = synthetic_universe(args.tickers, args.bars)
+    p64 = PricePanel.from_series(close, vol)
+    p32 = PricePanel.from_series(close, vol, dtype=np.float32)
+    start, end = str(p64.index[-756].date()), str(p64.index[-1].date())
+
+    print(f"{args.tickers} tickers × {args.bars} barras, {len(pairs)} pares")
+    mem_dict = sizeof(close) + sizeof(vol)
+    print(f"memoria  dict de Series: {mem_dict/2**20:8.1f} MB")
+    print(f"memoria  PricePanel f64: {p64.nbytes/2**20:8.1f} MB")
+    print(f"memoria  PricePanel f32: {p32.nbytes/2**20:8.1f} MB")
+
+    t_build = best_of(lambda: PricePanel.from_series(close, vol))
+    print(f"construir panel desde dict:            {t_build*1e3:8.1f} ms (una vez por carga)")
+    for name, (s, e) in {"ventana 3Y": (start, end), "MAX": (None, None)}.items():
+        t_old = best_of(lambda: align_dict(close, pairs, s, e))
+        t_new = best_of(lambda: align_panel(p64, pairs, s, e))
+        print(f"recorte+alineación+retornos ({name}): dict {t_old*1e3:8.1f} ms · panel {t_new*1e3:8.1f} ms")
+
+    t_old = best_of(lambda: summarize_universe(pd.DataFrame(close), pd.DataFrame(vol), pairs, start, end))
+    t_new = best_of(lambda: summarize_universe(p64, None, pairs, start, end))
+    print(f"summarize_universe (MAX):              dict {t_old*1e3:8.1f} ms · panel {t_new*1e3:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
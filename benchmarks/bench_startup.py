@@ -0,0 +1,83 @@
+# Arranque en frío: tiempo de importación y memoria residente de los imports de app/streamlit_app.py, en un
+# intérprete nuevo por medición, frente a la carga anticipada de statsmodels/scipy que hacía antes
+# core.hedge_adv; y el coste del primer uso de cada método de cobertura (su import diferido incluido).
+#   python benchmarks/bench_startup.py [--repeat 5]
+import ast
+import json
+import os
+import subprocess
+import sys
+import argparse
+
+import numpy as np
+
+from common import ROOT_DIR
+
+APP = os.path.join(ROOT_DIR, "app", "streamlit_app.py")
+EAGER = ["import statsmodels.api", "import statsmodels.tsa.stattools", "import scipy.special"]
+
+PROBE = r"""
+import sys, time, json
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+{imports}
+t_import = time.perf_counter() - t0
+def rss():
+    with open("/proc/self/status") as f:
+        return next(int(l.split()[1]) / 1024 for l in f if l.startswith("VmRSS:"))
+out = {{"import_s": t_import, "rss_mb": rss()}}
+{after}
+print(json.dumps(out))
+"""
+
+FIRST_USE = r"""
+sys.path.insert(0, {bench!r})
+from common import synthetic_pair
+from core import methods
+base, alt = synthetic_pair(756)
+t0 = time.perf_counter()
+methods.estimate({method!r}, base, alt)
+out["first_use_s"] = time.perf_counter() - t0
+out["rss_after_mb"] = rss()
+"""
+
+def app_imports() -> list:
+    # imports de nivel superior del script de la app (sin streamlit, que no depende de este repo)
+    tree = ast.parse(open(APP).read())
+    lines = [ast.unparse(n) for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    return [l for l in lines if "streamlit" not in l]
+
+def probe(imports: list, after: str="") -> dict:
+    code = PROBE.format(root=ROOT_DIR, imports="\n".join(imports), after=after)
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    res = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=ROOT_DIR)
+    if res.returncode != 0:
+        raise RuntimeError(res.stderr)
+    return json.loads(res.stdout.strip().splitlines()[-1])
+
+def median(runs: list, key: str) -> float:
+    return float(np.median([r[key] for r in runs]))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    imports = app_imports()
+    probe(["import pandas"])   # calienta la caché de disco antes de medir
+
+    print(f"{'arranque':<32} {'import s':>9} {'RSS MB':>8}")
+    for label, imps in (("solo pandas+numpy", ["import numpy", "import pandas"]),
+                        ("app (import diferido)", imports),
+                        ("app + statsmodels/scipy (antes)", imports + EAGER)):
+        runs = [probe(imps) for _ in range(args.repeat)]
+        print(f"{label:<32} {median(runs, 'import_s'):>9.3f} {median(runs, 'rss_mb'):>8.1f}")
+
+    from core.methods import names
+    print(f"\n{'primer uso del método':<32} {'s':>9} {'RSS MB':>8}")
+    for m in names():
+        after = FIRST_USE.format(bench=os.path.dirname(os.path.abspath(__file__)), method=m)
+        runs = [probe(imports, after) for _ in range(max(1, args.repeat // 2))]
+        print(f"{m:<32} {median(runs, 'first_use_s'):>9.3f} {median(runs, 'rss_after_mb'):>8.1f}")
+
+if __name__ == "__main__":
+    main()
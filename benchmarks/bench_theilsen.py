@@ -0,0 +1,22 @@
+# Theil–Sen: sklearn TheilSenRegressor vs core.robust (exacto / selección) y β rodante robusto.
+#   python benchmarks/bench_theilsen.py
+from common import WINDOWS, synthetic_pair, best_of
+
+from sklearn.linear_model import TheilSenRegressor
+from core.robust import theil_sen_slope, rolling_theil_sen
+
+def main():
+    print(f"{'ventana':>8} {'n':>6} {'sklearn s':>10} {'core s':>8} {'β sklearn':>10} {'β core':>8} {'rodante(60) s':>14}")
+    for label in ("1Y", "3Y", "MAX"):
+        base, alt = synthetic_pair(WINDOWS[label], leverage=3.0)
+        x = base.pct_change().dropna().values
+        y = alt.pct_change().dropna().values
+        model = TheilSenRegressor(random_state=0)
+        t_sk = best_of(lambda: model.fit(x[:, None], y), repeat=1)
+        t_core = best_of(lambda: theil_sen_slope(x, y))
+        t_roll = best_of(lambda: rolling_theil_sen(x, y, 60), repeat=1)
+        print(f"{label:>8} {len(x):>6} {t_sk:>10.3f} {t_core:>8.3f} {model.coef_[0]:>10.4f} "
+              f"{theil_sen_slope(x, y):>8.4f} {t_roll:>14.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os, sys
+import time
+import numpy as np
+import pandas as pd
+
+# --- ensure repo root in sys.path ---
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+# ------------------------------------
+
+WINDOWS = {"1M": 21, "3M": 63, "6M": 126, "1Y": 252, "3Y": 756, "MAX": 5200}
+
+def synthetic_pair(n: int, leverage: float=3.0, vol: float=0.012, noise: float=0.002, seed: int=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2005-01-03", periods=n + 1)
+    r_base = rng.normal(0.0003, vol, n)
+    r_alt = leverage * r_base + rng.standard_t(4, n) * noise
+    base = pd.Series(100 * np.cumprod(np.r_[1.0, 1 + r_base]), idx, name="BASE")
+    alt = pd.Series(50 * np.cumprod(np.r_[1.0, 1 + r_alt]), idx, name="ALT")
+    return base, alt
+
+def best_of(fn, repeat: int=3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def write_csv_universe(directory: str, pairs, n: int=2600, seed: int=0, end: str=None):
+    # CSVs sintéticos (<TICKER>.csv: Date, Close, Volume) para todos los tickers de `pairs`, con cada ALT
+    # siguiendo target_ratio × su BASE; sirve como fuente `csv:<directorio>` sin red
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end) if end else pd.Timestamp.today().normalize() - pd.offsets.BDay(1)
+    idx = pd.bdate_range(end=end, periods=n)
+    base_ret = {}
+    def write(ticker, ret):
+        close = 100 * np.cumprod(1 + ret)
+        vol = rng.integers(100_000, 5_000_000, n)
+        pd.DataFrame({"Date": idx, "Close": close, "Volume": vol}).to_csv(os.path.join(directory, f"{ticker}.csv"), index=False)
+    for p in pairs:
+        if p["base"] not in base_ret:
+            base_ret[p["base"]] = rng.normal(0.0003, 0.015, n)
+            write(p["base"], base_ret[p["base"]])
+        lev = p.get("target_ratio") or 1.0
+        write(p["alt"], lev * base_ret[p["base"]] + rng.standard_t(4, n) * 0.002)
+
+def write_csv_intraday(directory: str, pairs, sessions: int=252, minutes: int=1, seed: int=0, end: str=None):
+    # como `write_csv_universe`, con barras intradía de la sesión regular (09:30–16:00, hora de mercado)
+    # y un salto nocturno entre sesiones; cada ALT sigue target_ratio × su BASE barra a barra
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end) if end else pd.Timestamp.today().normalize() - pd.offsets.BDay(1)
+    days = pd.bdate_range(end=end, periods=sessions)
+    offsets = pd.to_timedelta(np.arange(0, 390, minutes) + 570, unit="min")
+    idx = (days.values[:, None] + offsets.values[None, :]).ravel()
+    n = len(idx); per = len(offsets)
+    sigma = 0.015 / np.sqrt(per)
+    base_ret = {}
+    def write(ticker, ret):
+        close = 100 * np.cumprod(1 + ret)
+        vol = rng.integers(100, 50_000, n)
+        pd.DataFrame({"Date": idx, "Close": close.astype(np.float32), "Volume": vol}).to_csv(
+            os.path.join(directory, f"{ticker}.csv"), index=False)
+    for p in pairs:
+        if p["base"] not in base_ret:
+            r = rng.normal(0.0, sigma, n)
+            r[::per] += rng.normal(0.0, 0.008, sessions)   # hueco de apertura
+            base_ret[p["base"]] = r
+            write(p["base"], r)
+        lev = p.get("target_ratio") or 1.0
+        write(p["alt"], lev * base_ret[p["base"]] + rng.standard_t(4, n) * sigma * 0.2)
+
+LEVERAGES = (3.0, -3.0, 2.0, -2.0, 1.5, -1.5)
+
+def leveraged_universe(n_pairs: int, n_bars: int, alts_per_base: int=4, gap_rate: float=0.01,
+                       misaligned: float=0.2, seed: int=0, end: str="2025-12-31"):
+    # Universo sintético determinista: BASEs con retornos t de Student y ALTs rebalanceados a diario
+    # (±1.5x/2x/3x del retorno diario de su BASE, menos comisión, más ruido de seguimiento).
+    # Cada ticker pierde ~gap_rate de sus barras; una fracción `misaligned` de ALTs cotiza con otro
+    # calendario de festivos y algunos ALTs empiezan más tarde (lanzamientos recientes).
+    # Devuelve (close, volume, pairs) con una Series por ticker, como `PriceStore.load`.
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end=end, periods=n_bars, name="Date")
+    n_bases = max(1, -(-n_pairs // alts_per_base))
+    holidays = rng.random((2, n_bars)) < 0.04            # dos calendarios de festivos
+    close, volume, pairs = {}, {}, []
+
+    def add(ticker, ret, keep):
+        keep = keep & (rng.random(n_bars) >= gap_rate)
+        close[ticker] = pd.Series(100 * np.cumprod(1 + ret)[keep], idx[keep], name=ticker)
+        volume[ticker] = pd.Series(rng.integers(50_000, 5_000_000, int(keep.sum())).astype(float), idx[keep], name=ticker)
+
+    for i in range(n_bases):
+        base = f"B{i:04d}"
+        r_base = 0.012 * rng.standard_t(5, n_bars) / np.sqrt(5 / 3) + 0.0003
+        add(base, r_base, ~holidays[0])
+        for j in range(min(alts_per_base, n_pairs - len(pairs))):
+            lev = LEVERAGES[(i + j) % len(LEVERAGES)]
+            alt = f"{base}{'U' if lev > 0 else 'D'}{j}"
+            r_alt = lev * r_base - 0.0095 / 252 + rng.standard_t(4, n_bars) * 0.0015
+            keep = ~holidays[1] if rng.random() < misaligned else ~holidays[0]
+            if rng.random() < 0.25:
+                keep = keep & (np.arange(n_bars) >= int(rng.integers(0, n_bars // 2)))
+            add(alt, r_alt, keep)
+            pairs.append({"base": base, "alt": alt, "target_ratio": lev, "emisor": "SYN"})
+    return close, volume, pairs
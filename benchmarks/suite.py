@@ -0,0 +1,169 @@
+# Suite de rendimiento sobre el universo sintético apalancado (sin red): tiempo, rendimiento y memoria pico
+# de las funciones del núcleo por longitud de historia (1M → MAX) y por tamaño de universo (10 → 5000 pares).
+# Escribe un JSON comparable entre ejecuciones:
+#   python benchmarks/suite.py --out antes.json
+#   python benchmarks/suite.py --out despues.json --compare antes.json [--threshold 0.15]
+# --quick limita a historias ≤ 1Y y universos ≤ 100 pares; --only rolling_beta,summarize_universe filtra casos.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from common import ROOT_DIR, WINDOWS, leveraged_universe
+from core.hedge_adv import (returns, rolling_beta, beta_wls, hedge_ratio_cointegration, simulate_hedge_pnl)
+from core.metrics import summarize_pair, summarize_universe
+from core.panel import PricePanel
+from core.rolling import pair_panels, rolling_beta_panel
+
+UNIVERSES = (10, 100, 1000, 5000)
+
+def _pair_inputs(n_bars: int):
+    # un par con calendario desalineado y huecos; las entradas se preparan fuera del tiempo medido
+    close, vol, pairs = leveraged_universe(4, n_bars, misaligned=1.0, seed=1)
+    p = pairs[0]
+    b, a = close[p["base"]], close[p["alt"]]
+    idx = b.index.intersection(a.index)
+    return {
+        "b": b, "a": a, "vb": vol[p["base"]], "va": vol[p["alt"]], "target": p["target_ratio"],
+        "xr": returns(b.loc[idx]), "yr": returns(a.loc[idx]), "bi": b.loc[idx], "ai": a.loc[idx],
+        "start": str(idx[0].date()), "end": str(idx[-1].date()),
+    }
+
+# (nombre, función(entradas)) por par; la unidad de rendimiento es barras/s
+PAIR_CASES = [
+    ("rolling_beta", lambda d: rolling_beta(d["xr"], d["yr"], 60)),
+    ("summarize_pair", lambda d: summarize_pair(d["b"], d["a"], d["vb"], d["va"], d["target"], d["start"], d["end"])),
+    ("beta_wls", lambda d: beta_wls(d["xr"], d["yr"])),
+    ("hedge_ratio_cointegration", lambda d: hedge_ratio_cointegration(d["bi"], d["ai"])),
+    ("simulate_hedge_pnl", lambda d: simulate_hedge_pnl(1000.0, -3000.0, d["ai"], d["bi"])),
+]
+
+def _universe_inputs(n_pairs: int, n_bars: int):
+    close, vol, pairs = leveraged_universe(n_pairs, n_bars, seed=2)
+    panel = PricePanel.from_series(close, vol)
+    x, y = pair_panels(panel, pairs)
+    return {"panel": panel, "pairs": pairs, "x": x, "y": y,
+            "start": str(panel.index[0].date()), "end": str(panel.index[-1].date())}
+
+# por universo; la unidad de rendimiento es pares/s
+UNIVERSE_CASES = [
+    ("summarize_universe", lambda d: summarize_universe(d["panel"], None, d["pairs"], d["start"], d["end"])),
+    ("rolling_beta_panel", lambda d: rolling_beta_panel(d["x"], d["y"], 60)),
+    ("pair_panels", lambda d: pair_panels(d["panel"], d["pairs"])),
+]
+
+def measure(fn, repeat: int, budget: float):
+    # por llamada: bucles de ≥0.2 s (como timeit.autorange) para que los casos de ~1 ms no queden en el ruido,
+    # mejor y mediana de `repeat` bucles (se corta si se supera `budget` s); memoria pico en otra pasada
+    timer = timeit.Timer(fn)
+    number, first = timer.autorange()
+    times = [first / number]
+    while len(times) < repeat and sum(times) * number < budget:
+        times.append(timer.timeit(number) / number)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), float(np.median(times)), len(times), peak / 2**20
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+def run(args) -> dict:
+    only = set(args.only.split(",")) if args.only else None
+    windows = {k: v for k, v in WINDOWS.items() if not args.quick or v <= 252}
+    universes = [u for u in UNIVERSES if not args.quick or u <= 100]
+    results = []
+
+    def record(name, params, fn, units):
+        best, median, reps, peak = measure(fn, args.repeat, args.budget)
+        results.append({"name": name, **params, "best_s": best, "median_s": median, "repeat": reps,
+                        "throughput": units / best if best > 0 else None, "peak_mb": peak})
+        label = " ".join(f"{k}={v}" for k, v in params.items())
+        print(f"{name:<26} {label:<28} {best*1e3:10.2f} ms  {units/best:14,.0f}/s  {peak:8.1f} MB", file=sys.stderr)
+
+    for label, n in windows.items():
+        cases = [(name, fn) for name, fn in PAIR_CASES if only is None or name in only]
+        if not cases:
+            break
+        d = _pair_inputs(n)
+        for name, fn in cases:
+            record(name, {"history": label, "bars": n, "pairs": 1}, lambda: fn(d), n)
+
+    for k in universes:
+        cases = [(name, fn) for name, fn in UNIVERSE_CASES if only is None or name in only]
+        if not cases:
+            break
+        d = _universe_inputs(k, args.universe_bars)
+        for name, fn in cases:
+            record(name, {"history": f"{args.universe_bars}b", "bars": args.universe_bars, "pairs": k}, lambda: fn(d), k)
+
+    return {
+        "meta": {"time": pd.Timestamp.now().isoformat(timespec="seconds"), "git": _git_rev(),
+                 "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                 "machine": platform.machine(), "cpus": os.cpu_count(), "quick": args.quick},
+        "results": results,
+    }
+
+def _key(r: dict) -> tuple:
+    return (r["name"], r["bars"], r["pairs"])
+
+def compare(new: dict, old: dict, threshold: float, min_ms: float=0.2) -> int:
+    # cociente de tiempos (mejor de N) caso a caso; devuelve el nº de regresiones por encima del umbral
+    # (las diferencias de menos de `min_ms` no cuentan: a esa escala domina el ruido del sistema)
+    before = {_key(r): r for r in old["results"]}
+    regressions = 0
+    print(f"\ncomparado con {old['meta'].get('git') or '?'} ({old['meta'].get('time')}), umbral ±{threshold:.0%}")
+    print(f"{'caso':<26} {'barras':>7} {'pares':>6} {'antes ms':>10} {'ahora ms':>10} {'cambio':>8}")
+    for r in new["results"]:
+        o = before.get(_key(r))
+        if o is None:
+            continue
+        ratio = r["best_s"] / o["best_s"] if o["best_s"] > 0 else float("nan")
+        flag = ""
+        significant = abs(r["best_s"] - o["best_s"]) * 1e3 >= min_ms
+        if significant and ratio > 1 + threshold:
+            flag, regressions = "  ▲ regresión", regressions + 1
+        elif significant and ratio < 1 - threshold:
+            flag = "  ▼ mejora"
+        print(f"{r['name']:<26} {r['bars']:>7} {r['pairs']:>6} {o['best_s']*1e3:>10.2f} {r['best_s']*1e3:>10.2f} "
+              f"{ratio - 1:>+8.1%}{flag}")
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", default="bench_suite.json")
+    ap.add_argument("--compare", help="JSON de una ejecución anterior")
+    ap.add_argument("--threshold", type=float, default=0.15, help="cambio relativo que cuenta como regresión")
+    ap.add_argument("--min-ms", type=float, default=0.2, help="diferencia absoluta mínima para marcar un cambio")
+    ap.add_argument("--quick", action="store_true")
+    ap.add_argument("--only", help="casos separados por comas")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget", type=float, default=10.0, help="segundos máximos de repeticiones por caso")
+    ap.add_argument("--universe-bars", type=int, default=252)
+    args = ap.parse_args()
+
+    warnings.simplefilter("ignore", FutureWarning)   # avisos de statsmodels en cada llamada
+    res = run(args)
+    with open(args.out, "w") as f:
+        json.dump(res, f, indent=1)
+    print(f"{len(res['results'])} casos → {args.out}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        sys.exit(1 if compare(res, old, args.threshold, args.min_ms) else 0)
+
+if __name__ == "__main__":
+    main()
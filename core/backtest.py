@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+from core.metrics import TRADING_DAYS
+from core.intraday import infer_periods_per_year
+from core.rolling import rolling_ols_arrays, window_sums
+from core.robust import rolling_theil_sen
+from core.kalman import KalmanHedge
+from core.coint import coint_scan
+from core.profiling import timed
+
+METHODS = ("OLS", "WLS", "ROBUST", "KALMAN", "COINT")
+
+Rebalance = Union[int, str]
+
+def align_pair(base_close: pd.Series, alt_close: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    base_close = base_close.dropna(); alt_close = alt_close.dropna()
+    idx = base_close.index.intersection(alt_close.index)
+    return base_close.loc[idx], alt_close.loc[idx]
+
+def _rolling_wls_beta(x: np.ndarray, y: np.ndarray, window: int, vol_window: int=20) -> np.ndarray:
+    # WLS rodante con pesos 1/σ² de ALT (σ rodante de `vol_window` días, solo pasado)
+    vol = pd.Series(y).rolling(vol_window, min_periods=2).std().to_numpy()
+    with np.errstate(divide="ignore"):
+        w = np.where(vol > 0, 1.0 / vol ** 2, np.nan)
+    valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(w)
+    X = x[:, None]; Y = y[:, None]; W = w[:, None]
+    (sw, swx, swy, swxx, swxy), _ = window_sums([W, W * X, W * Y, W * X * X, W * X * Y], valid[:, None], window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cxx = swxx - swx * swx / sw
+        beta = (swxy - swx * swy / sw) / np.where(cxx > 0, cxx, np.nan)
+    return beta[:, 0]
+
+@timed()
+def hedge_ratio_series(base_close: pd.Series, alt_close: pd.Series, method: str="OLS", window: int=60,
+                       process_var: float=1e-4, obs_var: float=1e-5) -> pd.Series:
+    # β de cobertura conocido al cierre de cada día (sin mirar al futuro), sobre las fechas comunes del par
+    b, a = align_pair(base_close, alt_close)
+    x = b.pct_change().to_numpy(); y = a.pct_change().to_numpy()
+    if method == "OLS":
+        beta = rolling_ols_arrays(x, y, window).beta[:, 0]
+    elif method == "WLS":
+        beta = _rolling_wls_beta(x, y, window)
+    elif method == "ROBUST":
+        beta = np.full(len(x), np.nan)
+        beta[1:] = rolling_theil_sen(x[1:], y[1:], window)
+    elif method == "KALMAN":
+        kf = KalmanHedge(process_var=process_var, obs_var=obs_var)
+        _, betas = kf.run(x, y)
+        seen = np.cumsum(np.isfinite(x) & np.isfinite(y))
+        beta = np.where(seen >= window, betas[:, 0], np.nan)
+    elif method == "COINT":
+        beta = coint_scan(b, a, window=max(window, 20))["beta"].reindex(b.index).to_numpy()
+    else:
+        raise ValueError(f"método desconocido: {method}")
+    return pd.Series(beta, index=b.index, name=f"hr_{method.lower()}")
+
+def _parse_rebalance(spec: Rebalance) -> Tuple[str, float]:
+    # entero k -> cada k barras; "5%" -> cuando la cobertura objetivo se desvía >5% de la mantenida
+    if isinstance(spec, str) and spec.endswith("%"):
+        return "drift", float(spec[:-1]) / 100.0
+    k = int(spec)
+    if k < 1:
+        raise ValueError("rebalance debe ser >= 1 barra")
+    return "calendar", float(k)
+
+def _held_positions(target: np.ndarray, specs: Sequence[Rebalance]) -> Tuple[np.ndarray, np.ndarray]:
+    # target: (n, S) cobertura objetivo; devuelve la posición mantenida tras el rebalanceo de cada día
+    n, S = target.shape
+    valid = np.isfinite(target)
+    started = np.cumsum(valid, axis=0) > 0
+    t0 = np.where(valid.any(axis=0), np.argmax(valid, axis=0), n)
+    rows = np.arange(n)[:, None]
+    mask = np.zeros((n, S), dtype=bool)
+    for j, spec in enumerate(specs):
+        kind, p = _parse_rebalance(spec)
+        if kind == "calendar":
+            mask[:, j] = valid[:, j] & ((rows[:, 0] - t0[j]) % int(p) == 0) & (rows[:, 0] >= t0[j])
+        else:
+            # umbral de deriva: un salto por rebalanceo, no por día
+            col = target[:, j]
+            t = t0[j]
+            while t < n:
+                mask[t, j] = True
+                held = col[t]
+                dev = np.abs(col[t + 1:] - held) > p * abs(held)
+                dev &= np.isfinite(col[t + 1:])
+                if not dev.any():
+                    break
+                t = t + 1 + int(np.argmax(dev))
+    last = np.maximum.accumulate(np.where(mask, rows, -1), axis=0)
+    held = np.where(last >= 0, target[np.maximum(last, 0), np.arange(S)], 0.0)
+    return np.where(started, held, 0.0), mask
+
+def simulate_rebalanced(alt: np.ndarray, base: np.ndarray, hr: np.ndarray, qty_alt: float,
+                        specs: Sequence[Rebalance], commission: float=0.005, slippage_bps: float=1.0) -> Dict[str, np.ndarray]:
+    # alt, base: (n,) precios; hr: (n, S) ratios de cobertura por escenario
+    n, S = hr.shape
+    A = alt[:, None]; B = base[:, None]
+    target = -hr * qty_alt * A / B
+    held, mask = _held_positions(target, specs)
+    active = np.cumsum(np.isfinite(target), axis=0) > 0
+    prev_held = np.vstack([np.zeros((1, S)), held[:-1]])
+    prev_active = np.vstack([np.zeros((1, S), dtype=bool), active[:-1]])
+    dA = np.vstack([np.zeros((1, 1)), np.diff(A, axis=0)])
+    dB = np.vstack([np.zeros((1, 1)), np.diff(B, axis=0)])
+
+    alt_pnl = np.where(prev_active, qty_alt * dA, 0.0)
+    base_pnl = prev_held * dB
+    trade = held - prev_held
+    open_alt = active & ~prev_active
+    slip = slippage_bps / 1e4
+    cost = np.abs(trade) * (commission + B * slip) + np.where(open_alt, abs(qty_alt) * (commission + A * slip), 0.0)
+    net = alt_pnl + base_pnl - cost
+    return {"alt_pnl": alt_pnl, "base_pnl": base_pnl, "cost": cost, "net_pnl": net,
+            "held_base": held, "turnover": np.abs(trade) * B, "rebalanced": mask, "active": prev_active}
+
+def _summary(sim: Dict[str, np.ndarray], alt: np.ndarray, qty_alt: float, periods: float=TRADING_DAYS) -> pd.DataFrame:
+    act = sim["active"]
+    cnt = act.sum(axis=0)
+    def var(v):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            m = np.where(act, v, 0.0).sum(axis=0) / cnt
+            return np.where(act, (v - m) ** 2, 0.0).sum(axis=0) / (cnt - 1)
+    hedged = sim["alt_pnl"] + sim["base_pnl"]
+    var_u, var_h = var(sim["alt_pnl"]), var(sim["net_pnl"])
+    # nocional al precio ALT de la barra en que se abre la posición (la anterior a la primera activa)
+    first = np.argmax(act, axis=0)
+    notional = np.where(act.any(axis=0), abs(qty_alt) * alt[np.maximum(first - 1, 0)], np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return pd.DataFrame({
+            "n_days": cnt,
+            "pnl_gross": hedged.sum(axis=0),
+            "costs": sim["cost"].sum(axis=0),
+            "pnl_net": sim["net_pnl"].sum(axis=0),
+            "turnover": sim["turnover"].sum(axis=0),
+            "turnover_ann": sim["turnover"].sum(axis=0) / np.maximum(cnt, 1) * periods / notional,
+            "n_rebalances": sim["rebalanced"].sum(axis=0),
+            "vol_unhedged": np.sqrt(periods * var_u) / notional,
+            "vol_hedged": np.sqrt(periods * var_h) / notional,
+            "hedge_eff": np.where(var_u > 0, 1.0 - var_h / var_u, np.nan),
+        })
+
+@timed()
+def backtest_hedge(alt_price: pd.Series, base_price: pd.Series, hedge_ratio: pd.Series, qty_alt: float=1000.0,
+                   rebalance: Rebalance=1, commission: float=0.005, slippage_bps: float=1.0) -> Tuple[pd.DataFrame, dict]:
+    b, a = align_pair(base_price, alt_price)
+    hr = hedge_ratio.reindex(b.index).to_numpy()[:, None]
+    sim = simulate_rebalanced(a.to_numpy(), b.to_numpy(), hr, qty_alt, [rebalance], commission, slippage_bps)
+    daily = pd.DataFrame({k: sim[k][:, 0] for k in ("alt_pnl","base_pnl","cost","net_pnl","held_base","turnover")},
+                         index=b.index)
+    daily["cum_pnl"] = daily["net_pnl"].cumsum()
+    summary = _summary(sim, a.to_numpy(), qty_alt, infer_periods_per_year(b.index)).iloc[0].to_dict()
+    return daily, summary
+
+@timed()
+def backtest_grid(close: Union[Dict[str, pd.Series], pd.DataFrame], pairs: List[dict],
+                  methods: Iterable[str]=("OLS",), windows: Iterable[int]=(60,),
+                  rebalances: Iterable[Rebalance]=(1,), qty_alt: float=1000.0,
+                  commission: float=0.005, slippage_bps: float=1.0) -> pd.DataFrame:
+    # todas las combinaciones (par, método, ventana, rebalanceo); un par a la vez, escenarios en columnas
+    methods, windows, rebalances = list(methods), list(windows), list(rebalances)
+    frames = []
+    for p in pairs:
+        if p["base"] not in close or p["alt"] not in close:
+            continue
+        b, a = align_pair(close[p["base"]], close[p["alt"]])
+        if len(b) < 3:
+            continue
+        cols, keys = [], []
+        for m in methods:
+            for w in windows:
+                hr = hedge_ratio_series(b, a, m, w).to_numpy()
+                for r in rebalances:
+                    cols.append(hr); keys.append((m, w, r))
+        sim = simulate_rebalanced(a.to_numpy(), b.to_numpy(), np.column_stack(cols), qty_alt,
+                                  [k[2] for k in keys], commission, slippage_bps)
+        summ = _summary(sim, a.to_numpy(), qty_alt, infer_periods_per_year(b.index))
+        summ.insert(0, "rebalance", [str(k[2]) for k in keys])
+        summ.insert(0, "window", [k[1] for k in keys])
+        summ.insert(0, "method", [k[0] for k in keys])
+        summ.insert(0, "pair", f'{p["base"]}→{p["alt"]}')
+        frames.append(summ)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
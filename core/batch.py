@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Optional
+
+from core.metrics import summarize_universe
+from core.rolling import pair_panels, rolling_beta_panel
+from core.robust import theil_sen_slope
+from core.kalman import kalman_beta_panel
+from core.hedge import hedge_shares
+from core.hedge_adv import hedge_ratio_cointegration
+from core.leaderboard import wls_slope
+from core.store import PriceStore, source_from_spec
+from core.panel import PricePanel
+from core import profiling
+
+STAGES = ("load", "metrics", "rolling", "hedge")
+HEDGE_METHODS = ("OLS", "WLS", "ROBUST", "KALMAN", "COINT")
+
+def load_pairs(path: str) -> List[dict]:
+    # CSV o JSON con el esquema de core.pairs.PAIRS (base, alt y opcionalmente target_ratio, emisor, nota)
+    if path.lower().endswith(".json"):
+        with open(path) as f:
+            raw = json.load(f)
+        df = pd.DataFrame(raw["pairs"] if isinstance(raw, dict) else raw)
+    else:
+        df = pd.read_csv(path)
+    missing = {"base", "alt"} - set(df.columns)
+    if missing:
+        raise ValueError(f"faltan columnas en {path}: {sorted(missing)}")
+    pairs = []
+    for rec in df.to_dict("records"):
+        tr = rec.get("target_ratio")
+        pairs.append({
+            "base": str(rec["base"]).strip(),
+            "alt": str(rec["alt"]).strip(),
+            "target_ratio": float(tr) if tr is not None and pd.notna(tr) else None,
+            "emisor": rec.get("emisor") if pd.notna(rec.get("emisor")) else None,
+            "nota": rec.get("nota") if pd.notna(rec.get("nota")) else None,
+        })
+    return pairs
+
+def _hedge_rows(close: PricePanel, pairs: List[dict], x_panel: pd.DataFrame, y_panel: pd.DataFrame,
+                metrics: pd.DataFrame, start: str, end: str, methods=HEDGE_METHODS) -> pd.DataFrame:
+    # ratios de cobertura por método (mismos datos que la pestaña Avanzado) y factor en acciones al último cierre;
+    # los métodos no pedidos quedan en NaN (ROBUST es el más caro: O(n log² n) por par con historia larga)
+    kal = (kalman_beta_panel(x_panel, y_panel).ffill().iloc[-1]
+           if len(x_panel) and "KALMAN" in methods else pd.Series(dtype=float))
+    ols = metrics.set_index(metrics["base"] + "→" + metrics["alt"])["beta_alt_on_base"]
+    rows = []
+    for p in pairs:
+        label = f'{p["base"]}→{p["alt"]}'
+        if label not in x_panel:
+            continue
+        xy = pd.concat([x_panel[label], y_panel[label]], axis=1).dropna().to_numpy()
+        b_px = close[p["base"]].loc[start:end].dropna(); a_px = close[p["alt"]].loc[start:end].dropna()
+        row = {"pair": label, "base": p["base"], "alt": p["alt"], "target_ratio": p.get("target_ratio"),
+               "beta_ols": ols.get(label, np.nan),
+               "beta_wls": wls_slope(xy[:, 0], xy[:, 1]) if len(xy) >= 5 and "WLS" in methods else np.nan,
+               "beta_robust": theil_sen_slope(xy[:, 0], xy[:, 1]) if len(xy) >= 5 and "ROBUST" in methods else np.nan,
+               "beta_kalman": float(kal.get(label, np.nan)),
+               "beta_coint": np.nan, "coint_pvalue": np.nan,
+               "price_base": float(b_px.iloc[-1]) if len(b_px) else np.nan,
+               "price_alt": float(a_px.iloc[-1]) if len(a_px) else np.nan}
+        if len(xy) >= 20 and "COINT" in methods:
+            try:
+                ci = hedge_ratio_cointegration(b_px, a_px)
+                row["beta_coint"], row["coint_pvalue"] = ci["beta"], ci["pvalue"]
+            except Exception:
+                pass
+        rows.append(row)
+    out = pd.DataFrame(rows)
+    if not out.empty:
+        out["factor_shares_per_alt"] = hedge_shares(1.0, out["price_alt"], out["price_base"],
+                                                    out["beta_ols"])["factor_shares_per_alt"]
+    return out
+
+def _chunk_task(args) -> dict:
+    # un bloque de pares: lee del almacén local (sin red), calcula y devuelve tablas + tiempos por etapa
+    store_root, pairs, start, end, window, rolling, methods, n_boot, trace = args
+    warnings.simplefilter("ignore", FutureWarning)
+    if trace:
+        profiling.enable()
+    with profiling.run("batch.chunk") as run:
+        out = _chunk_stages(store_root, pairs, start, end, window, rolling, methods, n_boot)
+    # en un proceso del pool el bloque es una ejecución propia y su traza viaja con el resultado; en el
+    # proceso principal es un intervalo más de la ejecución "batch" (run es None)
+    out["trace"] = run.chrome_events(os.getpid()) if run is not None else []
+    return out
+
+def _chunk_stages(store_root, pairs, start, end, window, rolling, methods, n_boot) -> dict:
+    timings = {}
+    t0 = time.perf_counter()
+    store = PriceStore(store_root)
+    tickers = sorted({x for p in pairs for x in (p["base"], p["alt"])})
+    close = store.panel(tickers, pd.Timestamp(start), pd.Timestamp(end))
+    timings["load"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    metrics = summarize_universe(close, None, pairs, start=start, end=end, n_boot=n_boot)
+    timings["metrics"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    x_panel, y_panel = pair_panels(close, pairs, start, end)
+    roll = None
+    if rolling and len(x_panel):
+        rb = rolling_beta_panel(x_panel, y_panel, window)
+        roll = rb.rename_axis("date").reset_index().melt(id_vars="date", var_name="pair", value_name="beta").dropna()
+    timings["rolling"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    hedge = _hedge_rows(close, pairs, x_panel, y_panel, metrics, start, end, methods)
+    timings["hedge"] = time.perf_counter() - t0
+    return {"metrics": metrics, "rolling": roll, "hedge": hedge, "timings": timings, "n_pairs": len(pairs)}
+
+class _ParquetSink:
+    # un ParquetWriter por tabla, abierto con el esquema del primer bloque no vacío
+    def __init__(self, out_dir: str):
+        import pyarrow  # noqa: F401  (dependencia requerida solo por el modo batch)
+        self.out_dir = out_dir
+        self.writers = {}
+        self.rows = {}
+        os.makedirs(out_dir, exist_ok=True)
+
+    def write(self, name: str, df: Optional[pd.DataFrame]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if df is None or df.empty:
+            return
+        if name not in self.writers:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self.writers[name] = pq.ParquetWriter(os.path.join(self.out_dir, f"{name}.parquet"), table.schema)
+        else:
+            table = pa.Table.from_pandas(df, schema=self.writers[name].schema, preserve_index=False)
+        self.writers[name].write_table(table)
+        self.rows[name] = self.rows.get(name, 0) + len(df)
+
+    def close(self):
+        for w in self.writers.values():
+            w.close()
+
+def _normalize(df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    # tipos estables entre bloques (p.ej. target_ratio todo None en un bloque y float en otro)
+    if df is None:
+        return None
+    df = df.copy()
+    for c in ("target_ratio",):
+        if c in df:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype(float)
+    for c in ("start", "end"):
+        if c in df:
+            df[c] = df[c].astype(str)
+    return df
+
+def run_batch(pairs: List[dict], start: str, end: str, out_dir: str, store_root: str, source=None,
+              window: int=60, chunk_pairs: int=64, n_jobs: Optional[int]=None, rolling: bool=True,
+              methods=HEDGE_METHODS, n_boot: int=0, progress=sys.stderr, trace: Optional[str]=None) -> dict:
+    # 1) descarga incremental al almacén local en el proceso principal (una sola vez por ticker);
+    # 2) bloques de `chunk_pairs` pares en un pool de procesos, con como mucho 2×n_jobs bloques en vuelo;
+    # 3) cada bloque se escribe a Parquet en cuanto llega, así la memoria no crece con el universo.
+    # Con `trace` se perfila todo (también los bloques de cada proceso) y se escribe en formato Chrome trace.
+    if trace:
+        profiling.enable()
+        profiling.begin_run("batch")
+    events: List[dict] = []
+    t_all = time.perf_counter()
+    timings = {"fetch": 0.0, **{s: 0.0 for s in STAGES}, "write": 0.0}
+    store = PriceStore(store_root, source)
+    tickers = sorted({x for p in pairs for x in (p["base"], p["alt"])})
+    t0 = time.perf_counter()
+    for i in range(0, len(tickers), 200):
+        store.update(tickers[i:i + 200], pd.Timestamp(start), pd.Timestamp(end))
+    timings["fetch"] = time.perf_counter() - t0
+
+    chunks = [pairs[i:i + chunk_pairs] for i in range(0, len(pairs), chunk_pairs)]
+    n_jobs = n_jobs or os.cpu_count() or 1
+    sink = _ParquetSink(out_dir)
+    done_pairs = 0
+
+    def consume(res):
+        nonlocal done_pairs
+        for k, v in res["timings"].items():
+            timings[k] += v
+        events.extend(res["trace"])
+        t0 = time.perf_counter()
+        for name in ("metrics", "rolling", "hedge"):
+            sink.write(name, _normalize(res[name]))
+        timings["write"] += time.perf_counter() - t0
+        done_pairs += res["n_pairs"]
+        if progress is not None:
+            el = time.perf_counter() - t_all
+            eta = el / done_pairs * (len(pairs) - done_pairs) if done_pairs else np.nan
+            print(f"[batch] {done_pairs}/{len(pairs)} pares · {el:.1f}s · ETA {eta:.1f}s", file=progress, flush=True)
+
+    methods = tuple(m.upper() for m in methods)
+    jobs = [(store_root, c, start, end, window, rolling, methods, n_boot, bool(trace)) for c in chunks]
+    try:
+        if n_jobs == 1 or len(jobs) <= 1:
+            for j in jobs:
+                consume(_chunk_task(j))
+        else:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(jobs))) as ex:
+                queue = iter(jobs)
+                inflight = set()
+                for j in queue:
+                    inflight.add(ex.submit(_chunk_task, j))
+                    if len(inflight) >= 2 * n_jobs:
+                        break
+                while inflight:
+                    finished, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        consume(fut.result())
+                        nxt = next(queue, None)
+                        if nxt is not None:
+                            inflight.add(ex.submit(_chunk_task, nxt))
+    finally:
+        sink.close()
+    timings["total"] = time.perf_counter() - t_all
+    if trace:
+        profiling.end_run()
+        with open(trace, "w") as f:
+            f.write(profiling.PROFILER.chrome_trace(extra=events))
+    return {"pairs": len(pairs), "chunks": len(chunks), "rows": dict(sink.rows), "timings": timings}
+
+def main(argv: Optional[List[str]]=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m core.batch",
+                                 description="Métricas, β rodante y ratios de cobertura de un universo de pares a Parquet")
+    ap.add_argument("pairs", help="fichero de pares (.csv o .json) con columnas base, alt[, target_ratio, emisor]")
+    ap.add_argument("--start", required=True)
+    ap.add_argument("--end", default=str(pd.Timestamp.today().date()))
+    ap.add_argument("--out", default="batch_out", help="directorio de salida (metrics/rolling/hedge.parquet)")
+    ap.add_argument("--store", default=os.environ.get("PAIRS_LAB_STORE", os.path.join(".data", "prices")))
+    ap.add_argument("--source", default=os.environ.get("PAIRS_LAB_SOURCE"), help="yfinance o csv:<directorio>")
+    ap.add_argument("--window", type=int, default=60, help="ventana del β rodante")
+    ap.add_argument("--chunk", type=int, default=64, help="pares por bloque")
+    ap.add_argument("--jobs", type=int, default=None, help="procesos (por defecto, nº de CPUs)")
+    ap.add_argument("--no-rolling", action="store_true", help="no escribir el β rodante")
+    ap.add_argument("--methods", default=",".join(HEDGE_METHODS), help="métodos de cobertura, separados por comas")
+    ap.add_argument("--boot", type=int, default=0, help="remuestreos bootstrap para intervalos de β (0 = sin intervalos)")
+    ap.add_argument("--trace", help="escribe una traza (formato Chrome trace, chrome://tracing o Perfetto) en este fichero")
+    args = ap.parse_args(argv)
+
+    pairs = load_pairs(args.pairs)
+    report = run_batch(pairs, args.start, args.end, args.out, args.store, source_from_spec(args.source),
+                       window=args.window, chunk_pairs=args.chunk, n_jobs=args.jobs, rolling=not args.no_rolling,
+                       methods=[m.strip() for m in args.methods.split(",") if m.strip()], n_boot=args.boot,
+                       trace=args.trace)
+    t = report["timings"]
+    print(f"[batch] {report['pairs']} pares en {report['chunks']} bloques → {args.out}", file=sys.stderr)
+    for k in ("fetch",) + STAGES + ("write", "total"):
+        print(f"[batch]   {k:<8} {t[k]:8.2f}s", file=sys.stderr)
+    print(json.dumps(report))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+import os
+import sys
+import time
+import hashlib
+import threading
+import functools
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from core.profiling import count
+
+def _update(h, obj):
+    if isinstance(obj, (pd.Series, pd.DataFrame)):
+        h.update(type(obj).__name__.encode())
+        h.update(repr(getattr(obj, "name", None) if isinstance(obj, pd.Series) else list(obj.columns)).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, pd.Index):
+        h.update(pd.util.hash_pandas_object(obj).values.tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"{obj.dtype}{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        h.update(b"{")
+        for k in sorted(obj, key=repr):
+            _update(h, k); _update(h, obj[k])
+        h.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for v in obj:
+            _update(h, v)
+        h.update(b"]")
+    else:
+        h.update(repr(obj).encode())
+    h.update(b"|")
+
+def fingerprint(*objs) -> str:
+    # huella estable del contenido (valores + índice) de series, paneles, arrays y parámetros
+    h = hashlib.blake2b(digest_size=16)
+    for obj in objs:
+        _update(h, obj)
+    return h.hexdigest()
+
+_MEMOIZED: list = []
+
+def memo_stats() -> pd.DataFrame:
+    # aciertos/fallos y ocupación de cada función memoizada del proceso
+    rows = [w.cache_info() for w in _MEMOIZED]
+    out = pd.DataFrame(rows, columns=["name", "hits", "misses", "size", "maxsize"])
+    lookups = out["hits"] + out["misses"]
+    out["hit_rate"] = np.where(lookups > 0, out["hits"] / lookups.where(lookups > 0, 1), np.nan)
+    return out
+
+def memoize(maxsize: int=32):
+    # caché LRU por huella de los argumentos; el resultado se comparte, tratarlo como solo lectura
+    def deco(fn):
+        cache = OrderedDict()
+        lock = threading.Lock()
+        stats = {"hits": 0, "misses": 0}
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = fingerprint(fn.__qualname__, args, kwargs)
+            with lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    stats["hits"] += 1
+                    count("memoize.hits")
+                    return cache[key]
+                stats["misses"] += 1
+            count("memoize.misses")
+            value = fn(*args, **kwargs)
+            with lock:
+                cache[key] = value
+                cache.move_to_end(key)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return value
+
+        wrapper.cache_clear = cache.clear
+        wrapper.cache_info = lambda: {"name": fn.__qualname__, **stats, "size": len(cache), "maxsize": maxsize}
+        _MEMOIZED.append(wrapper)
+        return wrapper
+    return deco
+
+def sizeof(obj) -> int:
+    # bytes aproximados retenidos por un valor cacheado (pandas con deep=True)
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(sizeof(k) + sizeof(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sum(sizeof(v) for v in obj)
+    if hasattr(obj, "nbytes"):
+        return int(obj.nbytes)
+    return sys.getsizeof(obj)
+
+class SharedCache:
+    # Caché de proceso compartida entre sesiones: TTL por entrada, expulsión LRU por bytes y
+    # single-flight (peticiones concurrentes de la misma clave esperan al único cálculo en curso).
+    # Los valores se comparten por referencia: tratarlos como solo lectura.
+    def __init__(self, max_bytes: int=512 * 2**20, ttl: Optional[float]=900.0):
+        self.max_bytes = int(max_bytes)
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[object, float, int]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._counts = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expirations": 0, "errors": 0}
+
+    @staticmethod
+    def key(*parts) -> str:
+        return fingerprint(*parts)
+
+    def _drop(self, key: str):
+        _, _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def _lookup(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires, _ = entry
+        if expires < now:
+            self._drop(key)
+            self._counts["expirations"] += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            found, value = self._lookup(key, time.monotonic())
+            self._counts["hits" if found else "misses"] += 1
+            return value if found else default
+
+    def put(self, key: str, value, ttl: Optional[float]=None):
+        ttl = self.ttl if ttl is None else ttl
+        nbytes = sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if nbytes > self.max_bytes:
+                return value
+            expires = time.monotonic() + ttl if ttl is not None else float("inf")
+            self._entries[key] = (value, expires, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._counts["evictions"] += 1
+        return value
+
+    def get_or_compute(self, key: str, fn: Callable[[], object], ttl: Optional[float]=None):
+        with self._lock:
+            found, value = self._lookup(key, time.monotonic())
+            if found:
+                self._counts["hits"] += 1
+                count("shared_cache.hits")
+                return value
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+                self._counts["misses"] += 1
+            else:
+                self._counts["coalesced"] += 1
+        count("shared_cache.misses" if leader else "shared_cache.coalesced")
+        if not leader:
+            return fut.result()
+        try:
+            value = fn()
+        except BaseException as e:
+            with self._lock:
+                self._counts["errors"] += 1
+                del self._inflight[key]
+            fut.set_exception(e)
+            raise
+        self.put(key, value, ttl)
+        with self._lock:
+            del self._inflight[key]
+        fut.set_result(value)
+        return value
+
+    def invalidate(self, key: Optional[str]=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear(); self._bytes = 0
+            elif key in self._entries:
+                self._drop(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counts["hits"] + self._counts["misses"] + self._counts["coalesced"]
+            return {**self._counts, "entries": len(self._entries), "bytes": self._bytes,
+                    "max_bytes": self.max_bytes, "inflight": len(self._inflight),
+                    "hit_rate": (self._counts["hits"] + self._counts["coalesced"]) / lookups if lookups else np.nan}
+
+_SHARED: Optional[SharedCache] = None
+_SHARED_LOCK = threading.Lock()
+
+def shared_cache() -> SharedCache:
+    # instancia única por proceso; tamaño y TTL desde PAIRS_LAB_CACHE_MB / PAIRS_LAB_CACHE_TTL
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            _SHARED = SharedCache(max_bytes=int(float(os.environ.get("PAIRS_LAB_CACHE_MB", 512)) * 2**20),
+                                  ttl=float(os.environ.get("PAIRS_LAB_CACHE_TTL", 900)))
+        return _SHARED
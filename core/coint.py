@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple, Union
+
+from core.cache import memoize
+
+MIN_WINDOW = 20
+
+# MacKinnon (1994), regresión "c", N=1 — mismos coeficientes que statsmodels.tsa.adfvalues.mackinnonp
+_TAU_MAX, _TAU_MIN, _TAU_STAR = 2.74, -18.83, -1.61
+_TAU_SMALLP = (2.1659, 1.4412, 0.038269)
+_TAU_LARGEP = (1.7339, 0.93202, -0.12745, -0.010368)
+
+def mackinnon_pvalue(stat: np.ndarray) -> np.ndarray:
+    from scipy.special import ndtr   # import diferido: scipy no entra en el arranque de la app
+    stat = np.asarray(stat, dtype=float)
+    with np.errstate(invalid="ignore", over="ignore"):
+        small = np.polyval(_TAU_SMALLP[::-1], stat)
+        large = np.polyval(_TAU_LARGEP[::-1], stat)
+        p = ndtr(np.where(stat <= _TAU_STAR, small, large))
+        p = np.where(stat > _TAU_MAX, 1.0, p)
+        p = np.where(stat < _TAU_MIN, 0.0, p)
+    return np.where(np.isnan(stat), np.nan, p)
+
+def _log_pair(x_price: pd.Series, y_price: pd.Series) -> Tuple[pd.Index, np.ndarray, np.ndarray]:
+    lx = np.log(x_price.dropna()); ly = np.log(y_price.dropna())
+    idx = lx.index.intersection(ly.index)
+    return idx, lx.loc[idx].values, ly.loc[idx].values
+
+def _design(lx: np.ndarray, ly: np.ndarray) -> np.ndarray:
+    # por fila t: [Δly, Δlx, ly[t-1], lx[t-1], Δly[t-1], Δlx[t-1]] (0 donde no existe)
+    L, P = lx.shape
+    V = np.zeros((L, P, 6))
+    V[1:, :, 0] = np.diff(ly, axis=0)
+    V[1:, :, 1] = np.diff(lx, axis=0)
+    V[1:, :, 2] = ly[:-1]
+    V[1:, :, 3] = lx[:-1]
+    V[2:, :, 4] = V[1:-1, :, 0]
+    V[2:, :, 5] = V[1:-1, :, 1]
+    return V
+
+def _range_sums(C: np.ndarray, a: np.ndarray, e: np.ndarray) -> np.ndarray:
+    # suma de filas [a, e] a partir de la suma acumulada C (con fila 0 = 0)
+    return C[e + 1] - C[a]
+
+def _ols_slope_t(s_yy, s_y, s_xx, s_x, s_xy, n, g=None):
+    # regresión centrada de D sobre L (y opcionalmente G) con constante: t del coef. de L, SSR
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cxx = s_xx - s_x * s_x / n
+        cxy = s_xy - s_x * s_y / n
+        cyy = s_yy - s_y * s_y / n
+        if g is None:
+            coef = cxy / cxx
+            ssr = cyy - coef * cxy
+            k = 2
+            inv00 = 1.0 / cxx
+        else:
+            s_gg, s_g, s_xg, s_yg = g
+            cgg = s_gg - s_g * s_g / n
+            cxg = s_xg - s_x * s_g / n
+            cyg = s_yg - s_y * s_g / n
+            det = cxx * cgg - cxg * cxg
+            coef = (cgg * cxy - cxg * cyg) / det
+            phi = (cxx * cyg - cxg * cxy) / det
+            ssr = cyy - coef * cxy - phi * cyg
+            k = 3
+            inv00 = cgg / det
+        ssr = np.maximum(ssr, 0.0)
+        tstat = coef / np.sqrt(ssr / (n - k) * inv00)
+        aic = n * (np.log(2 * np.pi) + np.log(ssr / n) + 1) + 2 * k
+    return tstat, aic
+
+def _scan_block(lx: np.ndarray, ly: np.ndarray, lengths: np.ndarray, window: Optional[int], min_obs: int) -> Dict[str, np.ndarray]:
+    # lx, ly: (L, P) log-precios compactados por par (relleno al final); ventanas terminadas en cada fila e
+    L, P = lx.shape
+    valid = np.arange(L)[:, None] < lengths[None, :]
+    # desplazar por la media no altera β, t ni AIC (lo absorbe la constante) y mejora la precisión
+    mx = np.where(valid, lx, 0.0).sum(axis=0) / np.maximum(lengths, 1)
+    my = np.where(valid, ly, 0.0).sum(axis=0) / np.maximum(lengths, 1)
+    lx = np.where(valid, lx - mx, 0.0); ly = np.where(valid, ly - my, 0.0)
+
+    e = np.arange(L)
+    if window is None:
+        a0 = np.zeros(L, dtype=int)
+        n = (e + 1).astype(float)
+        ready = (e + 1 >= max(min_obs, MIN_WINDOW))
+    else:
+        a0 = e - window + 1
+        n = np.full(L, float(window))
+        ready = a0 >= 0
+    ready = ready[:, None] & valid
+    a0 = np.maximum(a0, 0)
+    ab = a0 + 1; aa = a0 + 2   # rangos de la regresión ADF sin y con retardo
+
+    zero = np.zeros((1, P))
+    def csum(v):
+        return np.concatenate([zero, np.cumsum(v, axis=0)])
+
+    # β de cointegración: OLS de ly sobre lx en la ventana
+    sx = _range_sums(csum(lx), a0, e); sy = _range_sums(csum(ly), a0, e)
+    sxx = _range_sums(csum(lx * lx), a0, e); sxy = _range_sums(csum(lx * ly), a0, e)
+    nn = n[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = (sxy - sx * sy / nn) / (sxx - sx * sx / nn)
+        alpha = (sy - beta * sx) / nn + my - beta * mx
+
+    V = _design(lx, ly)
+    CV = np.concatenate([np.zeros((1, P, 6)), np.cumsum(V, axis=0)])
+    CVV = np.concatenate([np.zeros((1, P, 6, 6)), np.cumsum(V[..., :, None] * V[..., None, :], axis=0)])
+
+    # coeficientes de D = Δe, L = e[t-1], G = Δe[t-1] sobre V (el intercepto del residuo se absorbe)
+    cD = np.zeros((L, P, 6)); cD[..., 0] = 1.0; cD[..., 1] = -beta
+    cL = np.zeros((L, P, 6)); cL[..., 2] = 1.0; cL[..., 3] = -beta
+    cG = np.zeros((L, P, 6)); cG[..., 4] = 1.0; cG[..., 5] = -beta
+
+    def sums(a):
+        SV = _range_sums(CV, a, e); SVV = _range_sums(CVV, a, e)
+        lin = lambda c: np.einsum("tpk,tpk->tp", c, SV)
+        quad = lambda c, d: np.einsum("tpk,tpkl,tpl->tp", c, SVV, d)
+        return lin, quad
+
+    with np.errstate(invalid="ignore"):
+        lin, quad = sums(aa)
+        nA = (n - 2)[:, None]
+        DD, D_, LL, L_, DL = quad(cD, cD), lin(cD), quad(cL, cL), lin(cL), quad(cD, cL)
+        G = (quad(cG, cG), lin(cG), quad(cL, cG), quad(cD, cG))
+        t1, aic1 = _ols_slope_t(DD, D_, LL, L_, DL, nA, g=G)
+        _, aic0 = _ols_slope_t(DD, D_, LL, L_, DL, nA)
+
+        lin, quad = sums(ab)
+        nB = (n - 1)[:, None]
+        t0, _ = _ols_slope_t(quad(cD, cD), lin(cD), quad(cL, cL), lin(cL), quad(cD, cL), nB)
+
+    lag = np.where(aic0 <= aic1, 0, 1)
+    stat = np.where(lag == 0, t0, t1)
+    out = {"beta": beta, "alpha": alpha, "adf_stat": stat, "pvalue": mackinnon_pvalue(stat),
+           "lag": lag.astype(float), "n_obs": np.broadcast_to(nn, beta.shape).astype(float)}
+    return {k: np.where(ready, v, np.nan) for k, v in out.items()}
+
+@memoize(maxsize=64)
+def coint_scan(x_price: pd.Series, y_price: pd.Series, window: Optional[int]=252,
+               min_obs: int=60, step: int=1) -> pd.DataFrame:
+    # Engle–Granger en ventanas rodantes (window=N) o expansivas (window=None): β en log-precios,
+    # ADF (constante, maxlag=1, AIC) sobre los residuos y p-valor aproximado de MacKinnon.
+    idx, lx, ly = _log_pair(x_price, y_price)
+    cols = ["beta","alpha","adf_stat","pvalue","lag","n_obs"]
+    if window is not None and window < MIN_WINDOW:
+        raise ValueError(f"window debe ser >= {MIN_WINDOW}")
+    if len(idx) == 0:
+        return pd.DataFrame(columns=cols, dtype=float)
+    res = _scan_block(lx[:, None], ly[:, None], np.array([len(idx)]), window, min_obs)
+    df = pd.DataFrame({k: res[k][:, 0] for k in cols}, index=idx).dropna(subset=["adf_stat"])
+    return df.iloc[::-1].iloc[::step].iloc[::-1] if step > 1 else df
+
+@memoize(maxsize=16)
+def coint_scan_universe(close: Union[Dict[str, pd.Series], pd.DataFrame], pairs: List[dict],
+                        window: Optional[int]=252, min_obs: int=60, step: int=1,
+                        chunk_pairs: int=16) -> pd.DataFrame:
+    # todos los pares en bloques de `chunk_pairs`; formato largo (pair, date, ...)
+    if window is not None and window < MIN_WINDOW:
+        raise ValueError(f"window debe ser >= {MIN_WINDOW}")
+    prepared = []
+    for p in pairs:
+        if p["base"] not in close or p["alt"] not in close:
+            continue
+        idx, lx, ly = _log_pair(close[p["base"]], close[p["alt"]])
+        if len(idx):
+            prepared.append((f'{p["base"]}→{p["alt"]}', idx, lx, ly))
+    frames = []
+    for c in range(0, len(prepared), chunk_pairs):
+        block = prepared[c:c + chunk_pairs]
+        lengths = np.array([len(b[1]) for b in block])
+        Lmax = int(lengths.max())
+        LX = np.zeros((Lmax, len(block))); LY = np.zeros((Lmax, len(block)))
+        for j, (_, _, lx, ly) in enumerate(block):
+            LX[:len(lx), j] = lx; LY[:len(ly), j] = ly
+        res = _scan_block(LX, LY, lengths, window, min_obs)
+        for j, (label, idx, _, _) in enumerate(block):
+            df = pd.DataFrame({k: res[k][:len(idx), j] for k in ("beta","alpha","adf_stat","pvalue","lag","n_obs")}, index=idx)
+            df = df.dropna(subset=["adf_stat"])
+            if step > 1:
+                df = df.iloc[::-1].iloc[::step].iloc[::-1]
+            df.insert(0, "pair", label)
+            frames.append(df.rename_axis("date").reset_index())
+    if not frames:
+        return pd.DataFrame(columns=["pair","date","beta","alpha","adf_stat","pvalue","lag","n_obs"])
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+def _as_float_x(x) -> np.ndarray:
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    # índices del mínimo y el máximo de cada cubo (n_out/2 cubos iguales) + extremos; conserva picos
+    n = len(y)
+    if n <= n_out or n_out < 4:
+        return np.arange(n)
+    n_buckets = max(1, (n_out - 2) // 2)
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(int)
+    width = int(np.max(np.diff(edges)))
+    # matriz (cubos × ancho) rellenada con NaN para argmin/argmax en bloque
+    starts = edges[:-1]
+    cols = starts[:, None] + np.arange(width)[None, :]
+    inside = cols < edges[1:, None]
+    vals = np.where(inside, y[np.minimum(cols, n - 1)], np.nan)
+    lo = np.nanargmin(vals, axis=1); hi = np.nanargmax(vals, axis=1)
+    idx = np.concatenate([[0], starts + lo, starts + hi, [n - 1]])
+    return np.unique(idx)
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets (Steinarsson, 2013): un punto por cubo, el que forma el triángulo de
+    # mayor área con el punto elegido en el cubo anterior y la media del siguiente
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = _as_float_x(x); y = np.asarray(y, dtype=float)
+    edges = (np.floor(np.arange(n_out - 1) * ((n - 2) / (n_out - 2))) + 1).astype(int)
+    edges[-1] = n - 1
+    # media de cada cubo (para el cubo "siguiente"); el último apunta al punto final
+    bounds = np.r_[edges, n]
+    cx = np.add.reduceat(x, bounds[:-1])[:len(edges)] / np.diff(bounds)[:len(edges)]
+    cy = np.add.reduceat(y, bounds[:-1])[:len(edges)] / np.diff(bounds)[:len(edges)]
+    out = np.empty(n_out, dtype=int)
+    out[0] = 0; out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        nx, ny = cx[i + 1], cy[i + 1]
+        area = np.abs((ax - nx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (ny - ay))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+def downsample(x, y, n_out: int, method: str="lttb") -> Tuple[np.ndarray, np.ndarray]:
+    # (x, y) reducidos a ~n_out puntos conservando la forma; los NaN se descartan antes
+    x = np.asarray(x); y = np.asarray(y, dtype=float)
+    ok = ~np.isnan(y)
+    if not ok.all():
+        x, y = x[ok], y[ok]
+    if len(y) <= n_out:
+        return x, y
+    if method == "lttb":
+        idx = lttb_indices(x, y, n_out)
+    elif method == "minmax":
+        idx = minmax_indices(y, n_out)
+    else:
+        raise ValueError(f"método de reducción desconocido: {method}")
+    return x[idx], y[idx]
+
+def downsample_series(s: pd.Series, n_out: int, method: str="lttb", start=None, end=None) -> pd.Series:
+    # recorta a [start, end] y reduce: al acercar el rango, el mismo presupuesto da más resolución
+    if start is not None or end is not None:
+        s = s.loc[start:end]
+    x, y = downsample(s.index.values, s.to_numpy(dtype=float), n_out, method)
+    return pd.Series(y, index=pd.Index(x, name=s.index.name), name=s.name)
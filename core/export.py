@@ -0,0 +1,209 @@
+import os
+import argparse
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from core import methods
+from core.hedge_adv import spread_bands, hedge_pnl
+from core.panel import PricePanel
+from core.profiling import timed, span
+
+# Exportación masiva de las series de análisis que hay detrás de los gráficos (β rodante, ratio de
+# cobertura, spread con bandas de Bollinger, P&L simulado) para todos los pares, en Arrow/Parquet.
+# Nada se calcula hasta que se pide una exportación: `iter_batches` genera un par cada vez y entrega
+# lotes Arrow de como mucho `batch_rows` filas, que los escritores vuelcan al disco según llegan; la
+# memoria queda acotada por un par + un lote, no por el universo. Formato largo y estable:
+#   date, base, alt, series, field, value
+# pyarrow se importa solo al exportar (como statsmodels en core.hedge_adv).
+
+SERIES = ("hedge_ratio", "rolling_beta", "spread", "pnl")
+LAYOUTS = ("long", "partitioned")
+FORMATS = ("parquet", "arrow")
+
+LABELS = ("base", "alt", "series", "field")
+
+def _schema():
+    # las columnas de etiquetas van codificadas como diccionario: un entero por fila, no una cadena
+    import pyarrow as pa
+    label = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([("date", pa.timestamp("ns")), ("base", label), ("alt", label),
+                      ("series", label), ("field", label), ("value", pa.float64())])
+
+def pair_series(b_close: pd.Series, a_close: pd.Series, method: str="OLS", window: int=60,
+                qty_alt: float=1000.0, series: Sequence[str]=SERIES, **params) -> Dict[str, pd.DataFrame]:
+    # series de un par (precios ya recortados a la ventana) con los mismos cálculos que la pestaña Avanzado;
+    # un DataFrame ancho por serie, con las fechas como índice. Faltan las que no se pueden calcular
+    out: Dict[str, pd.DataFrame] = {}
+    b_close = b_close.dropna(); a_close = a_close.dropna()
+    if len(b_close) < 2 or len(a_close) < 2:
+        return out
+    est = methods.estimate(method, b_close, a_close, **params)
+    hr, hr_series = est["hr"], est["hr_series"]
+    ok = hr is not None and not np.isnan(hr)
+    if "rolling_beta" in series:
+        rb = hr_series if hr_series is not None else methods.rolling(method, b_close, a_close, window, **params)
+        if rb is not None and not rb.empty:
+            out["rolling_beta"] = rb.to_frame("beta")
+    if not ok:
+        return out
+    joint = b_close.index.intersection(a_close.index)
+    if "hedge_ratio" in series:
+        beta = hr_series.reindex(joint).ffill() if hr_series is not None else pd.Series(hr, index=joint)
+        ratio = beta * (a_close.reindex(joint) / b_close.reindex(joint))
+        out["hedge_ratio"] = pd.DataFrame({"beta": beta, "shares_per_alt": ratio})
+    if "spread" in series:
+        bands = spread_bands(b_close, a_close, hr, hr_series)
+        bands.attrs = {}
+        out["spread"] = bands
+    if "pnl" in series:
+        sim = hedge_pnl(b_close, a_close, hr, hr_series, qty_alt)
+        pnl = sim["pnl"].copy()
+        qb = sim["qty_base"]
+        pnl["qty_base"] = qb.reindex(pnl.index) if isinstance(qb, pd.Series) else qb
+        out["pnl"] = pnl
+    return out
+
+def _long_columns(frames: Dict[str, pd.DataFrame], base: str, alt: str) -> Optional[dict]:
+    # de anchos a largo sin pasar por DataFrame.melt: fechas y valores concatenados, y un tramo
+    # (base, alt, serie, campo, nº de filas) por columna para las etiquetas
+    dates, values, segments = [], [], []
+    for name, df in frames.items():
+        idx = df.index.to_numpy("datetime64[ns]")
+        for field in df.columns:
+            v = df[field].to_numpy(np.float64)
+            keep = ~np.isnan(v)
+            if keep.any():
+                dates.append(idx[keep]); values.append(v[keep])
+                segments.append((base, alt, name, field, int(keep.sum())))
+    if not segments:
+        return None
+    return {"date": np.concatenate(dates), "value": np.concatenate(values), "segments": segments}
+
+def _label_array(labels: list, counts: np.ndarray):
+    import pyarrow as pa
+    vocab, codes = np.unique(np.asarray(labels, dtype=object), return_inverse=True)
+    return pa.DictionaryArray.from_arrays(pa.array(np.repeat(codes.astype(np.int32), counts)),
+                                          pa.array(list(vocab), type=pa.string()))
+
+def iter_batches(panel: PricePanel, pairs: List[dict], start=None, end=None, method: str="OLS",
+                 window: int=60, qty_alt: float=1000.0, series: Sequence[str]=SERIES,
+                 batch_rows: int=250_000, by_pair: bool=False, **params) -> Iterator:
+    # lotes pyarrow.RecordBatch en formato largo; con `by_pair` uno por par (para escribir particiones)
+    import pyarrow as pa
+    schema = _schema()
+    pending: List[dict] = []
+    rows = 0
+
+    def flush():
+        segments = [seg for p in pending for seg in p["segments"]]
+        counts = np.array([seg[-1] for seg in segments])
+        arrays = {"date": pa.array(np.concatenate([p["date"] for p in pending]), type=pa.timestamp("ns")),
+                  "value": pa.array(np.concatenate([p["value"] for p in pending]), type=pa.float64())}
+        for j, name in enumerate(LABELS):
+            arrays[name] = _label_array([seg[j] for seg in segments], counts)
+        return pa.RecordBatch.from_arrays([arrays[f.name] for f in schema], schema=schema)
+
+    for p in pairs:
+        base, alt = p["base"], p["alt"]
+        if base not in panel or alt not in panel:
+            continue
+        with span("export.pair", pair=f"{base}→{alt}"):
+            frames = pair_series(panel[base].loc[start:end], panel[alt].loc[start:end], method, window,
+                                 qty_alt, series, **params)
+            cols = _long_columns(frames, base, alt)
+        if cols is None:
+            continue
+        pending.append(cols); rows += len(cols["value"])
+        if by_pair or rows >= batch_rows:
+            yield flush()
+            pending, rows = [], 0
+    if pending:
+        yield flush()
+
+def _part_name(value: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in value)
+
+@timed()
+def write_export(panel: PricePanel, pairs: List[dict], path: str, layout: str="long", fmt: str="parquet",
+                 compression: str="zstd", **kwargs) -> dict:
+    # layout="long": un único fichero (Parquet, un grupo de filas por lote; o Arrow IPC en streaming).
+    # layout="partitioned": directorio Hive <path>/series=<s>/alt=<ALT>/<BASE>.parquet (legible con
+    # pyarrow.dataset / pandas.read_parquet); las columnas de partición no se repiten dentro del fichero
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    if layout not in LAYOUTS:
+        raise ValueError(f"disposición desconocida: {layout}")
+    if fmt not in FORMATS:
+        raise ValueError(f"formato desconocido: {fmt}")
+    schema = _schema()
+    stats = {"rows": 0, "batches": 0, "files": 0, "path": path}
+    if layout == "long":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        sink = None
+        if fmt == "parquet":
+            writer = pq.ParquetWriter(path, schema, compression=compression)
+        else:
+            sink = pa.OSFile(path, "wb")
+            writer = pa.ipc.new_stream(sink, schema)
+        try:
+            for batch in iter_batches(panel, pairs, **kwargs):
+                with span("export.write", rows=batch.num_rows):
+                    writer.write_batch(batch)
+                stats["rows"] += batch.num_rows; stats["batches"] += 1
+        finally:
+            writer.close()
+            if sink is not None:
+                sink.close()
+        stats["files"] = 1
+    else:
+        if fmt != "parquet":
+            raise ValueError("la disposición particionada solo se escribe en Parquet")
+        keep = [f.name for f in schema if f.name not in ("series", "alt")]
+        for batch in iter_batches(panel, pairs, by_pair=True, **kwargs):
+            table = pa.Table.from_batches([batch])
+            base, alt = table.column("base")[0].as_py(), table.column("alt")[0].as_py()
+            names = table.column("series").combine_chunks().dictionary_decode()
+            for name in pc.unique(names).to_pylist():
+                d = os.path.join(path, f"series={_part_name(name)}", f"alt={_part_name(alt)}")
+                os.makedirs(d, exist_ok=True)
+                part = table.filter(pc.equal(names, name)).select(keep)
+                with span("export.write", rows=part.num_rows):
+                    pq.write_table(part,
+                                   os.path.join(d, f"{_part_name(base)}.parquet"), compression=compression)
+                stats["files"] += 1
+            stats["rows"] += batch.num_rows; stats["batches"] += 1
+    return stats
+
+def main(argv: Optional[List[str]]=None) -> int:
+    # python -m core.export pares.csv --start 2020-01-01 --out series.parquet [--layout partitioned]
+    from core.batch import load_pairs
+    from core.store import PriceStore, source_from_spec
+    ap = argparse.ArgumentParser(description="Exporta β rodante, ratio de cobertura, spread y P&L de cada par")
+    ap.add_argument("pairs", help="fichero de pares (.csv o .json), como en core.batch")
+    ap.add_argument("--start", required=True)
+    ap.add_argument("--end", default=str(pd.Timestamp.today().date()))
+    ap.add_argument("--out", default="export.parquet", help="fichero (long) o directorio (partitioned)")
+    ap.add_argument("--layout", choices=LAYOUTS, default="long")
+    ap.add_argument("--format", choices=FORMATS, default="parquet", dest="fmt")
+    ap.add_argument("--series", default=",".join(SERIES), help="series, separadas por comas")
+    ap.add_argument("--method", default="OLS", help="método de cobertura (core.methods)")
+    ap.add_argument("--window", type=int, default=60, help="ventana del β rodante")
+    ap.add_argument("--qty", type=float, default=1000.0, help="cantidad ALT del P&L simulado")
+    ap.add_argument("--store", default=os.environ.get("PAIRS_LAB_STORE", os.path.join(".data", "prices")))
+    ap.add_argument("--source", default=os.environ.get("PAIRS_LAB_SOURCE"), help="yfinance o csv:<directorio>")
+    args = ap.parse_args(argv)
+
+    pairs = load_pairs(args.pairs)
+    tickers = sorted({t for p in pairs for t in (p["base"], p["alt"])})
+    panel = PriceStore(args.store, source_from_spec(args.source)).load_panel(tickers, args.start, args.end)
+    stats = write_export(panel, pairs, args.out, layout=args.layout, fmt=args.fmt, start=args.start, end=args.end,
+                         method=args.method, window=args.window, qty_alt=args.qty,
+                         series=[s.strip() for s in args.series.split(",") if s.strip()])
+    print(f"{stats['rows']:,} filas · {stats['batches']} lotes · {stats['files']} ficheros → {stats['path']}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
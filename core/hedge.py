@@ -1,5 +1,30 @@
+import numpy as np
+import pandas as pd
 
-def hedge_shares(qty_alt: float, price_alt: float, price_base: float, beta_alt_on_base: float):
+def _is_vector(*args) -> bool:
+    return any(isinstance(a, (np.ndarray, pd.Series, list, tuple)) for a in args)
+
+def hedge_shares(qty_alt, price_alt, price_base, beta_alt_on_base):
+    # escalares -> dict de floats (o None si faltan datos); vectores/Series -> dict de arrays/Series
+    # alineados, con NaN donde falten precios o β o el precio BASE sea 0. Las Series se alinean por
+    # etiqueta (unión de índices) antes de operar, no por posición
+    if _is_vector(qty_alt, price_alt, price_base, beta_alt_on_base):
+        args = (qty_alt, price_alt, price_base, beta_alt_on_base)
+        series = [a for a in args if isinstance(a, pd.Series)]
+        index = pd.concat(series, axis=1).index if series else None
+        if index is not None:
+            args = tuple(a.reindex(index) if isinstance(a, pd.Series) else a for a in args)
+        conv = lambda a: np.asarray(np.nan if a is None else a, dtype=float)
+        q, pa, pb, b = (conv(a) for a in args)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            factor = np.where(pb != 0, b * (pa / pb), np.nan)
+        shares = factor * q
+        if index is not None:
+            factor, shares = pd.Series(factor, index=index), pd.Series(shares, index=index)
+        return {
+            "factor_shares_per_alt": factor,
+            "shares_base_for_qty_alt": shares,
+        }
     if price_alt is None or price_base is None or beta_alt_on_base is None:
         return None
     if price_base == 0:
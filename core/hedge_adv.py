@@ -1,61 +1,95 @@
 
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import TheilSenRegressor
-import statsmodels.api as sm
-from statsmodels.tsa.stattools import adfuller
+from typing import Optional, Tuple
+from core.rolling import rolling_ols
+from core.robust import theil_sen_slope, rolling_beta_theilsen
+from core.kalman import kalman_beta
+from core.panel import PricePanel
+from core.intraday import session_returns
+from core.profiling import timed, span
+
+# Solo NumPy al importar: OLS/WLS en forma cerrada (mismo β que statsmodels) y statsmodels (adfuller) se
+# carga dentro de `hedge_ratio_cointegration`, el único método que lo necesita. La app resuelve los métodos
+# por nombre con core.methods.
 
 def returns(series: pd.Series) -> pd.Series:
-    return series.pct_change().dropna()
+    # en intradía se descarta el retorno de la primera barra de cada sesión (salto nocturno)
+    return session_returns(series)
+
+def panel_returns(panel: PricePanel, base: str, alt: str, start=None, end=None):
+    # (x_ret, y_ret) de la ventana desde los retornos precalculados del panel; igual que `returns` de cada serie
+    w = panel.window(start, end)
+    return w.returns_series(base), w.returns_series(alt)
 
+@timed()
 def rolling_beta(x_ret: pd.Series, y_ret: pd.Series, window: int=60) -> pd.Series:
+    res = rolling_ols(x_ret, y_ret, window)
+    return pd.Series(res["beta"].values, index=res.index, name="beta_rolling")
+
+def _joint(x_ret: pd.Series, y_ret: pd.Series):
     df = pd.concat([x_ret, y_ret], axis=1).dropna()
-    df.columns = ["x","y"]
-    betas = []
-    idxs = []
-    for i in range(window, len(df)+1):
-        win = df.iloc[i-window:i]
-        X = sm.add_constant(win["x"].values)
-        model = sm.OLS(win["y"].values, X).fit()
-        betas.append(model.params[1])
-        idxs.append(win.index[-1])
-    return pd.Series(betas, index=idxs, name="beta_rolling")
+    return df.iloc[:, 0].to_numpy(float), df.iloc[:, 1].to_numpy(float)
 
+def ols_fit(x: np.ndarray, y: np.ndarray, w: Optional[np.ndarray]=None) -> Tuple[float, float]:
+    # (α, β) de y = α + β·x por mínimos cuadrados (ponderados si hay `w`), en forma cerrada
+    w = np.ones_like(x) if w is None else w
+    sw = w.sum()
+    if len(x) < 2 or sw <= 0:
+        return np.nan, np.nan
+    mx = (w * x).sum() / sw; my = (w * y).sum() / sw
+    dx = x - mx
+    sxx = (w * dx * dx).sum()
+    beta = (w * dx * (y - my)).sum() / sxx if sxx > 0 else np.nan
+    return float(my - beta * mx), float(beta)
+
+def wls_weights(y: np.ndarray, vol_window: int=20) -> np.ndarray:
+    # 1/σ² rodante de ALT; sin historia suficiente, σ de toda la muestra; varianza nula -> media de varianzas
+    ys = pd.Series(y)
+    v2 = ys.rolling(vol_window).std().fillna(ys.std()) ** 2
+    return (1.0 / v2.replace(0, np.nan).fillna(v2.mean())).to_numpy()
+
+@timed()
 def beta_ols(x_ret: pd.Series, y_ret: pd.Series) -> float:
-    df = pd.concat([x_ret, y_ret], axis=1).dropna()
-    df.columns = ["x","y"]
-    X = sm.add_constant(df["x"].values)
-    model = sm.OLS(df["y"].values, X).fit()
-    return float(model.params[1])
+    return ols_fit(*_joint(x_ret, y_ret))[1]
 
+@timed()
 def beta_robust_theilsen(x_ret: pd.Series, y_ret: pd.Series) -> float:
     df = pd.concat([x_ret, y_ret], axis=1).dropna()
     df.columns = ["x","y"]
-    model = TheilSenRegressor()
-    model.fit(df[["x"]].values, df["y"].values)
-    return float(model.coef_[0])
+    return theil_sen_slope(df["x"].values, df["y"].values)
+
+@timed()
+def rolling_beta_robust(x_ret: pd.Series, y_ret: pd.Series, window: int=60) -> pd.Series:
+    return rolling_beta_theilsen(x_ret, y_ret, window)
 
+@timed()
 def beta_wls(x_ret: pd.Series, y_ret: pd.Series) -> float:
-    df = pd.concat([x_ret, y_ret], axis=1).dropna()
-    df.columns = ["x","y"]
-    vol = df["y"].rolling(20).std().fillna(df["y"].std())
-    w = 1.0/(vol**2).replace(0, np.nan).fillna((vol**2).mean())
-    X = sm.add_constant(df["x"].values)
-    model = sm.WLS(df["y"].values, X, weights=w.values).fit()
-    return float(model.params[1])
+    x, y = _joint(x_ret, y_ret)
+    return ols_fit(x, y, wls_weights(y))[1]
 
+@timed()
 def hedge_ratio_cointegration(x_price: pd.Series, y_price: pd.Series):
     lx = np.log(x_price.dropna()); ly = np.log(y_price.dropna())
     idx = lx.index.intersection(ly.index)
-    lx, ly = lx.loc[idx], ly.loc[idx]
-    X = sm.add_constant(lx.values)
-    model = sm.OLS(ly.values, X).fit()
-    beta = float(model.params[1])
-    resid = ly.values - (model.params[0] + beta*lx.values)
-    adf_stat, pval, *_ = adfuller(resid, maxlag=1, regression="c", autolag="AIC")
+    lx, ly = lx.loc[idx].to_numpy(float), ly.loc[idx].to_numpy(float)
+    alpha, beta = ols_fit(lx, ly)
+    resid = ly - (alpha + beta*lx)
+    with span("adfuller", n=len(resid)):
+        from statsmodels.tsa.stattools import adfuller   # ~1 s la primera vez: solo si se usa COINT
+        adf_stat, pval, *_ = adfuller(resid, maxlag=1, regression="c", autolag="AIC")
     return {"beta": beta, "adf_stat": float(adf_stat), "pvalue": float(pval)}
 
-def simulate_hedge_pnl(qty_alt: float, qty_base: float, alt_price: pd.Series, base_price: pd.Series) -> pd.DataFrame:
+@timed()
+def hedge_ratio_kalman(x_ret: pd.Series, y_ret: pd.Series, process_var: float=1e-4, obs_var: float=1e-5) -> pd.Series:
+    kb = kalman_beta(x_ret, y_ret, process_var=process_var, obs_var=obs_var)
+    return kb["beta"].rename("beta_kalman")
+
+@timed()
+def simulate_hedge_pnl(qty_alt: float, qty_base, alt_price: pd.Series, base_price: pd.Series) -> pd.DataFrame:
+    if isinstance(qty_base, pd.Series):
+        # cobertura dinámica: la posición fijada al cierre t-1 gana el movimiento de t
+        qty_base = qty_base.reindex(base_price.index).shift(1).fillna(0.0)
     alt_pnl = qty_alt * alt_price.diff().fillna(0.0)
     base_pnl = qty_base * base_price.diff().fillna(0.0)
     pnl = alt_pnl + base_pnl
@@ -63,6 +97,40 @@ def simulate_hedge_pnl(qty_alt: float, qty_base: float, alt_price: pd.Series, ba
     df["cum_pnl"] = df["total_pnl"].cumsum()
     return df
 
+def spread_bands(b_close: pd.Series, a_close: pd.Series, hr: float, hr_series: Optional[pd.Series]=None,
+                 n_sigma: float=2.0) -> pd.DataFrame:
+    # spread ALT − β·BASE (ambos normalizados a 100) con media y bandas de Bollinger; ventana 20–60 según
+    # tamaño (en attrs["window"]). Con β variable (KALMAN) se usa el de cada día, sin mirar al futuro
+    cb = (b_close / b_close.iloc[0]) * 100.0
+    ca = (a_close / a_close.iloc[0]) * 100.0
+    beta_t = hr_series.reindex(cb.index).ffill() if hr_series is not None else hr
+    spread = (ca - beta_t * cb).dropna()
+    win = int(max(20, min(60, len(spread)//6)))
+    ma = spread.rolling(win).mean()
+    sd = spread.rolling(win).std()
+    out = pd.DataFrame({"spread": spread, "mid": ma, "upper": ma + n_sigma*sd, "lower": ma - n_sigma*sd})
+    out.attrs["window"] = win
+    return out
+
+def hedge_pnl(b_close: pd.Series, a_close: pd.Series, hr: float, hr_series: Optional[pd.Series],
+              qty_alt: float) -> dict:
+    # P&L simulado de `qty_alt` ALT cubiertos con BASE: con β variable la cobertura se reajusta cada día,
+    # si no es fija al factor del último cierre. Devuelve pnl (DataFrame), qty_base, y los retornos
+    # cubierto / sin cubrir alineados para hedge_effectiveness
+    unhedged_ret = a_close.pct_change().dropna()
+    if hr_series is not None:
+        qty_base = -(hr_series * (a_close / b_close)).dropna() * qty_alt
+        pnl_df = simulate_hedge_pnl(qty_alt=qty_alt, qty_base=qty_base, alt_price=a_close, base_price=b_close)
+        hedged_ret = (pnl_df["total_pnl"] / (qty_alt * a_close.shift(1))).loc[qty_base.index[0]:].dropna()
+        unhedged_ret = unhedged_ret.loc[hedged_ret.index[0]:] if not hedged_ret.empty else unhedged_ret
+    else:
+        factor_last = float((hr * (a_close / b_close)).dropna().iloc[-1])
+        qty_base = - factor_last * qty_alt
+        pnl_df = simulate_hedge_pnl(qty_alt=qty_alt, qty_base=qty_base, alt_price=a_close, base_price=b_close)
+        hedged_val = (qty_alt * a_close) + (qty_base * b_close)
+        hedged_ret = hedged_val.pct_change().dropna()
+    return {"pnl": pnl_df, "qty_base": qty_base, "hedged_ret": hedged_ret, "unhedged_ret": unhedged_ret}
+
 def hedge_effectiveness(unhedged_ret: pd.Series, hedged_ret: pd.Series) -> float:
     v_u = float(unhedged_ret.dropna().var())
     v_h = float(hedged_ret.dropna().var())
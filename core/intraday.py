@@ -0,0 +1,121 @@
+import math
+import numpy as np
+import pandas as pd
+from typing import List, Optional
+
+# Intervalos intradía: anualización, ventanas en barras y sesiones. Los índices intradía se guardan
+# en hora local de mercado sin zona (ver `_naive_index` en core.store), así que la sesión regular es
+# simplemente 09:30–16:00 y el cambio de fecha marca el inicio de sesión.
+
+TRADING_DAYS = 252
+SESSION = ("09:30", "16:00")
+SESSION_MINUTES = 390
+
+INTERVAL_MINUTES = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "1h": 60, "90m": 90, "1d": None}
+INTERVALS = ("1d", "1h", "30m", "15m", "5m", "1m")
+
+# máximo rango por petición a yfinance y antigüedad máxima disponible, en días
+YF_MAX_SPAN = {"1m": 7, "2m": 60, "5m": 60, "15m": 60, "30m": 60, "60m": 730, "1h": 730, "90m": 60}
+YF_MAX_AGE = {"1m": 30, "2m": 60, "5m": 60, "15m": 60, "30m": 60, "60m": 730, "1h": 730, "90m": 60}
+
+def _ns(index: pd.Index) -> np.ndarray:
+    return np.asarray(pd.DatetimeIndex(index), dtype="datetime64[ns]").view(np.int64)
+
+def is_intraday(interval: Optional[str]) -> bool:
+    if interval not in INTERVAL_MINUTES:
+        raise ValueError(f"intervalo desconocido: {interval}")
+    return INTERVAL_MINUTES[interval] is not None
+
+def bars_per_session(interval: str) -> int:
+    # la última barra de la sesión puede ser parcial (p.ej. 1h: 6 completas + 15:30–16:00)
+    minutes = INTERVAL_MINUTES[interval] if is_intraday(interval) else None
+    return int(math.ceil(SESSION_MINUTES / minutes)) if minutes else 1
+
+def periods_per_year(interval: str) -> float:
+    return float(TRADING_DAYS * bars_per_session(interval))
+
+def bars_for_days(days: float, interval: str) -> int:
+    # ventana expresada en sesiones -> nº de barras del intervalo
+    return max(1, int(round(days * bars_per_session(interval))))
+
+def infer_interval(index: pd.Index) -> str:
+    # intervalo a partir del índice: diario si todas las marcas son medianoche, si no la separación
+    # mediana dentro de una misma sesión
+    if len(index) < 2:
+        return "1d"
+    v = _ns(index)
+    day = v // 86_400_000_000_000
+    if (v == day * 86_400_000_000_000).all():
+        return "1d"
+    same = day[1:] == day[:-1]
+    if not same.any():
+        return "1d"
+    minutes = float(np.median(np.diff(v)[same])) / 60e9
+    return min((k for k, m in INTERVAL_MINUTES.items() if m), key=lambda k: abs(INTERVAL_MINUTES[k] - minutes))
+
+def infer_periods_per_year(index: pd.Index) -> float:
+    return periods_per_year(infer_interval(index))
+
+def session_days(index: pd.Index) -> Optional[np.ndarray]:
+    # fecha de sesión (días desde 1970) de cada marca; None si el índice es diario
+    if len(index) == 0:
+        return None
+    v = _ns(index)
+    day = v // 86_400_000_000_000
+    if (v == day * 86_400_000_000_000).all():
+        return None
+    return day
+
+def session_breaks(index: pd.Index) -> Optional[np.ndarray]:
+    # True en la primera barra de cada sesión (un retorno ahí cruzaría la noche); None si el índice es diario
+    day = session_days(index)
+    if day is None:
+        return None
+    return np.r_[True, day[1:] != day[:-1]]
+
+def column_breaks(day: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    # (filas × columnas): True donde la fila válida anterior de esa columna es de otra sesión o no existe.
+    # Con un índice común de varios tickers, la primera barra de la sesión de cada columna no tiene por qué
+    # ser la primera fila de la sesión del índice (huecos en la apertura de los ETF poco negociados)
+    pos = np.where(valid, np.arange(len(day))[:, None], -1)
+    prev = np.maximum.accumulate(pos, axis=0)
+    prev = np.vstack([np.full((1, valid.shape[1]), -1), prev[:-1]])
+    return (prev < 0) | (day[:, None] != day[np.maximum(prev, 0)])
+
+def session_returns(series: pd.Series) -> pd.Series:
+    # pct_change sin el retorno de la primera barra de cada sesión (salto nocturno) si el índice es intradía
+    r = series.pct_change()
+    brk = session_breaks(series.index)
+    if brk is not None:
+        r[brk] = np.nan
+    return r.dropna()
+
+def _session_minutes(session=SESSION) -> tuple:
+    (oh, om), (ch, cm) = (map(int, s.split(":")) for s in session)
+    return oh * 60 + om, ch * 60 + cm
+
+def regular_session(index: pd.Index, session=SESSION) -> np.ndarray:
+    # barras dentro de la sesión regular [apertura, cierre)
+    v = _ns(index)
+    t = (v % 86_400_000_000_000) // 60_000_000_000
+    open_, close = _session_minutes(session)
+    return (t >= open_) & (t < close)
+
+def in_regular_session(ts: pd.Timestamp, session=SESSION) -> bool:
+    # `regular_session` para una sola marca (actualizaciones barra a barra)
+    open_, close = _session_minutes(session)
+    return open_ <= ts.hour * 60 + ts.minute < close
+
+def align_sessions(base: pd.Series, alt: pd.Series, session=SESSION):
+    # BASE y ALT en las mismas marcas de tiempo de la sesión regular (sin pre/post mercado)
+    b = base.dropna(); a = alt.dropna()
+    if session_breaks(b.index) is not None:
+        b = b[regular_session(b.index, session)]
+        a = a[regular_session(a.index, session)]
+    idx = b.index.intersection(a.index)
+    return b.loc[idx], a.loc[idx]
+
+def session_chunks(start, end, sessions: int) -> List[tuple]:
+    # tramos [inicio, fin] de `sessions` días hábiles, alineados a fronteras de sesión
+    days = pd.bdate_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize())
+    return [(days[i], days[min(i + sessions, len(days)) - 1]) for i in range(0, len(days), sessions)]
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from typing import Tuple
+from core.profiling import timed
+
+class KalmanHedge:
+    # Estado [alpha, beta] por par como paseo aleatorio; observación y_t = alpha + beta·x_t + ε.
+    # Vectorizado sobre pares: cada `step` es O(P) y una serie completa es una sola pasada O(n).
+    def __init__(self, n_pairs: int=1, process_var: float=1e-4, alpha_process_var: float=1e-8,
+                 obs_var: float=1e-5, init_beta: float=0.0, init_var: float=1.0):
+        self.Q = np.diag([alpha_process_var, process_var])
+        self.R = float(obs_var)
+        self.state = np.zeros((n_pairs, 2)); self.state[:, 1] = init_beta
+        self.cov = np.repeat((np.eye(2) * init_var)[None], n_pairs, axis=0)
+        self.n_updates = np.zeros(n_pairs, dtype=int)
+
+    @property
+    def alpha(self) -> np.ndarray:
+        return self.state[:, 0].copy()
+
+    @property
+    def beta(self) -> np.ndarray:
+        return self.state[:, 1].copy()
+
+    @staticmethod
+    def _update(a, b, p00, p01, p11, q_a, q_b, R, x, y):
+        # un paso predicción + corrección con las componentes de la covarianza 2x2 (simétrica)
+        p00 = p00 + q_a; p11 = p11 + q_b
+        obs = np.isfinite(x) & np.isfinite(y)
+        xo = np.where(obs, x, 0.0)
+        ph0 = p00 + p01 * xo
+        ph1 = p01 + p11 * xo
+        S = ph0 + ph1 * xo + R
+        k0 = ph0 / S; k1 = ph1 / S
+        innov = np.where(obs, y - a - b * xo, 0.0)
+        a = a + k0 * innov
+        b = b + k1 * innov
+        p00 = np.where(obs, p00 - k0 * ph0, p00)
+        p01 = np.where(obs, p01 - k0 * ph1, p01)
+        p11 = np.where(obs, p11 - k1 * ph1, p11)
+        return a, b, p00, p01, p11, obs
+
+    def _components(self):
+        return (self.state[:, 0], self.state[:, 1], self.cov[:, 0, 0], self.cov[:, 0, 1], self.cov[:, 1, 1])
+
+    def _store(self, a, b, p00, p01, p11):
+        self.state = np.stack([a, b], axis=1)
+        self.cov = np.stack([np.stack([p00, p01], axis=1), np.stack([p01, p11], axis=1)], axis=1)
+
+    def step(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        y = np.atleast_1d(np.asarray(y, dtype=float))
+        a, b, p00, p01, p11, obs = self._update(*self._components(), self.Q[0, 0], self.Q[1, 1], self.R, x, y)
+        self._store(a, b, p00, p01, p11)
+        self.n_updates += obs
+        return self.alpha, self.beta
+
+    def run(self, X, Y) -> Tuple[np.ndarray, np.ndarray]:
+        X = np.asarray(X, dtype=float); Y = np.asarray(Y, dtype=float)
+        if X.ndim == 1:
+            X, Y = X[:, None], Y[:, None]
+        alphas = np.empty(X.shape); betas = np.empty(X.shape)
+        a, b, p00, p01, p11 = self._components()
+        q_a, q_b, R = self.Q[0, 0], self.Q[1, 1], self.R
+        for t in range(X.shape[0]):
+            a, b, p00, p01, p11, obs = self._update(a, b, p00, p01, p11, q_a, q_b, R, X[t], Y[t])
+            self.n_updates += obs
+            alphas[t] = a; betas[t] = b
+        self._store(a, b, p00, p01, p11)
+        return alphas, betas
+
+    def to_dict(self) -> dict:
+        return {"Q": self.Q.tolist(), "R": self.R, "state": self.state.tolist(),
+                "cov": self.cov.tolist(), "n_updates": self.n_updates.tolist()}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "KalmanHedge":
+        kf = cls(n_pairs=len(d["state"]))
+        kf.Q = np.asarray(d["Q"]); kf.R = float(d["R"])
+        kf.state = np.asarray(d["state"]); kf.cov = np.asarray(d["cov"])
+        kf.n_updates = np.asarray(d["n_updates"], dtype=int)
+        return kf
+
+@timed()
+def kalman_beta(x_ret: pd.Series, y_ret: pd.Series, process_var: float=1e-4,
+                obs_var: float=1e-5, warmup: int=20) -> pd.DataFrame:
+    df = pd.concat([x_ret, y_ret], axis=1).dropna()
+    df.columns = ["x","y"]
+    kf = KalmanHedge(process_var=process_var, obs_var=obs_var)
+    alphas, betas = kf.run(df["x"].values, df["y"].values)
+    out = pd.DataFrame({"alpha": alphas[:, 0], "beta": betas[:, 0]}, index=df.index)
+    return out.iloc[warmup:]
+
+@timed()
+def kalman_beta_panel(x_panel: pd.DataFrame, y_panel: pd.DataFrame, process_var: float=1e-4,
+                      obs_var: float=1e-5, warmup: int=20) -> pd.DataFrame:
+    y_panel = y_panel.reindex(index=x_panel.index, columns=x_panel.columns)
+    kf = KalmanHedge(n_pairs=x_panel.shape[1], process_var=process_var, obs_var=obs_var)
+    _, betas = kf.run(x_panel.values, y_panel.values)
+    # NaN hasta que cada par acumula `warmup` observaciones
+    seen = np.cumsum(np.isfinite(x_panel.values) & np.isfinite(y_panel.values), axis=0)
+    betas = np.where(seen > warmup, betas, np.nan)
+    return pd.DataFrame(betas, index=x_panel.index, columns=x_panel.columns)
@@ -0,0 +1,183 @@
+import os
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Union
+
+from core.metrics import TRADING_DAYS
+from core.cache import fingerprint
+from core.rolling import rolling_ols_arrays
+from core.robust import rolling_theil_sen
+from core.kalman import KalmanHedge
+from core.coint import coint_scan
+from core.backtest import align_pair
+from core.profiling import timed
+
+LEADERBOARD_METHODS = ("OLS", "ROBUST", "WLS", "COINT", "KALMAN")
+
+_MEMO: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+_MEMO_SIZE = 512
+
+def wls_slope(x: np.ndarray, y: np.ndarray, vol_window: int=20) -> float:
+    # misma ponderación que `beta_wls` (1/σ² rodante de ALT), resuelta en forma cerrada
+    ys = pd.Series(y)
+    vol = ys.rolling(vol_window).std().fillna(ys.std())
+    v2 = vol ** 2
+    w = (1.0 / v2.replace(0, np.nan)).fillna(v2.mean()).to_numpy()
+    sw = w.sum()
+    mx = (w * x).sum() / sw; my = (w * y).sum() / sw
+    sxx = (w * (x - mx) ** 2).sum()
+    return float((w * (x - mx) * (y - my)).sum() / sxx) if sxx > 0 else np.nan
+
+def _wls_fold_betas(x: np.ndarray, y: np.ndarray, starts: np.ndarray, window: int, vol_window: int=20) -> np.ndarray:
+    # `wls_slope` sobre cada ventana [s-window, s) a la vez: σ rodante de la serie completa, salvo las
+    # primeras `vol_window-1` posiciones de cada ventana, que toman la σ de la propia ventana
+    X = np.lib.stride_tricks.sliding_window_view(x, window)[starts - window]
+    Y = np.lib.stride_tricks.sliding_window_view(y, window)[starts - window]
+    vol = pd.Series(y).rolling(vol_window).std().to_numpy()
+    V = np.lib.stride_tricks.sliding_window_view(vol, window)[starts - window].copy()
+    V[:, :vol_window - 1] = Y.std(axis=1, ddof=1)[:, None]
+    v2 = V ** 2
+    with np.errstate(divide="ignore"):
+        W = np.where(v2 == 0, v2.mean(axis=1, keepdims=True), 1.0 / v2)
+    sw = W.sum(axis=1, keepdims=True)
+    mx = (W * X).sum(axis=1, keepdims=True) / sw; my = (W * Y).sum(axis=1, keepdims=True) / sw
+    sxx = (W * (X - mx) ** 2).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(sxx > 0, (W * (X - mx) * (Y - my)).sum(axis=1) / sxx, np.nan)
+
+def _fold_betas(method: str, x: np.ndarray, y: np.ndarray, lb: np.ndarray, la: np.ndarray,
+                starts: np.ndarray, window: int, kalman: Optional[np.ndarray]=None) -> np.ndarray:
+    # β ajustado con las `window` observaciones previas a cada inicio de tramo de test
+    if method == "OLS":
+        return rolling_ols_arrays(x, y, window).beta[starts - 1, 0]
+    if method == "KALMAN":
+        if kalman is None:
+            _, kalman = KalmanHedge().run(x, y)
+        return kalman[starts - 1, 0]
+    if method == "COINT":
+        idx = pd.RangeIndex(len(lb))
+        cs = coint_scan(pd.Series(np.exp(lb), idx), pd.Series(np.exp(la), idx), window=window)
+        return cs["beta"].reindex(idx).to_numpy()[starts - 1]
+    if method == "ROBUST":
+        return rolling_theil_sen(x, y, window, ends=starts - 1)[starts - 1]
+    if method == "WLS":
+        return _wls_fold_betas(x, y, starts, window)
+    raise ValueError(f"método desconocido: {method}")
+
+@timed()
+def walk_forward(base_close: pd.Series, alt_close: pd.Series, methods: Iterable[str]=LEADERBOARD_METHODS,
+                 windows: Iterable[int]=(60, 126, 252), horizon: int=21) -> pd.DataFrame:
+    methods = tuple(methods)
+    # ajuste en [t-window, t) y evaluación fuera de muestra en [t, t+horizon), avanzando `horizon` barras
+    b, a = align_pair(base_close, alt_close)
+    x = b.pct_change().to_numpy()[1:]; y = a.pct_change().to_numpy()[1:]
+    lb = np.log(b.to_numpy())[1:]; la = np.log(a.to_numpy())[1:]
+    n = len(x)
+    # el filtro de Kalman no depende de la ventana: una sola pasada por par
+    kalman = KalmanHedge().run(x, y)[1] if "KALMAN" in methods else None
+    rows = []
+    for window in windows:
+        starts = np.arange(window, n, horizon)
+        if len(starts) == 0:
+            continue
+        fold = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+        test = slice(starts[0], n)
+        xt, yt = x[test], y[test]
+        for method in methods:
+            betas = _fold_betas(method, x, y, lb, la, starts, window, kalman)
+            hedged = yt - betas[fold] * xt
+            ok = np.isfinite(hedged)
+            if ok.sum() < 3:
+                continue
+            k = len(starts)
+            cnt = np.bincount(fold[ok], minlength=k)
+            def fold_var(v):
+                s1 = np.bincount(fold[ok], v[ok], minlength=k)
+                s2 = np.bincount(fold[ok], v[ok] ** 2, minlength=k)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    return (s2 - s1 ** 2 / cnt) / (cnt - 1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                he_fold = 1.0 - fold_var(hedged) / fold_var(yt)
+            var_h = np.var(hedged[ok], ddof=1); var_u = np.var(yt[ok], ddof=1)
+            rows.append({
+                "method": method,
+                "window": int(window),
+                "n_folds": int((cnt > 1).sum()),
+                "n_test": int(ok.sum()),
+                "he_oos": 1.0 - var_h / var_u if var_u > 0 else np.nan,
+                "he_fold_mean": float(np.nanmean(he_fold[cnt > 1])) if (cnt > 1).any() else np.nan,
+                "resid_vol_oos": float(np.sqrt(TRADING_DAYS * var_h)),
+                "beta_last": float(betas[-1]),
+            })
+    return pd.DataFrame(rows)
+
+def _task(args):
+    label, base_close, alt_close, methods, windows, horizon = args
+    df = walk_forward(base_close, alt_close, methods, windows, horizon)
+    df.insert(0, "pair", label)
+    return df
+
+def _cache_get(key: str, cache_dir: Optional[str]) -> Optional[pd.DataFrame]:
+    if key in _MEMO:
+        _MEMO.move_to_end(key)
+        return _MEMO[key]
+    if cache_dir:
+        path = os.path.join(cache_dir, f"{key}.pkl")
+        if os.path.exists(path):
+            df = pd.read_pickle(path)
+            _MEMO[key] = df
+            return df
+    return None
+
+def _cache_put(key: str, df: pd.DataFrame, cache_dir: Optional[str]):
+    _MEMO[key] = df
+    while len(_MEMO) > _MEMO_SIZE:
+        _MEMO.popitem(last=False)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = os.path.join(cache_dir, f"{key}.pkl.tmp")
+        df.to_pickle(tmp)
+        os.replace(tmp, os.path.join(cache_dir, f"{key}.pkl"))
+
+@timed()
+def hedge_leaderboard(close: Union[Dict[str, pd.Series], pd.DataFrame], pairs: List[dict],
+                      methods: Iterable[str]=LEADERBOARD_METHODS, windows: Iterable[int]=(60, 126, 252),
+                      horizon: int=21, n_jobs: Optional[int]=None, cache_dir: Optional[str]=None) -> pd.DataFrame:
+    # walk-forward de cada par en un pool de procesos; caché por (huella de datos del par, configuración)
+    methods, windows = tuple(methods), tuple(int(w) for w in windows)
+    results, pending = [], []
+    for p in pairs:
+        if p["base"] not in close or p["alt"] not in close:
+            continue
+        label = f'{p["base"]}→{p["alt"]}'
+        b, a = close[p["base"]], close[p["alt"]]
+        key = fingerprint(b, a, methods, windows, horizon)
+        hit = _cache_get(key, cache_dir)
+        if hit is not None:
+            results.append(hit)
+        else:
+            pending.append((key, (label, b, a, methods, windows, horizon)))
+
+    if pending:
+        n_jobs = n_jobs or os.cpu_count() or 1
+        if n_jobs == 1 or len(pending) == 1:
+            computed = [_task(args) for _, args in pending]
+        else:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(pending))) as ex:
+                computed = list(ex.map(_task, [args for _, args in pending]))
+        for (key, _), df in zip(pending, computed):
+            _cache_put(key, df, cache_dir)
+            results.append(df)
+
+    results = [r for r in results if not r.empty]
+    if not results:
+        return pd.DataFrame(columns=["pair","method","window","n_folds","n_test","he_oos",
+                                     "he_fold_mean","resid_vol_oos","beta_last","rank"])
+    board = pd.concat(results, ignore_index=True)
+    board["rank"] = board.groupby("pair")["he_oos"].rank(ascending=False, method="min", na_option="bottom").astype(int)
+    return board.sort_values(["pair", "rank", "resid_vol_oos"]).reset_index(drop=True)
+
+def best_by_pair(board: pd.DataFrame) -> pd.DataFrame:
+    return board[board["rank"] == 1].drop_duplicates("pair").reset_index(drop=True)
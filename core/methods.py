@@ -0,0 +1,72 @@
+import importlib
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+# Registro de métodos de cobertura por nombre. Cada entrada dice dónde vive la implementación
+# ("módulo:función") y qué recibe (retornos o precios); el módulo se importa en el primer uso, así que
+# arrancar la app no carga nada de un método que nadie elige. `estimate` normaliza la salida:
+# float -> β, dict (COINT) -> β + diagnóstico, Series (KALMAN) -> β variable en el tiempo.
+
+_REGISTRY: Dict[str, dict] = {}
+_RESOLVED: Dict[str, Callable] = {}
+
+def register(name: str, estimator: str, inputs: str="returns", rolling: Optional[str]=None,
+             params: Optional[Dict[str, str]]=None):
+    # params: nombre en la app -> nombre del argumento de la implementación (p.ej. kf_q -> process_var)
+    if inputs not in ("returns", "prices"):
+        raise ValueError(f"entrada desconocida: {inputs}")
+    _REGISTRY[name.upper()] = {"estimator": estimator, "inputs": inputs, "rolling": rolling,
+                               "params": params or {}}
+
+def names() -> List[str]:
+    return list(_REGISTRY)
+
+def spec(name: str) -> dict:
+    try:
+        return _REGISTRY[name.upper()]
+    except KeyError:
+        raise ValueError(f"método desconocido: {name}") from None
+
+def resolve(target: str) -> Callable:
+    fn = _RESOLVED.get(target)
+    if fn is None:
+        module, attr = target.split(":")
+        fn = _RESOLVED[target] = getattr(importlib.import_module(module), attr)
+    return fn
+
+def _args(entry: dict, b_close: pd.Series, a_close: pd.Series):
+    if entry["inputs"] == "prices":
+        return b_close, a_close
+    from core.hedge_adv import returns
+    return returns(b_close), returns(a_close)
+
+def estimate(name: str, b_close: pd.Series, a_close: pd.Series, **params) -> dict:
+    # {"hr": β actual, "coint_info": dict o None, "hr_series": Series o None}
+    entry = spec(name)
+    kwargs = {entry["params"][k]: v for k, v in params.items() if k in entry["params"] and v is not None}
+    out = resolve(entry["estimator"])(*_args(entry, b_close, a_close), **kwargs)
+    if isinstance(out, pd.Series):
+        return {"hr": float(out.iloc[-1]) if not out.empty else None, "coint_info": None, "hr_series": out}
+    if isinstance(out, dict):
+        return {"hr": out["beta"], "coint_info": out, "hr_series": None}
+    return {"hr": None if out is None else float(out), "coint_info": None, "hr_series": None}
+
+def rolling(name: str, b_close: pd.Series, a_close: pd.Series, window: int, **params) -> Optional[pd.Series]:
+    # β rodante del método; si no tiene uno propio, la serie de `estimate` (KALMAN) o el OLS rodante
+    entry = spec(name)
+    if entry["rolling"] is None:
+        series = estimate(name, b_close, a_close, **params)["hr_series"]
+        if series is not None:
+            return series
+        target = "core.hedge_adv:rolling_beta"
+    else:
+        target = entry["rolling"]
+    from core.hedge_adv import returns
+    return resolve(target)(returns(b_close), returns(a_close), window=window)
+
+register("OLS", "core.hedge_adv:beta_ols", rolling="core.hedge_adv:rolling_beta")
+register("ROBUST", "core.hedge_adv:beta_robust_theilsen", rolling="core.hedge_adv:rolling_beta_robust")
+register("WLS", "core.hedge_adv:beta_wls")
+register("COINT", "core.hedge_adv:hedge_ratio_cointegration", inputs="prices")
+register("KALMAN", "core.hedge_adv:hedge_ratio_kalman", params={"kf_q": "process_var", "kf_r": "obs_var"})
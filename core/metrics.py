@@ -1,10 +1,14 @@
 
 import numpy as np
 import pandas as pd
-from dataclasses import dataclass
-from typing import Tuple, Optional
-
-TRADING_DAYS = 252
+from dataclasses import dataclass, fields
+from typing import List, Tuple, Optional, Union
+from core.rolling import window_sums
+from core.panel import PricePanel
+from core.bootstrap import bootstrap_ci
+from core.intraday import (TRADING_DAYS, periods_per_year, infer_periods_per_year, session_breaks, session_days,
+                           column_breaks, regular_session, align_sessions)
+from core.profiling import timed
 
 @dataclass
 class PairMetrics:
@@ -26,8 +30,8 @@ class PairMetrics:
     base_move_for_alt_1pct: float
     target_ratio: Optional[float]
 
-def _ann_vol(returns: pd.Series) -> float:
-    return np.sqrt(TRADING_DAYS) * returns.std(ddof=0)
+def _ann_vol(returns: pd.Series, periods: float=TRADING_DAYS) -> float:
+    return np.sqrt(periods) * returns.std(ddof=0)
 
 def _total_return(prices: pd.Series) -> float:
     s = prices.dropna()
@@ -50,16 +54,19 @@ def compute_regression(x: pd.Series, y: pd.Series) -> Tuple[float, float, float]
     r2 = 1 - ss_res/ss_tot if ss_tot != 0 else np.nan
     return float(beta_hat), float(alpha_hat), float(r2)
 
+@timed()
 def summarize_pair(base_close: pd.Series, alt_close: pd.Series, base_vol: pd.Series, alt_vol: pd.Series,
-                   target_ratio: Optional[float], start: str, end: str) -> PairMetrics:
-    base_close = base_close.dropna()
-    alt_close = alt_close.dropna()
-    idx = base_close.index.intersection(alt_close.index)
-    base_close = base_close.loc[idx]
-    alt_close = alt_close.loc[idx]
+                   target_ratio: Optional[float], start: str, end: str, interval: Optional[str]=None) -> PairMetrics:
+    # fechas comunes; en intradía, solo barras de la sesión regular
+    base_close, alt_close = align_sessions(base_close, alt_close)
+    idx = base_close.index
 
     base_ret = base_close.pct_change()
     alt_ret = alt_close.pct_change()
+    brk = session_breaks(idx)
+    if brk is not None:
+        base_ret[brk] = np.nan; alt_ret[brk] = np.nan
+    periods = periods_per_year(interval) if interval else infer_periods_per_year(idx)
 
     avg_vol_base = base_vol.rolling(30).mean().reindex(idx).dropna()
     avg_vol_base = float(avg_vol_base.iloc[-1]) if not avg_vol_base.empty else np.nan
@@ -81,8 +88,8 @@ def summarize_pair(base_close: pd.Series, alt_close: pd.Series, base_vol: pd.Ser
         n_obs=n_obs,
         ret_base=_total_return(base_close),
         ret_alt=_total_return(alt_close),
-        vol_base=_ann_vol(base_ret.dropna()),
-        vol_alt=_ann_vol(alt_ret.dropna()),
+        vol_base=_ann_vol(base_ret.dropna(), periods),
+        vol_alt=_ann_vol(alt_ret.dropna(), periods),
         avg_vol_base=avg_vol_base,
         avg_vol_alt=avg_vol_alt,
         beta_alt_on_base=float(beta) if pd.notna(beta) else np.nan,
@@ -92,3 +99,153 @@ def summarize_pair(base_close: pd.Series, alt_close: pd.Series, base_vol: pd.Ser
         base_move_for_alt_1pct=float(base_move_for_alt_1pct) if pd.notna(base_move_for_alt_1pct) else np.nan,
         target_ratio=target_ratio
     )
+
+def _last_valid(values: np.ndarray) -> np.ndarray:
+    # último valor no-NaN de cada columna
+    valid = ~np.isnan(values)
+    pos = np.where(valid.any(axis=0), values.shape[0] - 1 - np.argmax(valid[::-1], axis=0), -1)
+    out = np.full(values.shape[1], np.nan)
+    ok = pos >= 0
+    out[ok] = values[pos[ok], np.nonzero(ok)[0]]
+    return out
+
+def _first_valid(values: np.ndarray) -> np.ndarray:
+    return _last_valid(values[::-1])
+
+def _masked_pct_change(prices: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    # pct_change sobre las filas de `mask` de cada columna (equivale a compactar y luego pct_change)
+    masked = np.where(mask, prices, np.nan)
+    prev = pd.DataFrame(masked).ffill().shift(1).to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(mask, masked / prev - 1.0, np.nan)
+
+def _rolling_volume_mean(volume: pd.DataFrame, own_rows: pd.DataFrame, window: int=30) -> pd.DataFrame:
+    # rolling(window).mean() de cada ticker sobre sus propias fechas, aunque el panel tenga filas de relleno
+    v = volume.to_numpy(float)
+    own = own_rows.to_numpy(bool)
+    present = ~np.isnan(v)
+    (s, k), _ = window_sums([np.where(present, v, 0.0), present.astype(float)], own, window)
+    with np.errstate(invalid="ignore"):
+        mean = np.where(k == window, s / window, np.nan)
+    return pd.DataFrame(mean, index=volume.index, columns=volume.columns)
+
+def _pair_returns(close: pd.DataFrame, bases: List[str], alts: List[str]):
+    # cierres BASE/ALT de cada par (columnas), máscara de barras conjuntas y sus retornos; en intradía solo
+    # la sesión regular y sin el retorno de la primera barra conjunta de cada sesión de cada par
+    B = close[bases].to_numpy(float)
+    A = close[alts].to_numpy(float)
+    M = ~np.isnan(B) & ~np.isnan(A)
+    day = session_days(close.index)
+    if day is not None:
+        M &= regular_session(close.index)[:, None]
+    rb = _masked_pct_change(B, M)
+    ra = _masked_pct_change(A, M)
+    if day is not None:
+        # ruptura en la primera barra conjunta de cada sesión de cada par, no en la del índice común
+        brk = column_breaks(day, M)
+        rb[brk] = np.nan; ra[brk] = np.nan
+    return B, A, M, rb, ra
+
+CI_COLUMNS = ["beta_lo", "beta_hi", "beta_se", "dev_lo", "dev_hi", "corr_lo", "corr_hi", "r2_lo", "r2_hi"]
+
+@timed()
+def summarize_universe(close: Union[pd.DataFrame, PricePanel], volume: Optional[pd.DataFrame], pairs: List[dict],
+                       start: str, end: str, n_boot: int=0, ci_level: float=0.90, seed: int=0,
+                       interval: Optional[str]=None) -> pd.DataFrame:
+    # `close` puede ser un PricePanel (volumen incluido): se leen sus matrices sin copiar.
+    # Con n_boot > 0 añade intervalos bootstrap por bloques (CI_COLUMNS) de β, β − target, corr y R².
+    # `interval` fija la anualización (por defecto se deduce del índice); en intradía no se usan los
+    # retornos que cruzan de una sesión a la siguiente.
+    columns = [f.name for f in fields(PairMetrics)] + (CI_COLUMNS if n_boot else [])
+    if isinstance(close, PricePanel):
+        volume = close.frame("volume") if volume is None and close.volume is not None else volume
+        close = close.frame("close")
+    if volume is None:
+        volume = pd.DataFrame(np.nan, index=close.index, columns=close.columns)
+    pairs = [p for p in pairs if p["base"] in close.columns and p["alt"] in close.columns]
+    if not pairs:
+        return pd.DataFrame(columns=columns)
+    volume = volume.reindex(index=close.index, columns=close.columns)
+    bases = [p["base"] for p in pairs]
+    alts = [p["alt"] for p in pairs]
+
+    # media de volumen 30d: una vez por ticker, compartida por todos los pares
+    tickers = sorted(set(bases) | set(alts))
+    own_rows = close[tickers].notna() | volume[tickers].notna()
+    vol_mean = _rolling_volume_mean(volume[tickers], own_rows)
+
+    B, A, M, rb, ra = _pair_returns(close, bases, alts)
+    periods = periods_per_year(interval) if interval else infer_periods_per_year(close.index)
+    vb = ~np.isnan(rb); va = ~np.isnan(ra)
+    J = vb & va
+    n = J.sum(axis=0)
+
+    def ann_vol(r, valid):
+        cnt = valid.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mu = np.where(valid, r, 0.0).sum(axis=0) / cnt
+            var = np.where(valid, (r - mu) ** 2, 0.0).sum(axis=0) / cnt
+        return np.sqrt(periods) * np.sqrt(var)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x = np.where(J, rb, 0.0); y = np.where(J, ra, 0.0)
+        mx = x.sum(axis=0) / n; my = y.sum(axis=0) / n
+        xc = np.where(J, rb - mx, 0.0); yc = np.where(J, ra - my, 0.0)
+        sxx = (xc * xc).sum(axis=0); sxy = (xc * yc).sum(axis=0); syy = (yc * yc).sum(axis=0)
+        beta = np.where((n >= 5) & (sxx > 0), sxy / sxx, np.nan)
+        alpha = my - beta * mx
+        ss_res = np.where(J, (ra - alpha - beta * rb) ** 2, 0.0).sum(axis=0)
+        r2 = np.where(syy != 0, 1.0 - ss_res / syy, np.nan)
+        r2 = np.where(n >= 5, r2, np.nan)
+        corr = np.where((vb.sum(axis=0) > 2) & (n >= 2), sxy / np.sqrt(sxx * syy), np.nan)
+        base_move = np.where(beta != 0, 0.01 / beta, np.nan)
+
+        ret_base = _last_valid(np.where(M, B, np.nan)) / _first_valid(np.where(M, B, np.nan)) - 1.0
+        ret_alt = _last_valid(np.where(M, A, np.nan)) / _first_valid(np.where(M, A, np.nan)) - 1.0
+
+    avg_vol_base = _last_valid(np.where(M, vol_mean[bases].to_numpy(), np.nan))
+    avg_vol_alt = _last_valid(np.where(M, vol_mean[alts].to_numpy(), np.nan))
+
+    out = pd.DataFrame({
+        "base": bases,
+        "alt": alts,
+        "start": str(pd.to_datetime(start).date()),
+        "end": str(pd.to_datetime(end).date()),
+        "n_obs": n.astype(int),
+        "ret_base": ret_base,
+        "ret_alt": ret_alt,
+        "vol_base": ann_vol(rb, vb),
+        "vol_alt": ann_vol(ra, va),
+        "avg_vol_base": avg_vol_base,
+        "avg_vol_alt": avg_vol_alt,
+        "beta_alt_on_base": beta,
+        "corr": corr,
+        "r2": r2,
+        "alt_move_if_base_1pct": beta * 0.01,
+        "base_move_for_alt_1pct": base_move,
+        "target_ratio": [p.get("target_ratio") for p in pairs],
+    })
+    if n_boot:
+        ci = bootstrap_ci(rb, ra, [f"{b}→{a}" for b, a in zip(bases, alts)], out["target_ratio"].tolist(),
+                          n_boot=n_boot, level=ci_level, seed=seed)
+        out[CI_COLUMNS] = ci[CI_COLUMNS].to_numpy()
+    return out[columns]
+
+@timed()
+def universe_ci(close: Union[pd.DataFrame, PricePanel], pairs: List[dict], n_boot: int=2000,
+                ci_level: float=0.90, seed: int=0) -> pd.DataFrame:
+    # solo los intervalos bootstrap (CI_COLUMNS) de `summarize_universe`, con las mismas semillas por par:
+    # para acompañar métricas puntuales calculadas por otra vía (core.online)
+    if isinstance(close, PricePanel):
+        close = close.frame("close")
+    pairs = [p for p in pairs if p["base"] in close.columns and p["alt"] in close.columns]
+    bases = [p["base"] for p in pairs]
+    alts = [p["alt"] for p in pairs]
+    if not pairs:
+        return pd.DataFrame(columns=["base", "alt"] + CI_COLUMNS)
+    _, _, _, rb, ra = _pair_returns(close, bases, alts)
+    ci = bootstrap_ci(rb, ra, [f"{b}→{a}" for b, a in zip(bases, alts)], [p.get("target_ratio") for p in pairs],
+                      n_boot=n_boot, level=ci_level, seed=seed)
+    out = pd.DataFrame({"base": bases, "alt": alts})
+    out[CI_COLUMNS] = ci[CI_COLUMNS].to_numpy()
+    return out
@@ -0,0 +1,186 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Union
+
+from core.metrics import TRADING_DAYS
+from core.profiling import timed
+
+MODELS = ("bootstrap", "gbm", "garch")
+STATS = ("base_ret", "lev_ret", "tracking_gap", "vol_drag", "terminal_ratio")
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+def _garch_variance(e2: np.ndarray, omega: float, a: float, b: float, s0: float) -> np.ndarray:
+    # σ²_t = ω + a·e²_{t-1} + b·σ²_{t-1}, con σ²_0 = s0 (recursión lineal resuelta con lfilter)
+    from scipy.signal import lfilter
+    drive = np.r_[s0, omega + a * e2[:-1]]
+    return lfilter([1.0], [1.0, -b], drive)
+
+def fit_model(base_close: pd.Series, model: str="bootstrap") -> dict:
+    # parámetros del generador de rendimientos diarios del subyacente a partir de su historia
+    r = base_close.dropna().pct_change().dropna().to_numpy()
+    if len(r) < 30:
+        raise ValueError("historia insuficiente para calibrar la simulación (mínimo 30 rendimientos)")
+    if model == "bootstrap":
+        return {"model": model, "returns": r}
+    lr = np.log1p(r)
+    if model == "gbm":
+        return {"model": model, "mu": float(lr.mean()), "sigma": float(lr.std(ddof=1))}
+    if model == "garch":
+        from scipy.optimize import minimize
+        mu = float(lr.mean()); e = lr - mu; e2 = e ** 2
+        var = float(e2.mean())
+        def nll(p):
+            a, b = p
+            if a + b >= 0.999:
+                return 1e10
+            s2 = _garch_variance(e2, var * (1 - a - b), a, b, var)
+            return 0.5 * float(np.sum(np.log(s2) + e2 / s2))
+        res = minimize(nll, x0=[0.08, 0.9], method="L-BFGS-B", bounds=[(1e-6, 0.5), (0.0, 0.998)])
+        a, b = (float(v) for v in res.x)
+        omega = var * (1 - a - b)
+        s2 = _garch_variance(e2, omega, a, b, var)
+        # innovaciones estandarizadas históricas (simulación histórica filtrada: conserva colas gruesas)
+        z = e / np.sqrt(s2)
+        last = omega + a * e2[-1] + b * s2[-1]
+        return {"model": model, "mu": mu, "omega": omega, "alpha": a, "beta": b,
+                "sigma2_0": float(last), "z": (z - z.mean()) / z.std(ddof=0)}
+    raise ValueError(f"modelo desconocido: {model}")
+
+def simulate_base_returns(params: dict, n_paths: int, horizon: int, rng: np.random.Generator) -> np.ndarray:
+    # (n_paths, horizon) rendimientos simples diarios del subyacente
+    model = params["model"]
+    if model == "bootstrap":
+        r = params["returns"]
+        return r[rng.integers(0, len(r), size=(n_paths, horizon))]
+    if model == "gbm":
+        return np.expm1(params["mu"] + params["sigma"] * rng.standard_normal((n_paths, horizon)))
+    z = params["z"]
+    zs = z[rng.integers(0, len(z), size=(n_paths, horizon))]
+    out = np.empty((n_paths, horizon))
+    s2 = np.full(n_paths, params["sigma2_0"])
+    omega, a, b, mu = params["omega"], params["alpha"], params["beta"], params["mu"]
+    for t in range(horizon):
+        e = np.sqrt(s2) * zs[:, t]
+        out[:, t] = e
+        s2 = omega + a * e * e + b * s2
+    out += mu
+    return np.expm1(out, out=out)
+
+def leverage_stats(base_r: np.ndarray, leverage: float, expense_ratio: float=0.0) -> Dict[str, np.ndarray]:
+    # estadísticos terminales por trayectoria de un producto con rebalanceo diario a `leverage`×
+    base_log = np.log1p(base_r).sum(axis=1)
+    daily = 1.0 + leverage * base_r - expense_ratio / TRADING_DAYS
+    # un día de -100% o peor deja el producto en cero
+    with np.errstate(divide="ignore"):
+        lev_log = np.log(np.maximum(daily, 0.0)).sum(axis=1)
+    base_ret = np.expm1(base_log); lev_ret = np.expm1(lev_log)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = np.where(np.abs(base_ret) > 1e-12, lev_ret / base_ret, np.nan)
+    return {
+        "base_ret": base_ret,
+        "lev_ret": lev_ret,
+        "tracking_gap": lev_ret - leverage * base_ret,
+        "vol_drag": lev_log - leverage * base_log,
+        "terminal_ratio": ratio,
+    }
+
+def _chunk_task(args) -> List[Dict[str, np.ndarray]]:
+    params, leverages, n_paths, horizon, expense_ratio, seed = args
+    rng = np.random.default_rng(seed)
+    base_r = simulate_base_returns(params, n_paths, horizon, rng)
+    return [leverage_stats(base_r, L, expense_ratio) for L in leverages]
+
+def _plan(n_paths: int, chunk_paths: int) -> List[int]:
+    sizes = [chunk_paths] * (n_paths // chunk_paths)
+    if n_paths % chunk_paths:
+        sizes.append(n_paths % chunk_paths)
+    return sizes
+
+def _run(jobs: List[tuple], n_jobs: Optional[int]):
+    # resultados en el orden de `jobs`, entregados según llegan para poder reducirlos sobre la marcha
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(jobs) == 1:
+        for j in jobs:
+            yield _chunk_task(j)
+        return
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(jobs))) as ex:
+        yield from ex.map(_chunk_task, jobs)
+
+@timed()
+def simulate_pair(base_close: pd.Series, leverage: float, n_paths: int=10_000, horizon: int=TRADING_DAYS,
+                  model: str="bootstrap", expense_ratio: float=0.0, chunk_paths: int=20_000,
+                  seed: Optional[int]=0, n_jobs: Optional[int]=1) -> pd.DataFrame:
+    # una fila por trayectoria con los estadísticos de STATS
+    params = fit_model(base_close, model)
+    seeds = np.random.SeedSequence(seed).spawn(len(_plan(n_paths, chunk_paths)))
+    jobs = [(params, (float(leverage),), size, horizon, expense_ratio, s)
+            for size, s in zip(_plan(n_paths, chunk_paths), seeds)]
+    parts = [res[0] for res in _run(jobs, n_jobs)]
+    return pd.DataFrame({k: np.concatenate([p[k] for p in parts]) for k in STATS})
+
+def summarize_paths(stats: Union[pd.DataFrame, Dict[str, np.ndarray]],
+                    quantiles: Sequence[float]=QUANTILES) -> dict:
+    out = {}
+    lev_ret = np.asarray(stats["lev_ret"])
+    out["p_wipeout"] = float(np.mean(lev_ret <= -1.0))
+    out["p_gap_negative"] = float(np.mean(np.asarray(stats["tracking_gap"]) < 0))
+    for k in STATS:
+        v = np.asarray(stats[k], dtype=float)
+        v = v[np.isfinite(v)]
+        out[f"{k}_mean"] = float(v.mean()) if v.size else np.nan
+        qs = np.quantile(v, quantiles) if v.size else np.full(len(quantiles), np.nan)
+        for q, val in zip(quantiles, qs):
+            out[f"{k}_p{int(round(q * 100)):02d}"] = float(val)
+    return out
+
+@timed()
+def simulate_universe(close: Union[Dict[str, pd.Series], pd.DataFrame], pairs: List[dict], n_paths: int=100_000,
+                      horizon: int=TRADING_DAYS, model: str="bootstrap", expense_ratio: float=0.0,
+                      chunk_paths: int=20_000, seed: Optional[int]=0, n_jobs: Optional[int]=None,
+                      quantiles: Sequence[float]=QUANTILES) -> pd.DataFrame:
+    # Las trayectorias del subyacente se generan una vez por BASE y se reutilizan para todos sus
+    # apalancados (números aleatorios comunes). Cada tarea es (BASE, bloque de trayectorias): la memoria
+    # queda acotada por chunk_paths × horizon y las semillas no dependen de n_jobs.
+    by_base: Dict[str, List[dict]] = {}
+    for p in pairs:
+        if p["base"] in close and p.get("target_ratio") is not None:
+            by_base.setdefault(p["base"], []).append(p)
+
+    jobs, owners = [], []
+    root = np.random.SeedSequence(seed)
+    sizes = _plan(n_paths, chunk_paths)
+    for base, plist in by_base.items():
+        try:
+            params = fit_model(close[base], model)
+        except ValueError:
+            continue
+        leverages = tuple(float(p["target_ratio"]) for p in plist)
+        for size, s in zip(sizes, root.spawn(len(sizes))):
+            jobs.append((params, leverages, size, horizon, expense_ratio, s))
+            owners.append(base)
+    if not jobs:
+        return pd.DataFrame()
+
+    # reducción por BASE a medida que llegan los bloques: solo se retienen los vectores por trayectoria
+    # de una BASE a la vez
+    rows = []
+    def finish(base, parts):
+        for i, p in enumerate(by_base[base]):
+            stats = {k: np.concatenate([part[i][k] for part in parts]) for k in STATS}
+            row = {"pair": f'{p["base"]}→{p["alt"]}', "base": p["base"], "alt": p["alt"],
+                   "target_ratio": float(p["target_ratio"]), "model": model, "n_paths": int(n_paths),
+                   "horizon": int(horizon)}
+            row.update(summarize_paths(stats, quantiles))
+            rows.append(row)
+    current, parts = None, []
+    for base, res in zip(owners, _run(jobs, n_jobs)):
+        if base != current and parts:
+            finish(current, parts)
+            parts = []
+        current = base
+        parts.append(res)
+    if parts:
+        finish(current, parts)
+    return pd.DataFrame(rows)
@@ -0,0 +1,501 @@
+import os
+import json
+import math
+import threading
+import numpy as np
+import pandas as pd
+from dataclasses import fields
+from typing import Dict, List, Optional
+
+from core.metrics import PairMetrics, _masked_pct_change
+from core.panel import PricePanel
+from core.intraday import column_breaks, in_regular_session, is_intraday, periods_per_year, regular_session, session_chunks, session_days
+from core.profiling import timed
+
+def merge_moments(a: dict, b: dict) -> dict:
+    # Chan, Golub y LeVeque (1979): combina (n, medias, M2, co-momento) de dos muestras disjuntas;
+    # vale con escalares o con arrays (un elemento por par)
+    n = a["n"] + b["n"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        wa = np.where(n > 0, a["n"] / n, 0.0); wb = np.where(n > 0, b["n"] / n, 0.0)
+        dx = b["mean_x"] - a["mean_x"]; dy = b["mean_y"] - a["mean_y"]
+        f = a["n"] * wb
+    return {
+        "n": n,
+        "mean_x": a["mean_x"] * wa + b["mean_x"] * wb,
+        "mean_y": a["mean_y"] * wa + b["mean_y"] * wb,
+        "m2_x": a["m2_x"] + b["m2_x"] + dx * dx * f,
+        "m2_y": a["m2_y"] + b["m2_y"] + dy * dy * f,
+        "c_xy": a["c_xy"] + b["c_xy"] + dx * dy * f,
+    }
+
+_MOMENTS = ("n", "mean_x", "mean_y", "m2_x", "m2_y", "c_xy")
+
+class _Ring:
+    # ventana circular de tamaño fijo con suma y nº de NaN mantenidos en O(1)
+    def __init__(self, size: int, values: Optional[List[float]]=None, pos: int=0, count: int=0):
+        self.size = size
+        self.buf = np.full(size, np.nan) if values is None else np.asarray(values, dtype=float)
+        self.pos = pos
+        self.count = count
+        self.undo_state = None
+        self._resum()
+
+    def _resum(self):
+        filled = self.buf[:min(self.count, self.size)]
+        self.total = float(np.nansum(filled))
+        self.nans = int(np.isnan(filled).sum())
+
+    def push(self, v: float):
+        self.undo_state = (self.pos, float(self.buf[self.pos]), self.count, self.total, self.nans)
+        if self.count >= self.size:
+            old = self.buf[self.pos]
+            if math.isnan(old): self.nans -= 1
+            else: self.total -= old
+        self.buf[self.pos] = v
+        if math.isnan(v): self.nans += 1
+        else: self.total += v
+        self.pos = (self.pos + 1) % self.size
+        self.count += 1
+        # recalcular de vez en cuando evita la deriva de las sumas incrementales
+        if self.pos == 0:
+            self._resum()
+
+    def undo(self):
+        # deshace el último `push` (una sola vez)
+        self.pos, old, self.count, self.total, self.nans = self.undo_state
+        self.buf[self.pos] = old
+        self.undo_state = None
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.size
+
+    def mean(self) -> float:
+        return self.total / self.size if self.full and self.nans == 0 else np.nan
+
+    def to_dict(self) -> dict:
+        undo = None
+        if self.undo_state is not None:
+            pos, old, count, total, nans = self.undo_state
+            undo = [pos, None if np.isnan(old) else old, count, total, nans]
+        return {"size": self.size, "values": [None if np.isnan(v) else float(v) for v in self.buf],
+                "pos": self.pos, "count": self.count, "undo": undo}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "_Ring":
+        ring = cls(d["size"], [np.nan if v is None else v for v in d["values"]], d["pos"], d["count"])
+        if d.get("undo") is not None:
+            pos, old, count, total, nans = d["undo"]
+            ring.undo_state = (pos, np.nan if old is None else old, count, total, nans)
+        return ring
+
+class OnlinePairMetrics:
+    # Estadísticos suficientes de un par (Welford bivariante + ventanas circulares) actualizados en O(1)
+    # por barra. Coincide con `summarize_pair` / `rolling_beta` cuando se alimenta con las barras comunes
+    # BASE/ALT (mismo calendario para cierres y volúmenes). Con `interval` intradía no se cuenta el
+    # retorno de la primera barra de cada sesión y la volatilidad se anualiza con las barras del intervalo.
+    # Volver a enviar la última barra (refresco de una barra aún abierta) la sustituye en lugar de añadir
+    # otra; una fecha anterior a la última es un error.
+    def __init__(self, base: str, alt: str, target_ratio: Optional[float]=None, start: Optional[str]=None,
+                 window: int=60, vol_window: int=30, interval: str="1d"):
+        self.base, self.alt, self.target_ratio = base, alt, target_ratio
+        self.start = start
+        self.end = None
+        self.window = window
+        self.interval = interval
+        self.last_day = None
+        self.last_date = None
+        self.prev = None          # escalares antes de la última barra, para poder sustituirla
+        self.first_base = self.first_alt = np.nan
+        self.last_base = self.last_alt = np.nan
+        self.n = 0
+        self.mean_x = self.mean_y = 0.0
+        self.m2_x = self.m2_y = self.c_xy = 0.0
+        self.avg_vol_base = self.avg_vol_alt = np.nan
+        self.vol_base_ring = _Ring(vol_window)
+        self.vol_alt_ring = _Ring(vol_window)
+        self.x_ring = _Ring(window)
+        self.y_ring = _Ring(window)
+        self.xx_ring = _Ring(window)
+        self.xy_ring = _Ring(window)
+
+    def update(self, date, base_close: float, alt_close: float,
+               base_vol: float=np.nan, alt_vol: float=np.nan):
+        # a float de Python: con almacén float32, un escalar float32 haría los retornos en float32
+        base_close, alt_close = float(base_close), float(alt_close)
+        if math.isnan(base_close) or math.isnan(alt_close):
+            return self
+        ts = pd.Timestamp(date)
+        if is_intraday(self.interval) and not in_regular_session(ts):
+            return self                              # pre/post mercado: fuera de la sesión regular
+        if self.last_date is not None:
+            last = pd.Timestamp(self.last_date)
+            if ts < last:
+                raise ValueError(f"{self.base}→{self.alt}: barra {ts} anterior a la última ({last})")
+            if ts == last:
+                self._undo_last()
+        self.prev = {k: getattr(self, k) for k in self._UNDO}
+        for k in self._RINGS:
+            getattr(self, k).undo_state = None
+        self.last_date = str(ts)
+        day = str(ts.date())
+        new_session = is_intraday(self.interval) and day != self.last_day
+        self.end = self.last_day = day
+        if self.start is None:
+            self.start = self.end
+        if math.isnan(self.first_base):
+            self.first_base, self.first_alt = float(base_close), float(alt_close)
+        elif not new_session:
+            x = base_close / self.last_base - 1.0
+            y = alt_close / self.last_alt - 1.0
+            self.n += 1
+            dx = x - self.mean_x
+            self.mean_x += dx / self.n
+            dy = y - self.mean_y
+            self.mean_y += dy / self.n
+            self.m2_x += dx * (x - self.mean_x)
+            self.m2_y += dy * (y - self.mean_y)
+            self.c_xy += dx * (y - self.mean_y)
+            self.x_ring.push(x); self.y_ring.push(y)
+            self.xx_ring.push(x * x); self.xy_ring.push(x * y)
+        self.last_base, self.last_alt = float(base_close), float(alt_close)
+
+        self.vol_base_ring.push(float(base_vol)); self.vol_alt_ring.push(float(alt_vol))
+        # como en el batch: último promedio 30d disponible
+        m = self.vol_base_ring.mean()
+        if not math.isnan(m): self.avg_vol_base = m
+        m = self.vol_alt_ring.mean()
+        if not math.isnan(m): self.avg_vol_alt = m
+        return self
+
+    # estado que cambia en cada barra (además de las ventanas circulares)
+    _UNDO = ("start", "end", "last_day", "last_date", "first_base", "first_alt", "last_base", "last_alt",
+             "n", "mean_x", "mean_y", "m2_x", "m2_y", "c_xy", "avg_vol_base", "avg_vol_alt")
+
+    def _undo_last(self):
+        if self.prev is None:
+            raise ValueError(f"{self.base}→{self.alt}: no se puede sustituir la barra {self.last_date} "
+                             "(estado combinado con `merge`)")
+        for k, v in self.prev.items():
+            setattr(self, k, v)
+        for k in self._RINGS:
+            ring = getattr(self, k)
+            if ring.undo_state is not None:
+                ring.undo()
+        self.prev = None
+
+    def rolling_beta(self) -> float:
+        if not self.x_ring.full:
+            return np.nan
+        w = float(self.window)
+        sx, sy = self.x_ring.total, self.y_ring.total
+        cxx = self.xx_ring.total - sx * sx / w
+        cxy = self.xy_ring.total - sx * sy / w
+        return cxy / cxx if cxx > 0 else np.nan
+
+    def metrics(self) -> PairMetrics:
+        n = self.n
+        beta = self.c_xy / self.m2_x if (n >= 5 and self.m2_x > 0) else np.nan
+        r2 = (self.c_xy ** 2 / (self.m2_x * self.m2_y)) if (n >= 5 and self.m2_x > 0 and self.m2_y > 0) else np.nan
+        corr = self.c_xy / np.sqrt(self.m2_x * self.m2_y) if (n > 2 and self.m2_x > 0 and self.m2_y > 0) else np.nan
+        vol = lambda m2: np.sqrt(periods_per_year(self.interval)) * np.sqrt(m2 / n) if n > 0 else np.nan
+        return PairMetrics(
+            base=self.base,
+            alt=self.alt,
+            start=self.start,
+            end=self.end,
+            n_obs=int(n),
+            ret_base=self.last_base / self.first_base - 1.0,
+            ret_alt=self.last_alt / self.first_alt - 1.0,
+            vol_base=vol(self.m2_x),
+            vol_alt=vol(self.m2_y),
+            avg_vol_base=self.avg_vol_base,
+            avg_vol_alt=self.avg_vol_alt,
+            beta_alt_on_base=float(beta),
+            corr=float(corr),
+            r2=float(r2),
+            alt_move_if_base_1pct=float(beta * 0.01),
+            base_move_for_alt_1pct=float(0.01 / beta) if (pd.notna(beta) and beta != 0) else np.nan,
+            target_ratio=self.target_ratio
+        )
+
+    def merge(self, later: "OnlinePairMetrics") -> "OnlinePairMetrics":
+        # combina con el estado de un tramo posterior (p.ej. calculado en otro proceso). El retorno entre el
+        # último cierre de este tramo y el primero del siguiente no está en ninguno de los dos y se añade aquí,
+        # salvo en intradía si cae en cambio de sesión. Las ventanas circulares pasan a ser las del tramo posterior.
+        if later.n == 0 and math.isnan(later.first_base):
+            return self
+        if math.isnan(self.first_base):
+            return later
+        mine = {k: getattr(self, k) for k in _MOMENTS}
+        if not (is_intraday(self.interval) and later.start != self.last_day):
+            x = later.first_base / self.last_base - 1.0
+            y = later.first_alt / self.last_alt - 1.0
+            mine = merge_moments(mine, {"n": 1, "mean_x": x, "mean_y": y, "m2_x": 0.0, "m2_y": 0.0, "c_xy": 0.0})
+        for k, v in merge_moments(mine, {k: getattr(later, k) for k in _MOMENTS}).items():
+            setattr(self, k, float(v) if k != "n" else int(v))
+        self.end, self.last_day, self.last_date = later.end, later.last_day, later.last_date
+        self.prev = None
+        self.last_base, self.last_alt = later.last_base, later.last_alt
+        for k in ("avg_vol_base", "avg_vol_alt"):
+            if not math.isnan(getattr(later, k)):
+                setattr(self, k, getattr(later, k))
+        for k in self._RINGS:
+            setattr(self, k, getattr(later, k))
+        return self
+
+    @classmethod
+    def from_history(cls, base_close: pd.Series, alt_close: pd.Series, base_vol: pd.Series, alt_vol: pd.Series,
+                     target_ratio: Optional[float]=None, window: int=60, vol_window: int=30,
+                     interval: str="1d") -> "OnlinePairMetrics":
+        base_close = base_close.dropna(); alt_close = alt_close.dropna()
+        idx = base_close.index.intersection(alt_close.index)
+        om = cls(base_close.name, alt_close.name, target_ratio, window=window, vol_window=vol_window, interval=interval)
+        bv = base_vol.reindex(idx).values; av = alt_vol.reindex(idx).values
+        for d, b, a, vb, va in zip(idx, base_close.loc[idx].values, alt_close.loc[idx].values, bv, av):
+            om.update(d, b, a, vb, va)
+        return om
+
+    _SCALARS = ("base", "alt", "target_ratio", "start", "end", "window", "first_base", "first_alt",
+                "last_base", "last_alt", "n", "mean_x", "mean_y", "m2_x", "m2_y", "c_xy",
+                "avg_vol_base", "avg_vol_alt", "interval", "last_day", "last_date")
+    _NULLABLE = ("target_ratio", "start", "end", "last_day", "last_date")
+    _RINGS = ("vol_base_ring", "vol_alt_ring", "x_ring", "y_ring", "xx_ring", "xy_ring")
+
+    def to_dict(self) -> dict:
+        d = {}
+        for k in self._SCALARS:
+            v = getattr(self, k)
+            d[k] = None if isinstance(v, float) and np.isnan(v) else v
+        for k in self._RINGS:
+            d[k] = getattr(self, k).to_dict()
+        d["prev"] = None if self.prev is None else {
+            k: None if isinstance(v, float) and np.isnan(v) else v for k, v in self.prev.items()}
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "OnlinePairMetrics":
+        om = cls(d["base"], d["alt"], d["target_ratio"], d["start"], window=d["window"])
+        for k in cls._SCALARS:
+            if k not in d:
+                continue   # estados guardados antes de existir el campo: se queda el valor por defecto
+            v = d[k]
+            setattr(om, k, np.nan if v is None and k not in cls._NULLABLE else v)
+        for k in cls._RINGS:
+            setattr(om, k, _Ring.from_dict(d[k]))
+        if d.get("prev") is not None:
+            om.prev = {k: np.nan if v is None and k not in cls._NULLABLE else v for k, v in d["prev"].items()}
+        return om
+
+class OnlineUniverse:
+    # un OnlinePairMetrics por par, persistido en un único JSON. `from_panel` lo construye sobre una historia
+    # y `extend` le añade las barras nuevas de un panel refrescado (la app lo guarda en la caché compartida)
+    def __init__(self, pairs: List[dict], window: int=60, vol_window: int=30, interval: str="1d"):
+        self.pairs: Dict[str, OnlinePairMetrics] = {
+            f'{p["base"]}→{p["alt"]}': OnlinePairMetrics(p["base"], p["alt"], p.get("target_ratio"),
+                                                          window=window, vol_window=vol_window, interval=interval)
+            for p in pairs
+        }
+        self._lock = threading.Lock()
+
+    @classmethod
+    @timed("online.from_panel")
+    def from_panel(cls, panel: PricePanel, pairs: List[dict], window: int=60, vol_window: int=30,
+                   interval: str="1d") -> "OnlineUniverse":
+        # mismo estado que alimentar con `update` todas las barras del panel, sin recorrerlas en Python: los
+        # momentos de la historia salen en bloque y solo la cola que ocupan las ventanas circulares se
+        # reproduce barra a barra
+        pairs = [p for p in pairs if p["base"] in panel and p["alt"] in panel]
+        ou = cls(pairs, window, vol_window, interval)
+        if not pairs or len(panel.index) == 0:
+            return ou
+        index = panel.index
+        B = np.column_stack([panel.col(p["base"]) for p in pairs]).astype(np.float64)
+        A = np.column_stack([panel.col(p["alt"]) for p in pairs]).astype(np.float64)
+        if panel.volume is not None:
+            VB = np.column_stack([panel.col(p["base"], "volume") for p in pairs]).astype(np.float64)
+            VA = np.column_stack([panel.col(p["alt"], "volume") for p in pairs]).astype(np.float64)
+        else:
+            VB = VA = np.full(B.shape, np.nan)
+        M = ~np.isnan(B) & ~np.isnan(A)
+        day = session_days(index) if is_intraday(interval) else None
+        if day is not None:
+            M &= regular_session(index)[:, None]
+        rb = _masked_pct_change(B, M); ra = _masked_pct_change(A, M)
+        if day is not None:
+            brk = column_breaks(day, M)
+            rb[brk] = np.nan; ra[brk] = np.nan
+        R = ~np.isnan(rb) & ~np.isnan(ra)
+
+        # cola de cada par: desde la barra conjunta `cut` (fila del panel), con al menos `window` retornos y
+        # `vol_window` barras para que las ventanas circulares queden como tras la historia completa
+        k = len(pairs)
+        rows_of = [np.flatnonzero(M[:, j]) for j in range(k)]
+        tail = np.zeros(k, dtype=np.intp)
+        cut = np.zeros(k, dtype=np.intp)
+        for j, rows in enumerate(rows_of):
+            if len(rows) == 0:
+                continue
+            rets = np.flatnonzero(R[rows, j])
+            c = min(len(rows) - vol_window, rets[-window] if len(rets) >= window else 0)
+            tail[j] = max(c, 0)
+            cut[j] = rows[tail[j]]
+        head = np.arange(len(index))[:, None] < cut[None, :]
+        mom = _chunk_moments(np.where(head, rb, np.nan), np.where(head, ra, np.nan))
+
+        for j, (om, rows) in enumerate(zip(ou.pairs.values(), rows_of)):
+            c = int(tail[j])
+            if c > 0:
+                first, last = rows[0], rows[c - 1]
+                om.first_base, om.first_alt = float(B[first, j]), float(A[first, j])
+                om.last_base, om.last_alt = float(B[last, j]), float(A[last, j])
+                om.start = str(index[first].date())
+                om.end = om.last_day = str(index[last].date())
+                om.last_date = str(index[last])
+                om.n = int(mom["n"][j])
+                for m in _MOMENTS[1:]:
+                    setattr(om, m, float(mom[m][j]))
+                # último promedio de volumen completo antes de que la cola llene su ventana (incluye las
+                # ventanas que cruzan la frontera historia/cola)
+                upto = c + vol_window - 1
+                for attr, V in (("avg_vol_base", VB), ("avg_vol_alt", VA)):
+                    roll = pd.Series(V[rows[:upto], j]).rolling(vol_window).mean().dropna()
+                    if not roll.empty:
+                        setattr(om, attr, float(roll.iloc[-1]))
+            for r in rows[c:]:
+                om.update(index[r], B[r, j], A[r, j], VB[r, j], VA[r, j])
+        return ou
+
+    def extend(self, panel: PricePanel) -> int:
+        # añade las barras del panel desde la última de cada par; esa se vuelve a enviar (si cambió, p.ej. la
+        # barra aún abierta de hoy, se sustituye). Devuelve el nº de barras procesadas
+        fed = 0
+        with self._lock:
+            for om in self.pairs.values():
+                if om.base not in panel or om.alt not in panel:
+                    continue
+                lo = 0 if om.last_date is None else int(panel.index.searchsorted(pd.Timestamp(om.last_date)))
+                b, a = panel.col(om.base)[lo:], panel.col(om.alt)[lo:]
+                vb = panel.col(om.base, "volume")[lo:] if panel.volume is not None else np.full(len(b), np.nan)
+                va = panel.col(om.alt, "volume")[lo:] if panel.volume is not None else np.full(len(a), np.nan)
+                for r in np.flatnonzero(~np.isnan(b) & ~np.isnan(a)):
+                    om.update(panel.index[lo + r], b[r], a[r], vb[r], va[r])
+                    fed += 1
+        return fed
+
+    def update(self, date, close: Dict[str, float], volume: Dict[str, float]):
+        for om in self.pairs.values():
+            om.update(date, close.get(om.base, np.nan), close.get(om.alt, np.nan),
+                      volume.get(om.base, np.nan), volume.get(om.alt, np.nan))
+        return self
+
+    def metrics_frame(self) -> pd.DataFrame:
+        with self._lock:
+            rows = [om.metrics().__dict__ for om in self.pairs.values()]
+        return pd.DataFrame(rows, columns=[f.name for f in fields(PairMetrics)])
+
+    def rolling_betas(self) -> pd.Series:
+        with self._lock:
+            return pd.Series({k: om.rolling_beta() for k, om in self.pairs.items()}, name="beta_rolling")
+
+    def save(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({k: om.to_dict() for k, om in self.pairs.items()}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "OnlineUniverse":
+        with open(path) as f:
+            raw = json.load(f)
+        ou = cls([])
+        ou.pairs = {k: OnlinePairMetrics.from_dict(v) for k, v in raw.items()}
+        return ou
+
+def _chunk_moments(rb: np.ndarray, ra: np.ndarray) -> dict:
+    # momentos de un tramo por columna (par) sobre las filas con ambos retornos
+    J = ~np.isnan(rb) & ~np.isnan(ra)
+    n = J.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mx = np.where(n > 0, np.where(J, rb, 0.0).sum(axis=0) / n, 0.0)
+        my = np.where(n > 0, np.where(J, ra, 0.0).sum(axis=0) / n, 0.0)
+    xc = np.where(J, rb - mx, 0.0); yc = np.where(J, ra - my, 0.0)
+    return {"n": n, "mean_x": mx, "mean_y": my, "m2_x": (xc * xc).sum(axis=0),
+            "m2_y": (yc * yc).sum(axis=0), "c_xy": (xc * yc).sum(axis=0)}
+
+@timed()
+def summarize_chunked(store, pairs: List[dict], start, end, chunk_sessions: int=5,
+                      vol_window: int=30) -> pd.DataFrame:
+    # Métricas del universo leyendo el almacén por tramos de `chunk_sessions` sesiones: la memoria depende
+    # del tramo, no del rango (1 año de barras de 1m ≈ 98k filas por ticker). Cada tramo aporta sus momentos
+    # por par en bloque y se combinan con `merge_moments`; el retorno que cruza la frontera entre tramos se
+    # añade con el último cierre conjunto del tramo anterior (en intradía cae en cambio de sesión y se omite).
+    interval = store.interval
+    intraday = is_intraday(interval)
+    pairs = list(pairs)
+    bases = [p["base"] for p in pairs]; alts = [p["alt"] for p in pairs]
+    tickers = sorted(set(bases) | set(alts))
+    k = len(pairs)
+    acc = {m: np.zeros(k) for m in _MOMENTS}
+    first_b = np.full(k, np.nan); first_a = np.full(k, np.nan)
+    carry_b = np.full(k, np.nan); carry_a = np.full(k, np.nan)
+    vol_tail = {t: np.empty(0) for t in tickers}
+    for lo, hi in session_chunks(start, end, chunk_sessions):
+        panel = store.panel(tickers, lo, hi)
+        if len(panel.index) == 0:
+            continue
+        rows = regular_session(panel.index) if intraday else np.ones(len(panel.index), dtype=bool)
+        if not rows.any():
+            continue
+        pos = {t: j for j, t in enumerate(panel.tickers)}
+        close = panel.close[rows]
+        # fila 0: último cierre conjunto del tramo anterior
+        B = np.vstack([carry_b, close[:, [pos[t] for t in bases]]]).astype(float)
+        A = np.vstack([carry_a, close[:, [pos[t] for t in alts]]]).astype(float)
+        M = ~np.isnan(B) & ~np.isnan(A)
+        rb = _masked_pct_change(B, M); ra = _masked_pct_change(A, M)
+        if intraday:
+            # fila 0 (arrastre) con una sesión ficticia: los tramos empiezan en sesión nueva
+            day = np.r_[-1, session_days(panel.index[rows])]
+            brk = column_breaks(day, M)
+            rb[brk] = np.nan; ra[brk] = np.nan
+        acc = merge_moments(acc, _chunk_moments(rb, ra))
+        Mc = M[1:]
+        has = Mc.any(axis=0)
+        first = np.argmax(Mc, axis=0); last = Mc.shape[0] - 1 - np.argmax(Mc[::-1], axis=0)
+        cols = np.arange(k)
+        new = has & np.isnan(first_b)
+        first_b[new] = B[1:][first[new], cols[new]]; first_a[new] = A[1:][first[new], cols[new]]
+        carry_b[has] = B[1:][last[has], cols[has]]; carry_a[has] = A[1:][last[has], cols[has]]
+        vol = panel.volume[rows]
+        for t in tickers:
+            v = vol[:, pos[t]]
+            vol_tail[t] = np.concatenate([vol_tail[t], v[~np.isnan(v)]])[-vol_window:]
+
+    n = acc["n"]
+    avg_vol = {t: float(v.mean()) if len(v) == vol_window else np.nan for t, v in vol_tail.items()}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = np.where((n >= 5) & (acc["m2_x"] > 0), acc["c_xy"] / acc["m2_x"], np.nan)
+        corr = np.where(n > 2, acc["c_xy"] / np.sqrt(acc["m2_x"] * acc["m2_y"]), np.nan)
+        ann = np.sqrt(periods_per_year(interval))
+        out = pd.DataFrame({
+            "base": bases,
+            "alt": alts,
+            "start": str(pd.Timestamp(start).date()),
+            "end": str(pd.Timestamp(end).date()),
+            "n_obs": n.astype(int),
+            "ret_base": carry_b / first_b - 1.0,
+            "ret_alt": carry_a / first_a - 1.0,
+            "vol_base": np.where(n > 0, ann * np.sqrt(acc["m2_x"] / n), np.nan),
+            "vol_alt": np.where(n > 0, ann * np.sqrt(acc["m2_y"] / n), np.nan),
+            "avg_vol_base": [avg_vol[t] for t in bases],
+            "avg_vol_alt": [avg_vol[t] for t in alts],
+            "beta_alt_on_base": beta,
+            "corr": corr,
+            "r2": np.where(n >= 5, corr * corr, np.nan),
+            "alt_move_if_base_1pct": beta * 0.01,
+            "base_move_for_alt_1pct": np.where(beta != 0, 0.01 / beta, np.nan),
+            "target_ratio": [p.get("target_ratio") for p in pairs],
+        })
+    return out
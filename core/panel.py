@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+
+from core.intraday import session_days
+from core.profiling import timed
+
+# Panel de precios alineado: un único índice de fechas, matrices (fechas × tickers) en orden Fortran
+# (cada columna contigua, así `col()` es una vista sin copia) y una máscara de validez empaquetada en
+# bits (1 bit por celda). Sustituye al dict de Series con índice propio que había que recortar y
+# alinear en cada consumidor. Las vistas comparten memoria con el panel: tratarlas como solo lectura.
+
+def _columns_contiguous(m: np.ndarray) -> np.ndarray:
+    # un recorte de filas de una matriz Fortran ya tiene columnas contiguas: no se copia
+    return m if m.ndim == 2 and m.strides[0] == m.itemsize else np.asfortranarray(m)
+
+class PricePanel:
+    def __init__(self, index: pd.DatetimeIndex, tickers: List[str], close: np.ndarray,
+                 volume: Optional[np.ndarray]=None):
+        self.index = pd.DatetimeIndex(index)
+        self.tickers = list(tickers)
+        self._pos = {t: j for j, t in enumerate(self.tickers)}
+        self.close = _columns_contiguous(close)
+        self.volume = _columns_contiguous(volume) if volume is not None else None
+        self.bits = np.packbits(~np.isnan(self.close), axis=0)
+        self._returns: Dict[str, np.ndarray] = {}
+        self._series: Dict[str, pd.Series] = {}
+
+    @classmethod
+    @timed("panel.from_series")
+    def from_series(cls, close: Dict[str, pd.Series], volume: Optional[Dict[str, pd.Series]]=None,
+                    dtype=np.float64) -> "PricePanel":
+        # une los índices una sola vez y coloca cada serie en su columna por posición (sin reindex por ticker)
+        tickers = list(close)
+        as_i8 = lambda s: np.asarray(s.index, dtype="datetime64[ns]").view(np.int64)
+        parts = {}
+        for src in (close, volume or {}):
+            for s in src.values():
+                v = as_i8(s)
+                # los tickers suelen compartir calendario: índices iguales se unen una sola vez
+                same = parts.setdefault((len(v), v[0] if len(v) else 0, v[-1] if len(v) else 0), [])
+                if not any(np.array_equal(v, u) for u in same):
+                    same.append(v)
+        parts = [v for same in parts.values() for v in same]
+        keys = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+        index = pd.DatetimeIndex(keys.view("datetime64[ns]"), name="Date")
+        def fill(src):
+            m = np.full((len(index), len(tickers)), np.nan, dtype=dtype, order="F")
+            for j, t in enumerate(tickers):
+                s = src.get(t)
+                if s is not None and len(s):
+                    m[np.searchsorted(keys, as_i8(s)), j] = s.to_numpy(dtype)
+            return m
+        return cls(index, tickers, fill(close), fill(volume) if volume is not None else None)
+
+    @classmethod
+    @timed("panel.from_arrays")
+    def from_arrays(cls, columns: Dict[str, tuple], dtype=np.float64) -> "PricePanel":
+        # columns: ticker -> (fechas int64 ns ordenadas, close, volume), tal como las guarda PriceStore
+        tickers = list(columns)
+        dates = [np.asarray(columns[t][0]) for t in tickers]
+        allv = np.unique(np.concatenate(dates)) if dates else np.empty(0, dtype=np.int64)
+        close = np.full((len(allv), len(tickers)), np.nan, dtype=dtype, order="F")
+        volume = np.full_like(close, np.nan)
+        for j, t in enumerate(tickers):
+            rows = np.searchsorted(allv, dates[j])
+            close[rows, j] = columns[t][1]
+            volume[rows, j] = columns[t][2]
+        return cls(pd.DatetimeIndex(allv.view("datetime64[ns]"), name="Date"), tickers, close, volume)
+
+    # --- acceso tipo dict (drop-in para el antiguo close_dict) ---
+
+    def __contains__(self, ticker) -> bool:
+        return ticker in self._pos
+
+    def __iter__(self):
+        return iter(self.tickers)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __getitem__(self, ticker: str) -> pd.Series:
+        return self.series(ticker)
+
+    def keys(self):
+        return list(self.tickers)
+
+    def items(self):
+        return ((t, self.series(t)) for t in self.tickers)
+
+    @property
+    def nbytes(self) -> int:
+        n = self.close.nbytes + self.bits.nbytes + self.index.nbytes
+        n += self.volume.nbytes if self.volume is not None else 0
+        return n + sum(r.nbytes for r in self._returns.values())
+
+    # --- vistas ---
+
+    def rows(self, start=None, end=None) -> slice:
+        lo = 0 if start is None else int(self.index.searchsorted(pd.Timestamp(start), side="left"))
+        hi = len(self.index) if end is None else int(self.index.searchsorted(pd.Timestamp(end), side="right"))
+        return slice(lo, hi)
+
+    def col(self, ticker: str, field: str="close") -> np.ndarray:
+        # vista sin copia de una columna
+        return getattr(self, field)[:, self._pos[ticker]]
+
+    def valid(self, ticker: Optional[str]=None, other: Optional[str]=None) -> np.ndarray:
+        # máscara booleana de un ticker, o conjunta de dos (AND sobre los bits empaquetados)
+        if ticker is None:
+            return np.unpackbits(self.bits, axis=0, count=len(self.index)).astype(bool)
+        b = self.bits[:, self._pos[ticker]]
+        if other is not None:
+            b = b & self.bits[:, self._pos[other]]
+        return np.unpackbits(b, count=len(self.index)).astype(bool)
+
+    def series(self, ticker: str, field: str="close") -> pd.Series:
+        # serie del ticker sin NaN; vista del panel salvo que tenga huecos internos
+        key = f"{field}:{ticker}"
+        if key not in self._series:
+            v = self.col(ticker, field)
+            ok = self.valid(ticker) if field == "close" else ~np.isnan(v)
+            idx = np.flatnonzero(ok)
+            if len(idx) == 0:
+                s = pd.Series(np.empty(0, dtype=v.dtype), index=self.index[:0], name=ticker)
+            elif idx[-1] - idx[0] + 1 == len(idx):
+                sl = slice(idx[0], idx[-1] + 1)
+                s = pd.Series(v[sl], index=self.index[sl], name=ticker, copy=False)
+            else:
+                s = pd.Series(v[idx], index=self.index[idx], name=ticker)
+            self._series[key] = s
+        return self._series[key]
+
+    def window(self, start=None, end=None) -> "PricePanel":
+        # sub-panel de filas [start, end]: las matrices son vistas; bits y retornos propios de la ventana
+        sl = self.rows(start, end)
+        return PricePanel(self.index[sl], self.tickers, self.close[sl],
+                          self.volume[sl] if self.volume is not None else None)
+
+    def select(self, tickers: Iterable[str]) -> "PricePanel":
+        cols = [self._pos[t] for t in tickers]
+        return PricePanel(self.index, [self.tickers[j] for j in cols], self.close[:, cols],
+                          self.volume[:, cols] if self.volume is not None else None)
+
+    def frame(self, field: str="close") -> pd.DataFrame:
+        # DataFrame sobre la matriz (la traspuesta de una matriz Fortran es C-contigua: sin copia)
+        return pd.DataFrame(getattr(self, field), index=self.index, columns=self.tickers, copy=False)
+
+    # --- retornos precalculados ---
+
+    def returns(self, kind: str="simple") -> np.ndarray:
+        # retornos de cada ticker sobre sus propias fechas válidas (= s.dropna().pct_change()), en float64;
+        # NaN en la primera observación, donde no hay precio y, en intradía, en la primera barra de cada
+        # sesión (no se mezcla el salto nocturno con los retornos de la sesión). Se calculan una vez por panel.
+        if kind not in self._returns:
+            if kind not in ("simple", "log"):
+                raise ValueError(f"tipo de retorno desconocido: {kind}")
+            px = self.close.astype(np.float64, copy=False)
+            ok = self.valid()
+            if len(px) == 0:
+                self._returns[kind] = np.empty_like(px)
+                return self._returns[kind]
+            # posición del último precio válido anterior a cada fila
+            pos = np.where(ok, np.arange(len(self.index))[:, None], -1)
+            prev = np.maximum.accumulate(pos, axis=0)
+            prev = np.vstack([np.full((1, px.shape[1]), -1), prev[:-1]])
+            prev_px = np.take_along_axis(px, np.maximum(prev, 0), axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                r = np.log(px / prev_px) if kind == "log" else px / prev_px - 1.0
+            keep = ok & (prev >= 0)
+            day = session_days(self.index)
+            if day is not None:
+                # sesión de cada columna frente a la de su propio precio anterior, no la fila anterior del índice
+                keep &= day[:, None] == day[np.maximum(prev, 0)]
+            self._returns[kind] = np.asfortranarray(np.where(keep, r, np.nan))
+        return self._returns[kind]
+
+    def returns_series(self, ticker: str, kind: str="simple") -> pd.Series:
+        r = self.returns(kind)[:, self._pos[ticker]]
+        ok = ~np.isnan(r)
+        return pd.Series(r[ok], index=self.index[ok], name=ticker)
+
+    def pair_returns(self, base: str, alt: str, kind: str="simple"):
+        # retornos de BASE y ALT en las fechas donde ambos existen (alineación por máscara, sin intersection)
+        r = self.returns(kind)
+        x = r[:, self._pos[base]]; y = r[:, self._pos[alt]]
+        ok = ~np.isnan(x) & ~np.isnan(y)
+        idx = self.index[ok]
+        return pd.Series(x[ok], index=idx, name=base), pd.Series(y[ok], index=idx, name=alt)
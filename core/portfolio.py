@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Union
+
+from core.cache import memoize
+from core.intraday import infer_periods_per_year
+from core.panel import PricePanel
+from core.profiling import timed
+from core.screen import _one_step_returns
+
+# Cobertura de cartera de mínima varianza: en lugar de un β escalar por par (core.hedge.hedge_shares), una
+# posición en varios ALT se cubre con un vector de acciones de las BASES permitidas que minimiza la varianza
+# del P&L conjunto, usando la covarianza de todos los instrumentos. Con bases correlacionadas (SPY, QQQ,
+# SOXX...) la cobertura par a par se queda sobredimensionada; aquí cada base cubre solo lo que las demás no.
+#
+# En dólares por barra, z = (a; h) con a = exposición de los ALT y h = la de las coberturas:
+#   var = zᵀΣz  ->  h* = −Σ_hh⁻¹ Σ_ha a = B·a
+# B (coberturas × ALT) se factoriza una vez por modelo y conjunto de coberturas: cambiar posiciones o
+# precios es un producto matriz-vector. La covarianza (muestral o EWMA, con huecos por pares y contracción
+# opcional) se memoiza por el contenido de los retornos.
+
+COV_METHODS = ("sample", "ewma")
+
+def _weights(n: int, method: str, halflife: Optional[float]) -> np.ndarray:
+    if method == "sample":
+        return np.ones(n)
+    if method == "ewma":
+        lam = 0.5 ** (1.0 / float(halflife or 60))
+        return lam ** np.arange(n - 1, -1, -1, dtype=np.float64)
+    raise ValueError(f"estimador de covarianza desconocido: {method}")
+
+def _lw_intensity(xc: np.ndarray, m: np.ndarray, s: np.ndarray) -> float:
+    # intensidad óptima de contracción hacia la diagonal (Ledoit-Wolf / Schäfer-Strimmer): suma de las
+    # varianzas estimadas de cada covarianza fuera de la diagonal entre la suma de sus cuadrados.
+    # Var(s_ij) ≈ n/(n−1)³ · Σ_k (x_ki x_kj − w̄_ij)², con Σ_k (x_ki x_kj)² = (X²)ᵀ(X²)
+    n = m.T @ m
+    x2 = xc * xc
+    with np.errstate(invalid="ignore", divide="ignore"):
+        wbar = (xc.T @ xc) / n
+        var_s = n / (n - 1) ** 3 * (x2.T @ x2 - n * wbar * wbar)
+    off = ~np.eye(len(s), dtype=bool) & (n > 2)
+    den = np.nansum(s[off] ** 2)
+    if den <= 0:
+        return 0.0
+    return float(np.clip(np.nansum(var_s[off]) / den, 0.0, 1.0))
+
+@memoize(maxsize=16)
+def covariance(r: np.ndarray, method: str="sample", halflife: Optional[float]=None,
+               shrinkage: Union[None, str, float]="lw") -> dict:
+    # r: (T × K) retornos con NaN en los huecos. Cada par de columnas usa sus filas conjuntas (sumas por
+    # productos matriciales máscara × datos, como core.screen); ponderadas por EWMA si method="ewma".
+    # shrinkage: None, intensidad fija en [0, 1] o "lw" (estimada). Devuelve {"cov", "shrinkage", "n_obs"}.
+    r = np.asarray(r, dtype=np.float64)
+    t, k = r.shape
+    valid = ~np.isnan(r)
+    m = valid.astype(np.float64)
+    w = _weights(t, method, halflife)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mu = np.nansum(r * w[:, None], axis=0) / (m * w[:, None]).sum(axis=0)
+    xc = np.where(valid, r - mu, 0.0)
+    xw = xc * w[:, None]
+    mw = m * w[:, None]
+    wsum = mw.T @ m                        # Σ pesos en las filas conjuntas de (i, j)
+    sx = xw.T @ m                          # Σ w·x_i en las filas donde también hay j
+    sxy = xw.T @ xc
+    n = m.T @ m
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = (sxy - sx * sx.T / wsum) / wsum
+        if method == "sample":
+            cov = cov * n / (n - 1)
+    cov = np.where(n >= 2, cov, np.nan)
+    # pares sin solapamiento: sin información de covarianza, se toman como independientes
+    diag = np.diag(cov).copy()
+    cov = np.where(np.isnan(cov) & ~np.eye(k, dtype=bool), 0.0, cov)
+    lam = _lw_intensity(xc, m, cov) if shrinkage == "lw" else float(shrinkage or 0.0)
+    if lam > 0:
+        cov = (1.0 - lam) * cov + lam * np.diag(diag)
+    # con huecos la matriz por pares puede no ser semidefinida: se recortan los autovalores negativos
+    if k and np.isfinite(cov).all():
+        vals, vecs = np.linalg.eigh(cov)
+        if vals[0] < 0:
+            cov = (vecs * np.maximum(vals, 0.0)) @ vecs.T
+    return {"cov": cov, "shrinkage": lam, "n_obs": n.astype(np.int64)}
+
+class HedgeModel:
+    # covarianza de ALT + coberturas sobre una ventana; `solve` con posiciones nuevas no vuelve a estimarla
+    def __init__(self, alts: Sequence[str], hedges: Sequence[str], cov: np.ndarray, periods_per_year: float,
+                 last_prices: Optional[Mapping[str, float]]=None, shrinkage: float=0.0):
+        self.alts = list(alts); self.hedges = list(hedges)
+        self.tickers = list(dict.fromkeys(self.alts + self.hedges))
+        self._pos = {t: i for i, t in enumerate(self.tickers)}
+        self.cov = cov
+        self.periods_per_year = periods_per_year
+        self.last_prices = dict(last_prices or {})
+        self.shrinkage = shrinkage
+        self._factors: Dict[tuple, np.ndarray] = {}
+
+    def _idx(self, names: Iterable[str]) -> np.ndarray:
+        return np.array([self._pos[t] for t in names], dtype=np.intp)
+
+    def hedge_matrix(self, hedges: Optional[Sequence[str]]=None) -> np.ndarray:
+        # B (coberturas × ALT): dólares de cada cobertura por dólar de cada ALT; una vez por conjunto
+        key = tuple(self.hedges if hedges is None else hedges)
+        b = self._factors.get(key)
+        if b is None:
+            h, a = self._idx(key), self._idx(self.alts)
+            s_hh = self.cov[np.ix_(h, h)]; s_ha = self.cov[np.ix_(h, a)]
+            try:
+                b = -np.linalg.solve(s_hh, s_ha)
+            except np.linalg.LinAlgError:
+                b = -np.linalg.pinv(s_hh) @ s_ha
+            self._factors[key] = b
+        return b
+
+    def prices(self, prices: Optional[Mapping[str, float]], names: Sequence[str]) -> np.ndarray:
+        prices = prices if prices is not None else {}
+        out = np.array([prices.get(t, np.nan) for t in names], dtype=float)
+        fallback = np.array([self.last_prices.get(t, np.nan) for t in names], dtype=float)
+        return np.where(np.isfinite(out) & (out > 0), out, fallback)
+
+    def _exposure(self, positions: Mapping[str, float], prices) -> np.ndarray:
+        unknown = set(positions) - set(self.alts)
+        if unknown:
+            raise ValueError(f"posiciones fuera del modelo: {sorted(unknown)}")
+        q = np.array([float(positions.get(t, 0.0)) for t in self.alts])
+        pa = self.prices(prices, self.alts)
+        return np.where(q != 0, q * pa, 0.0)
+
+    def variance(self, positions: Mapping[str, float], hedge_shares: Mapping[str, float],
+                 prices: Optional[Mapping[str, float]]=None) -> float:
+        # varianza por barra (dólares²) de ALT + cualquier cobertura en acciones (p.ej. la par a par)
+        names = [t for t in hedge_shares if t in self._pos]
+        z = np.zeros(len(self.tickers))
+        z[self._idx(self.alts)] += self._exposure(positions, prices)
+        if names:
+            z[self._idx(names)] += np.array([hedge_shares[t] for t in names], dtype=float) * self.prices(prices, names)
+        return float(z @ self.cov @ z)
+
+    def annualize(self, var: float) -> float:
+        return float(np.sqrt(max(var, 0.0) * self.periods_per_year))
+
+    @timed("portfolio.solve")
+    def solve(self, positions: Mapping[str, float], prices: Optional[Mapping[str, float]]=None,
+              hedges: Optional[Sequence[str]]=None, integer: bool=False) -> dict:
+        # acciones de cada cobertura para las posiciones dadas (acciones de cada ALT; cortos negativos).
+        # `prices`: spot por ticker (si falta, el último cierre de la ventana); `hedges`: subconjunto permitido
+        hedges = list(self.hedges if hedges is None else hedges)
+        a = self._exposure(positions, prices)
+        ph = self.prices(prices, hedges)
+        if np.isnan(a).any() or np.isnan(ph).any():
+            raise ValueError("faltan precios para alguna posición o cobertura")
+        h = self.hedge_matrix(hedges) @ a
+        shares = h / ph
+        hi, ai = self._idx(hedges), self._idx(self.alts)
+        s_hh = self.cov[np.ix_(hi, hi)]; s_ha = self.cov[np.ix_(hi, ai)]
+        if integer:
+            shares = _round_shares(shares, ph, s_hh, s_ha @ a)
+            h = shares * ph
+        var_unhedged = float(a @ self.cov[np.ix_(ai, ai)] @ a)
+        var = var_unhedged + 2.0 * float(h @ (s_ha @ a)) + float(h @ s_hh @ h)
+        table = pd.DataFrame({"shares": shares, "price": ph, "notional": h}, index=pd.Index(hedges, name="hedge"))
+        gross = float(np.abs(a).sum())
+        return {
+            "hedges": table,
+            "unhedged_vol": self.annualize(var_unhedged),
+            "residual_vol": self.annualize(var),
+            "variance_reduction": 1.0 - var / var_unhedged if var_unhedged > 0 else np.nan,
+            "residual_vol_pct": self.annualize(var) / gross if gross > 0 else np.nan,
+            "gross_notional": gross,
+        }
+
+def _round_shares(shares: np.ndarray, price: np.ndarray, s_hh: np.ndarray, s_ha_a: np.ndarray,
+                  max_steps: int=10_000) -> np.ndarray:
+    # redondeo a acciones enteras: se parte del entero más cercano y se mueve ±1 acción la cobertura que
+    # más reduce la varianza mientras alguna la reduzca. Δvar de mover k en δ dólares = 2δ·g_k + δ²·Σ_kk,
+    # con g = Σ_hh·h + Σ_ha·a, que se actualiza en O(K) por paso
+    q = np.round(shares)
+    h = q * price
+    g = s_hh @ h + s_ha_a
+    d = np.diag(s_hh)
+    for _ in range(max_steps):
+        up = 2 * price * g + price ** 2 * d
+        down = -2 * price * g + price ** 2 * d
+        k_up, k_dn = int(np.argmin(up)), int(np.argmin(down))
+        if min(up[k_up], down[k_dn]) >= -1e-12:
+            break
+        k, step = (k_up, 1.0) if up[k_up] <= down[k_dn] else (k_dn, -1.0)
+        q[k] += step
+        g += step * price[k] * s_hh[:, k]
+    return q
+
+@timed()
+def hedge_model(panel: PricePanel, alts: Sequence[str], hedges: Sequence[str], start=None, end=None,
+                method: str="sample", halflife: Optional[float]=None, shrinkage: Union[None, str, float]="lw",
+                periods_per_year: Optional[float]=None) -> HedgeModel:
+    # modelo sobre la ventana [start, end] del panel; los tickers ausentes del panel se descartan
+    alts = [t for t in dict.fromkeys(alts) if t in panel]
+    hedges = [t for t in dict.fromkeys(hedges) if t in panel and t not in alts]
+    tickers = list(dict.fromkeys(alts + hedges))
+    w = panel.select(tickers).window(start, end)
+    r = _one_step_returns(w)
+    est = covariance(np.ascontiguousarray(r), method, halflife, shrinkage)
+    last = {t: float(w[t].iloc[-1]) for t in tickers if len(w[t])}
+    ppy = periods_per_year or infer_periods_per_year(w.index)
+    return HedgeModel(alts, hedges, est["cov"], ppy, last, est["shrinkage"])
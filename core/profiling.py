@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Instrumentación ligera de los caminos calientes: intervalos de tiempo (`span`, `timed`) y contadores
+# (`count`). Desactivada, `span` devuelve un contexto vacío compartido y `timed` solo comprueba un flag,
+# así que el coste es de una llamada por punto instrumentado. Activada (PAIRS_LAB_PROFILE=1 o `enable()`),
+# cada intervalo se guarda en la ejecución en curso del hilo (`run`): una pasada de la app, un fragmento,
+# un bloque del batch. Se conservan las últimas `keep` ejecuciones, exportables a JSON o a formato Chrome
+# trace (chrome://tracing, Perfetto).
+
+class _Noop:
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _Noop()
+
+class Run:
+    __slots__ = ("name", "start_ns", "end_ns", "tid", "spans", "counters")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.tid = threading.get_ident()
+        self.spans: List[tuple] = []           # (nombre, inicio_ns, duración_ns, profundidad, atributos)
+        self.counters: Dict[str, float] = {}
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.perf_counter_ns()) - self.start_ns) / 1e9
+
+    def chrome_events(self, pid: int) -> List[dict]:
+        # eventos "X" (completos) en µs; Chrome/Perfetto reconstruyen el anidamiento por tiempos
+        events = [{"name": self.name, "ph": "X", "ts": self.start_ns / 1e3, "dur": self.duration * 1e6,
+                   "pid": pid, "tid": self.tid, "cat": "run", "args": dict(self.counters)}]
+        for name, t0, dur, _, attrs in self.spans:
+            events.append({"name": name, "ph": "X", "ts": t0 / 1e3, "dur": dur / 1e3,
+                           "pid": pid, "tid": self.tid, "cat": "span", "args": attrs or {}})
+        return events
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "start_us": self.start_ns / 1e3, "duration_ms": self.duration * 1e3,
+                "tid": self.tid, "counters": dict(self.counters),
+                "spans": [{"name": n, "start_us": s / 1e3, "duration_ms": d / 1e6, "depth": depth, **({"args": a} if a else {})}
+                          for n, s, d, depth, a in self.spans]}
+
+class _Span:
+    __slots__ = ("prof", "name", "attrs", "t0", "run")
+
+    def __init__(self, prof: "Profiler", name: str, attrs: dict):
+        self.prof = prof; self.name = name; self.attrs = attrs
+
+    def __enter__(self):
+        local = self.prof._local
+        self.run = getattr(local, "run", None)
+        local.depth = getattr(local, "depth", 0) + 1
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        dur = time.perf_counter_ns() - self.t0
+        local = self.prof._local
+        local.depth -= 1
+        record = (self.name, self.t0, dur, local.depth, self.attrs)
+        if self.run is not None:
+            self.run.spans.append(record)
+        else:
+            self.prof._loose.append(record + (threading.get_ident(),))
+        return False
+
+class Profiler:
+    def __init__(self, enabled: bool=False, keep: int=50):
+        self.enabled = enabled
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.runs: "deque[Run]" = deque(maxlen=keep)
+        self._loose: "deque[tuple]" = deque(maxlen=10_000)   # intervalos fuera de cualquier ejecución
+        self.counters: Dict[str, float] = {}
+
+    def enable(self, on: bool=True):
+        self.enabled = bool(on)
+
+    def clear(self):
+        with self._lock:
+            self.runs.clear(); self._loose.clear(); self.counters.clear()
+
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name, attrs)
+
+    def count(self, name: str, n: float=1):
+        if not self.enabled:
+            return
+        run = getattr(self._local, "run", None)
+        if run is not None:
+            run.counters[name] = run.counters.get(name, 0) + n
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def run(self, name: str):
+        # ejecución raíz del hilo; anidada en otra (p.ej. un fragmento durante la pasada completa) es un intervalo
+        if not self.enabled or getattr(self._local, "run", None) is not None:
+            with self.span(name):
+                yield
+            return
+        self.begin_run(name)
+        try:
+            yield self._local.run
+        finally:
+            self.end_run()
+
+    def begin_run(self, name: str):
+        # como `run`, para código sin un bloque que lo envuelva (el script de la app); cierra la que
+        # hubiera quedado abierta en el hilo (p.ej. una pasada interrumpida por st.stop)
+        if not self.enabled:
+            return
+        self.end_run()
+        self._local.run = Run(name)
+        self._local.depth = 0
+
+    def end_run(self):
+        run = getattr(self._local, "run", None)
+        if run is None:
+            return
+        run.end_ns = time.perf_counter_ns()
+        self._local.run = None
+        with self._lock:
+            self.runs.append(run)
+
+    def last_runs(self, n: Optional[int]=None) -> List[Run]:
+        with self._lock:
+            runs = list(self.runs)
+        return runs[-n:] if n else runs
+
+    def stage_table(self, n: Optional[int]=None) -> pd.DataFrame:
+        # latencia por etapa en las últimas `n` ejecuciones (ms); `total` suma todas las llamadas de la etapa
+        rows: Dict[str, List[float]] = {}
+        for run in self.last_runs(n):
+            rows.setdefault(f"[{run.name}]", []).append(run.duration * 1e3)
+            for name, _, dur, _, _ in run.spans:
+                rows.setdefault(name, []).append(dur / 1e6)
+        out = []
+        for name, v in rows.items():
+            a = np.asarray(v)
+            out.append({"etapa": name, "llamadas": len(a), "total_ms": a.sum(), "media_ms": a.mean(),
+                        "p50_ms": np.percentile(a, 50), "p95_ms": np.percentile(a, 95), "max_ms": a.max()})
+        cols = ["etapa", "llamadas", "total_ms", "media_ms", "p50_ms", "p95_ms", "max_ms"]
+        return pd.DataFrame(out, columns=cols).sort_values("total_ms", ascending=False, ignore_index=True)
+
+    def to_json(self, n: Optional[int]=None) -> str:
+        return json.dumps({"pid": os.getpid(), "counters": dict(self.counters),
+                           "runs": [r.to_dict() for r in self.last_runs(n)]}, indent=1, default=str)
+
+    def chrome_trace(self, n: Optional[int]=None, extra: Optional[List[dict]]=None) -> str:
+        # `extra`: eventos de otros procesos (p.ej. los bloques del batch), cada uno con su pid
+        pid = os.getpid()
+        events = [e for run in self.last_runs(n) for e in run.chrome_events(pid)] + list(extra or [])
+        with self._lock:
+            loose = list(self._loose)
+        for name, t0, dur, _, attrs, tid in loose:
+            events.append({"name": name, "ph": "X", "ts": t0 / 1e3, "dur": dur / 1e3,
+                           "pid": pid, "tid": tid, "cat": "span", "args": attrs or {}})
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str)
+
+PROFILER = Profiler(enabled=os.environ.get("PAIRS_LAB_PROFILE", "") not in ("", "0"))
+
+def _after_fork():
+    # un proceso hijo (pool del batch, Monte Carlo) empieza sin la ejecución abierta ni el historial del padre
+    PROFILER._local = threading.local()
+    PROFILER._lock = threading.Lock()
+    PROFILER.runs.clear(); PROFILER._loose.clear(); PROFILER.counters.clear()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+def enable(on: bool=True):
+    PROFILER.enable(on)
+
+def enabled() -> bool:
+    return PROFILER.enabled
+
+def span(name: str, **attrs):
+    return PROFILER.span(name, **attrs)
+
+def count(name: str, n: float=1):
+    PROFILER.count(name, n)
+
+def run(name: str):
+    return PROFILER.run(name)
+
+def begin_run(name: str):
+    PROFILER.begin_run(name)
+
+def end_run():
+    PROFILER.end_run()
+
+def traced_run(name: str):
+    # decorador: cada llamada es una ejecución propia (o un intervalo si ya hay una abierta en el hilo);
+    # para los fragmentos de la app, que se re-ejecutan solos
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            with PROFILER.run(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def timed(name: Optional[str]=None):
+    # decorador: intervalo con el nombre dado (por defecto módulo.función) en cada llamada
+    def deco(fn):
+        label = name or f"{fn.__module__.split('.')[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            with _Span(PROFILER, label, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def memory() -> dict:
+    # RSS actual y pico del proceso en MB (/proc en Linux; `resource` como alternativa)
+    out = {"rss_mb": np.nan, "peak_mb": np.nan}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    out["rss_mb"] = int(line.split()[1]) / 1024
+                elif line.startswith("VmHWM:"):
+                    out["peak_mb"] = int(line.split()[1]) / 1024
+    except OSError:
+        try:
+            import resource, sys
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            out["peak_mb"] = peak / (2**20 if sys.platform == "darwin" else 1024)
+        except Exception:
+            pass
+    return out
@@ -0,0 +1,160 @@
+import time
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+
+from core.store import CSVSource, extract_series
+
+class YFinanceQuotes:
+    # último cierre de muchos tickers en una sola descarga
+    def __init__(self, period: str="5d"):
+        self.period = period
+
+    def last_prices(self, tickers: List[str]) -> Dict[str, float]:
+        import yfinance as yf
+        data = yf.download(tickers=tickers, period=self.period, auto_adjust=True, progress=False,
+                           group_by="ticker", threads=True)
+        out = {}
+        for t in tickers:
+            s = extract_series(data, t, "Close").dropna()
+            if not s.empty:
+                out[t] = float(s.iloc[-1])
+        return out
+
+class SourceQuotes:
+    # último cierre disponible en una fuente de históricos (p.ej. CSVSource) en los últimos `days` días
+    def __init__(self, source, days: int=10):
+        self.source = source
+        self.days = days
+
+    def last_prices(self, tickers: List[str]) -> Dict[str, float]:
+        end = pd.Timestamp.today().normalize()
+        data = self.source.fetch(list(tickers), end - pd.Timedelta(days=self.days), end)
+        out = {}
+        for t, df in data.items():
+            s = df["Close"].dropna() if "Close" in df else pd.Series(dtype=float)
+            if not s.empty:
+                out[t] = float(s.iloc[-1])
+        return out
+
+class StaticQuotes:
+    # precios fijos en memoria, para pruebas sin red
+    def __init__(self, prices: Optional[Dict[str, float]]=None):
+        self.prices = dict(prices or {})
+        self.calls = 0
+
+    def set(self, ticker: str, price: float):
+        self.prices[ticker] = float(price)
+
+    def last_prices(self, tickers: List[str]) -> Dict[str, float]:
+        self.calls += 1
+        return {t: self.prices[t] for t in tickers if t in self.prices}
+
+def quotes_from_spec(spec: Optional[str]):
+    # misma convención que `source_from_spec`: "csv:<directorio>" o yfinance
+    if spec and spec.startswith("csv:"):
+        return SourceQuotes(CSVSource(spec[4:]))
+    return YFinanceQuotes()
+
+class QuoteService:
+    # Caché de precios spot con TTL corto. Un hilo en segundo plano refresca en lote los tickers
+    # observados; las lecturas devuelven lo que haya en caché sin esperar a la red (salvo, si se pide,
+    # la primera vez que se ve un ticker).
+    def __init__(self, backend, ttl: float=60.0, refresh_interval: float=30.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self._quotes: Dict[str, tuple] = {}
+        self._watch: set = set()
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._fetched = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self.n_fetches = 0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> "QuoteService":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="quote-refresh", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set(); self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            with self._lock:
+                due = [t for t in self._watch if self._age(t) >= self.ttl]
+            if due:
+                self.refresh(due)
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+
+    def _age(self, ticker: str) -> float:
+        q = self._quotes.get(ticker)
+        return time.time() - q[1] if q else np.inf
+
+    def refresh(self, tickers: Iterable[str]) -> Dict[str, float]:
+        # descarga síncrona en lote; ante un error se conservan los precios anteriores
+        tickers = sorted(set(tickers))
+        if not tickers:
+            return {}
+        with self._fetch_lock:
+            try:
+                prices = self.backend.last_prices(tickers)
+                err = None
+            except Exception as e:
+                prices, err = {}, f"{type(e).__name__}: {e}"
+            now = time.time()
+            with self._lock:
+                self.n_fetches += 1
+                self.last_error = err
+                for t, p in prices.items():
+                    self._quotes[t] = (float(p), now)
+                # también se marcan como intentados los que no devolvieron precio, para no bloquear lectores
+                for t in tickers:
+                    self._quotes.setdefault(t, (np.nan, now))
+                self._fetched.notify_all()
+        return prices
+
+    def watch(self, tickers: Iterable[str]):
+        with self._lock:
+            new = set(tickers) - self._watch
+            self._watch |= new
+        if new:
+            self._wake.set()
+
+    def get(self, tickers: Iterable[str], timeout: Optional[float]=None) -> Dict[str, float]:
+        # precios en caché (NaN si aún no hay); con `timeout`, espera solo por tickers nunca consultados
+        tickers = list(tickers)
+        self.watch(tickers)
+        with self._lock:
+            if timeout:
+                deadline = time.time() + timeout
+                while any(t not in self._quotes for t in tickers):
+                    left = deadline - time.time()
+                    if left <= 0 or (self._thread is None or not self._thread.is_alive()):
+                        break
+                    self._fetched.wait(left)
+            missing = [t for t in tickers if t not in self._quotes]
+        if missing and timeout and (self._thread is None or not self._thread.is_alive()):
+            self.refresh(missing)
+        with self._lock:
+            return {t: self._quotes[t][0] if t in self._quotes else np.nan for t in tickers}
+
+    def ages(self, tickers: Iterable[str]) -> Dict[str, float]:
+        with self._lock:
+            return {t: self._age(t) for t in tickers}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"tickers": len(self._quotes), "watched": len(self._watch), "fetches": self.n_fetches,
+                    "last_error": self.last_error,
+                    "oldest_s": max((self._age(t) for t in self._quotes), default=np.nan)}
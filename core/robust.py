@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+from typing import Optional
+from core.profiling import timed
+
+EXACT_MAX_N = 2000
+
+def _pairs_total(n: int) -> int:
+    return n * (n - 1) // 2
+
+def _tied_pairs(*keys: np.ndarray) -> int:
+    # pares con claves idénticas (p.ej. misma x) — no definen pendiente
+    if len(keys[0]) < 2:
+        return 0
+    _, counts = np.unique(np.column_stack(keys), axis=0, return_counts=True)
+    return int((counts * (counts - 1) // 2).sum())
+
+def _count_ascents(r: np.ndarray) -> int:
+    # nº de pares i<j con r_i < r_j (r: rangos enteros); merge-sort por niveles con searchsorted, O(n log² n)
+    n = len(r)
+    pos = np.arange(n)
+    total = 0
+    s = 1
+    while s < n:
+        block = pos // (2 * s)
+        left = (pos % (2 * s)) < s
+        key = block * n + r
+        lk = np.sort(key[left])
+        rk = key[~left]; rb = block[~left]
+        total += int((np.searchsorted(lk, rk, "left") - np.searchsorted(lk, rb * n, "left")).sum())
+        s *= 2
+    return total
+
+def count_slopes_leq(x: np.ndarray, y: np.ndarray, t: float, ties_xy: Optional[int]=None) -> int:
+    # nº de pendientes (x_i != x_j) <= t; `x`, `y` ordenados por (x, y)
+    u = y - t * x
+    _, ranks = np.unique(u, return_inverse=True)
+    if ties_xy is None:
+        ties_xy = _tied_pairs(x, y)
+    return _pairs_total(len(x)) - _count_ascents(ranks.ravel()) - ties_xy
+
+def _kth_slope(x, y, k, lo, hi, tol, ties_xy):
+    # menor t con count(t) >= k+1, por bisección dentro de (lo, hi]
+    while hi - lo > tol * max(1.0, abs(hi)):
+        mid = 0.5 * (lo + hi)
+        if count_slopes_leq(x, y, mid, ties_xy) >= k + 1:
+            hi = mid
+        else:
+            lo = mid
+    return 0.5 * (lo + hi)
+
+def _pairwise_slopes(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    i, j = np.triu_indices(len(x), 1)
+    dx = x[j] - x[i]
+    ok = dx != 0
+    return (y[j][ok] - y[i][ok]) / dx[ok]
+
+@timed()
+def theil_sen_slope(x: np.ndarray, y: np.ndarray, exact_max_n: int=EXACT_MAX_N, tol: float=1e-10,
+                    sample_size: int=20000, seed: Optional[int]=0) -> float:
+    # Mediana clásica de pendientes por pares. Exacta si n <= exact_max_n; si no, selección por conteo
+    # de inversiones (O(n log² n) por paso) con error absoluto <= tol·max(1, |β|). El muestreo aleatorio
+    # solo acota el intervalo inicial: afecta a la velocidad, no al resultado.
+    x = np.asarray(x, dtype=float); y = np.asarray(y, dtype=float)
+    ok = np.isfinite(x) & np.isfinite(y)
+    x, y = x[ok], y[ok]
+    n = len(x)
+    if n < 2:
+        return np.nan
+    if n <= exact_max_n:
+        slopes = _pairwise_slopes(x, y)
+        return float(np.median(slopes)) if slopes.size else np.nan
+
+    order = np.lexsort((y, x))
+    x, y = x[order], y[order]
+    n_valid = _pairs_total(n) - _tied_pairs(x)
+    if n_valid == 0:
+        return np.nan
+    ties_xy = _tied_pairs(x, y)
+
+    # cotas globales: las pendientes extremas están entre puntos consecutivos en x
+    dx = np.diff(x); okd = dx != 0
+    adj = np.diff(y)[okd] / dx[okd]
+    gmin, gmax = float(adj.min()), float(adj.max())
+
+    rng = np.random.default_rng(seed)
+    i = rng.integers(0, n, sample_size); j = rng.integers(0, n, sample_size)
+    keep = x[i] != x[j]
+    sample = np.sort((y[j][keep] - y[i][keep]) / (x[j][keep] - x[i][keep]))
+
+    ks = [n_valid // 2] if n_valid % 2 else [n_valid // 2 - 1, n_valid // 2]
+    values = []
+    for k in ks:
+        q = (k + 0.5) / n_valid
+        margin = 4.0 * np.sqrt(q * (1 - q) / max(len(sample), 1)) + 1.0 / max(len(sample), 1)
+        lo = float(np.quantile(sample, max(q - margin, 0.0))) if len(sample) else gmin
+        hi = float(np.quantile(sample, min(q + margin, 1.0))) if len(sample) else gmax
+        if count_slopes_leq(x, y, lo, ties_xy) >= k + 1:
+            lo = gmin - 1.0
+        if count_slopes_leq(x, y, hi, ties_xy) < k + 1:
+            hi = gmax
+        values.append(_kth_slope(x, y, k, lo, hi, tol, ties_xy))
+    return float(np.mean(values))
+
+@timed()
+def rolling_theil_sen(x: np.ndarray, y: np.ndarray, window: int, max_elements: int=2_000_000,
+                      ends: Optional[np.ndarray]=None) -> np.ndarray:
+    # β Theil–Sen exacto en cada ventana; pendientes de todas las ventanas de un bloque en una sola
+    # matriz (bloque x pares) para acotar memoria. Resultado alineado con el final de cada ventana;
+    # con `ends` solo se evalúan las ventanas que terminan en esas posiciones.
+    x = np.asarray(x, dtype=float); y = np.asarray(y, dtype=float)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < window or window < 2:
+        return out
+    ii, jj = np.triu_indices(window, 1)
+    starts = np.arange(n - window + 1) if ends is None else np.asarray(ends, dtype=int) - window + 1
+    starts = starts[(starts >= 0) & (starts <= n - window)]
+    chunk = max(1, max_elements // len(ii))
+    for c in range(0, len(starts), chunk):
+        s = starts[c:c + chunk][:, None]
+        dx = x[s + jj] - x[s + ii]
+        dy = y[s + jj] - y[s + ii]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            slopes = np.where(dx != 0, dy / dx, np.nan)
+        if np.isnan(slopes).any():
+            med = np.nanmedian(slopes, axis=1)
+        else:
+            med = np.median(slopes, axis=1)
+        out[s[:, 0] + window - 1] = med
+    return out
+
+def rolling_beta_theilsen(x_ret: pd.Series, y_ret: pd.Series, window: int=60) -> pd.Series:
+    df = pd.concat([x_ret, y_ret], axis=1).dropna()
+    df.columns = ["x","y"]
+    betas = rolling_theil_sen(df["x"].values, df["y"].values, window)
+    return pd.Series(betas, index=df.index, name="beta_rolling_robust").iloc[window-1:]
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from core.panel import PricePanel
+from core.intraday import session_returns
+from core.profiling import timed
+
+ArrayLike = Union[np.ndarray, pd.Series, pd.DataFrame]
+
+@dataclass
+class RollingOLS:
+    beta: np.ndarray
+    alpha: np.ndarray
+    r2: np.ndarray
+    resid_std: np.ndarray
+    n_obs: np.ndarray
+
+def _as_2d(a: ArrayLike) -> np.ndarray:
+    arr = np.asarray(a, dtype=float)
+    return arr[:, None] if arr.ndim == 1 else arr
+
+def _compact_cumsum(values: np.ndarray, valid: np.ndarray, cnt: np.ndarray) -> np.ndarray:
+    # K[c, j] = suma acumulada de la columna j hasta su c-ésima observación válida
+    n, m = values.shape
+    csum = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    K = np.zeros((n + 1, m))
+    rows, cols = np.nonzero(valid)
+    K[cnt[rows, cols], cols] = csum[rows, cols]
+    return K
+
+def window_sums(values: Sequence[np.ndarray], valid: np.ndarray, window: int) -> Tuple[List[np.ndarray], np.ndarray]:
+    # Sumas sobre las últimas `window` observaciones válidas de cada columna (filas inválidas se saltan,
+    # igual que `dropna` + ventana posicional). Resultado NaN donde la fila no es válida o no hay historia.
+    cnt = np.cumsum(valid, axis=0)
+    ready = valid & (cnt >= window)
+    rows, cols = np.nonzero(ready)
+    lag = cnt[rows, cols] - window
+    out = []
+    for v in values:
+        K = _compact_cumsum(v, valid, cnt)
+        s = np.full(v.shape, np.nan)
+        s[rows, cols] = K[cnt[rows, cols], cols] - K[lag, cols]
+        out.append(s)
+    return out, ready
+
+def rolling_ols_arrays(x: ArrayLike, y: ArrayLike, window: int) -> RollingOLS:
+    X = _as_2d(x); Y = _as_2d(y)
+    if X.shape[1] == 1 and Y.shape[1] > 1:
+        X = np.repeat(X, Y.shape[1], axis=1)
+    if X.shape != Y.shape:
+        raise ValueError(f"x e y con formas incompatibles: {X.shape} vs {Y.shape}")
+    valid = np.isfinite(X) & np.isfinite(Y)
+
+    # centrar por la media de cada columna reduce la cancelación en las sumas acumuladas
+    n_valid = np.maximum(valid.sum(axis=0), 1)
+    mx = np.where(valid, X, 0.0).sum(axis=0) / n_valid
+    my = np.where(valid, Y, 0.0).sum(axis=0) / n_valid
+    xc = X - mx; yc = Y - my
+
+    (sx, sy, sxx, sxy, syy), ready = window_sums([xc, yc, xc * xc, xc * yc, yc * yc], valid, window)
+    w = float(window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cxx = sxx - sx * sx / w
+        cxy = sxy - sx * sy / w
+        cyy = syy - sy * sy / w
+        cxx = np.where(cxx > 0, cxx, np.nan)
+        beta = cxy / cxx
+        alpha = (sy - beta * sx) / w + my - beta * mx
+        ss_res = np.maximum(cyy - beta * cxy, 0.0)
+        r2 = np.where(cyy > 0, 1.0 - ss_res / cyy, np.nan)
+        resid_std = np.sqrt(ss_res / (w - 2)) if window > 2 else np.full(X.shape, np.nan)
+    n_obs = np.where(ready, window, 0)
+    return RollingOLS(beta=beta, alpha=alpha, r2=r2, resid_std=resid_std, n_obs=n_obs)
+
+@timed()
+def rolling_ols(x_ret: pd.Series, y_ret: pd.Series, window: int=60) -> pd.DataFrame:
+    df = pd.concat([x_ret, y_ret], axis=1).dropna()
+    df.columns = ["x","y"]
+    if len(df) < window:
+        return pd.DataFrame(columns=["beta","alpha","r2","resid_std"], dtype=float)
+    res = rolling_ols_arrays(df["x"].values, df["y"].values, window)
+    out = pd.DataFrame({"beta": res.beta[:, 0], "alpha": res.alpha[:, 0],
+                        "r2": res.r2[:, 0], "resid_std": res.resid_std[:, 0]}, index=df.index)
+    return out.iloc[window-1:]
+
+@timed()
+def pair_panels(close: Union[Dict[str, pd.Series], pd.DataFrame, PricePanel], pairs: List[dict],
+                start: Optional[str]=None, end: Optional[str]=None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # Paneles de retornos BASE y ALT (una columna por par, etiqueta "BASE→ALT"), con los mismos
+    # retornos por ticker que usa la app antes de `rolling_beta`; las bases compartidas se calculan una vez.
+    if isinstance(close, PricePanel):
+        # retornos precalculados del panel: se seleccionan columnas sobre el índice común, sin alinear series
+        w = close.window(start, end)
+        pairs = [p for p in pairs if p["base"] in w and p["alt"] in w]
+        labels = [f'{p["base"]}→{p["alt"]}' for p in pairs]
+        r = w.returns()
+        pos = {t: j for j, t in enumerate(w.tickers)}
+        x = r[:, [pos[p["base"]] for p in pairs]]; y = r[:, [pos[p["alt"]] for p in pairs]]
+        keep = ~np.isnan(x).all(axis=1)
+        return (pd.DataFrame(x[keep], index=w.index[keep], columns=labels),
+                pd.DataFrame(y[keep], index=w.index[keep], columns=labels))
+    rets = {}
+    def _ret(t):
+        if t not in rets:
+            rets[t] = session_returns(close[t].loc[start:end].dropna())
+        return rets[t]
+    cols_x = {}; cols_y = {}
+    for p in pairs:
+        base, alt = p["base"], p["alt"]
+        if base not in close or alt not in close:
+            continue
+        label = f"{base}→{alt}"
+        cols_x[label] = _ret(base)
+        cols_y[label] = _ret(alt)
+    x_panel = pd.DataFrame(cols_x)
+    y_panel = pd.DataFrame(cols_y).reindex(index=x_panel.index)
+    return x_panel, y_panel
+
+@timed()
+def rolling_beta_panel(x_panel: pd.DataFrame, y_panel: pd.DataFrame, window: int=60,
+                       field: str="beta") -> pd.DataFrame:
+    y_panel = y_panel.reindex(index=x_panel.index, columns=x_panel.columns)
+    res = rolling_ols_arrays(x_panel.values, y_panel.values, window)
+    return pd.DataFrame(getattr(res, field), index=x_panel.index, columns=x_panel.columns)
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Union
+
+from core.panel import PricePanel
+from core.profiling import timed
+
+# Cribado del universo: β, correlación y R² de cada producto apalancado (M) contra cada base candidata (N)
+# a la vez. Con huecos, cada par (producto, base) usa sus filas conjuntas: las sumas n, Σx, Σy, Σx², Σy², Σxy
+# de todos los pares salen de productos matriciales máscara × datos (BLAS), sin M·N regresiones sueltas.
+# Sin huecos basta un único producto Yᵀ·X sobre datos centrados.
+
+@dataclass
+class ScreenResult:
+    bases: List[str]
+    products: List[str]
+    beta: np.ndarray      # (productos × bases)
+    corr: np.ndarray
+    r2: np.ndarray
+    n_obs: np.ndarray
+
+    def frame(self, field: str="beta") -> pd.DataFrame:
+        return pd.DataFrame(getattr(self, field), index=pd.Index(self.products, name="alt"),
+                            columns=pd.Index(self.bases, name="base"))
+
+    def get(self, field: str, alt: str, base: str) -> float:
+        return float(getattr(self, field)[self.products.index(alt), self.bases.index(base)])
+
+def screen_arrays(x: np.ndarray, y: np.ndarray, min_obs: int=20, dtype=np.float64) -> dict:
+    # x: (T × N) retornos de bases, y: (T × M) de productos, NaN donde no hay dato
+    x = np.asarray(x, dtype=dtype); y = np.asarray(y, dtype=dtype)
+    vx = ~np.isnan(x); vy = ~np.isnan(y)
+    # centrar por columna (sobre sus filas válidas) no cambia β/corr y evita la cancelación de Σx² − (Σx)²/n
+    with np.errstate(invalid="ignore"):
+        xc = np.where(vx, x - np.nanmean(np.where(vx, x, np.nan), axis=0), 0.0).astype(dtype, copy=False)
+        yc = np.where(vy, y - np.nanmean(np.where(vy, y, np.nan), axis=0), 0.0).astype(dtype, copy=False)
+    if vx.all() and vy.all():
+        n = np.full((y.shape[1], x.shape[1]), float(len(x)))
+        sxy = yc.T @ xc
+        sxx = np.broadcast_to((xc * xc).sum(axis=0), n.shape)
+        syy = np.broadcast_to((yc * yc).sum(axis=0)[:, None], n.shape)
+        cxy, cxx, cyy = sxy, sxx, syy
+    else:
+        mx = vx.astype(dtype); my = vy.astype(dtype)
+        n = my.T @ mx
+        sx = my.T @ xc; sy = yc.T @ mx
+        sxx = my.T @ (xc * xc); syy = (yc * yc).T @ mx
+        sxy = yc.T @ xc
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cxy = sxy - sx * sy / n
+            cxx = sxx - sx * sx / n
+            cyy = syy - sy * sy / n
+    ok = n >= min_obs
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = np.where(ok & (cxx > 0), cxy / cxx, np.nan)
+        corr = np.where(ok & (cxx > 0) & (cyy > 0), cxy / np.sqrt(cxx * cyy), np.nan)
+    return {"beta": beta, "corr": corr, "r2": corr * corr, "n_obs": n.astype(np.int64)}
+
+def _one_step_returns(panel: PricePanel) -> np.ndarray:
+    # retornos solo donde el ticker también cotizó en la fila anterior del índice común: así dos tickers con
+    # huecos distintos comparan siempre retornos del mismo horizonte
+    r = panel.returns().copy()
+    ok = panel.valid()
+    step = np.zeros_like(ok)
+    step[1:] = ok[1:] & ok[:-1]
+    r[~step] = np.nan
+    return r
+
+@timed()
+def screen(data: Union[PricePanel, pd.DataFrame], bases: Sequence[str], products: Sequence[str],
+           start=None, end=None, min_obs: int=20, dtype=np.float64) -> ScreenResult:
+    # `data`: PricePanel (se usan sus retornos) o DataFrame de retornos ya alineados (fechas × tickers)
+    if isinstance(data, PricePanel):
+        w = data.window(start, end)
+        r = _one_step_returns(w)
+        pos = {t: j for j, t in enumerate(w.tickers)}
+        bases = [b for b in bases if b in pos]; products = [p for p in products if p in pos]
+        x = r[:, [pos[b] for b in bases]]; y = r[:, [pos[p] for p in products]]
+    else:
+        data = data.loc[start:end]
+        bases = [b for b in bases if b in data.columns]; products = [p for p in products if p in data.columns]
+        x = data[bases].to_numpy(float); y = data[products].to_numpy(float)
+    m = screen_arrays(x, y, min_obs=min_obs, dtype=dtype)
+    return ScreenResult(list(bases), list(products), **m)
+
+def best_bases(res: ScreenResult, min_r2: float=0.0) -> pd.DataFrame:
+    # mejor base de cada producto (máximo R²), β como apalancamiento implícito, y la segunda mejor para ver
+    # si la elección es clara
+    r2 = np.where(np.isnan(res.r2), -np.inf, res.r2)
+    m, k = r2.shape
+    cols = ["alt", "best_base", "implied_leverage", "corr", "r2", "n_obs", "runner_up", "r2_runner_up"]
+    if m == 0 or k == 0:
+        return pd.DataFrame(columns=cols)
+    rows = np.arange(m)
+    order = np.argsort(-r2, axis=1)
+    best = order[:, 0]
+    second = order[:, 1] if k > 1 else np.full(m, -1)
+    found = np.isfinite(r2[rows, best]) & (r2[rows, best] >= min_r2)
+    bases = np.asarray(res.bases, dtype=object)
+    out = pd.DataFrame({
+        "alt": res.products,
+        "best_base": np.where(found, bases[best], None),
+        "implied_leverage": np.where(found, res.beta[rows, best], np.nan),
+        "corr": np.where(found, res.corr[rows, best], np.nan),
+        "r2": np.where(found, res.r2[rows, best], np.nan),
+        "n_obs": np.where(found, res.n_obs[rows, best], 0),
+    })
+    has2 = found & (second >= 0)
+    s = np.maximum(second, 0)
+    out["runner_up"] = np.where(has2 & np.isfinite(r2[rows, s]), bases[s], None)
+    out["r2_runner_up"] = np.where(has2, res.r2[rows, s], np.nan)
+    return out[cols]
+
+def flag_mismatches(res: ScreenResult, pairs: Iterable[dict], min_r2: float=0.0, lev_tol: float=0.15,
+                    r2_margin: float=0.05) -> pd.DataFrame:
+    # compara la mejor base y el β con lo declarado (`base`, `target_ratio`) en cada par:
+    #   base      la mejor base no es la declarada y la supera en R² por más de `r2_margin`
+    #   signo     el β contra la base declarada tiene el signo contrario a target_ratio
+    #   leverage  |β − target| > lev_tol·|target| contra la base declarada
+    #   sin_datos la base o el producto declarados no tienen observaciones suficientes
+    best = best_bases(res, min_r2).set_index("alt")
+    rows = []
+    for p in pairs:
+        alt, base, target = p["alt"], p["base"], p.get("target_ratio")
+        if alt not in best.index:
+            continue
+        b = best.loc[alt]
+        known = base in res.bases
+        beta_d = res.get("beta", alt, base) if known else np.nan
+        r2_d = res.get("r2", alt, base) if known else np.nan
+        flags = []
+        if np.isnan(beta_d):
+            flags.append("sin_datos")
+        else:
+            if b["best_base"] is not None and b["best_base"] != base and b["r2"] - r2_d > r2_margin:
+                flags.append("base")
+            if target is not None and pd.notna(target) and target != 0:
+                if np.sign(beta_d) != np.sign(target):
+                    flags.append("signo")
+                elif abs(beta_d - target) > lev_tol * abs(target):
+                    flags.append("leverage")
+        rows.append({"alt": alt, "declared_base": base, "target_ratio": target, "beta_declared": beta_d,
+                     "r2_declared": r2_d, **b.to_dict(), "flags": ",".join(flags), "mismatch": bool(flags)})
+    cols = ["alt", "declared_base", "target_ratio", "beta_declared", "r2_declared", "best_base",
+            "implied_leverage", "corr", "r2", "n_obs", "runner_up", "r2_runner_up", "flags", "mismatch"]
+    return pd.DataFrame(rows, columns=cols)
+
+def screen_universe(panel: PricePanel, pairs: List[dict], bases: Optional[Sequence[str]]=None,
+                    products: Optional[Sequence[str]]=None, start=None, end=None, min_obs: int=20,
+                    **flag_kwargs) -> pd.DataFrame:
+    # atajo: candidatas = todas las bases declaradas (más `bases`), productos = todos los ALT (más `products`)
+    cand = list(dict.fromkeys([p["base"] for p in pairs] + list(bases or [])))
+    prods = list(dict.fromkeys([p["alt"] for p in pairs] + list(products or [])))
+    res = screen(panel, cand, prods, start, end, min_obs=min_obs)
+    flagged = flag_mismatches(res, pairs, **flag_kwargs)
+    undeclared = best_bases(res, flag_kwargs.get("min_r2", 0.0))
+    undeclared = undeclared[~undeclared["alt"].isin(flagged["alt"])]
+    return pd.concat([flagged, undeclared], ignore_index=True) if len(undeclared) else flagged
@@ -0,0 +1,302 @@
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.panel import PricePanel
+from core.intraday import INTERVAL_MINUTES, YF_MAX_AGE, YF_MAX_SPAN, is_intraday, regular_session
+from core.profiling import count, span, timed
+
+FIELDS = ("Close", "Volume")
+# cada petición se amplía unos días por ambos lados para solapar con barras ya guardadas: si su cierre no
+# coincide (ajuste por split o dividendo posterior) se vuelve a descargar toda la historia del ticker
+OVERLAP_PAD = pd.Timedelta(days=5)
+ADJUST_RTOL = 1e-4
+
+def extract_series(data, ticker, field):
+    try:
+        if isinstance(data.columns, pd.MultiIndex):
+            return data[ticker][field].rename(ticker)
+        else:
+            return data[field].rename(ticker)
+    except Exception:
+        return pd.Series(dtype=float, name=ticker)
+
+def _naive_index(idx: pd.Index) -> pd.DatetimeIndex:
+    idx = pd.DatetimeIndex(idx)
+    return idx.tz_localize(None) if idx.tz is not None else idx
+
+class YFinanceSource:
+    def __init__(self, interval: str="1d"):
+        self.interval = interval
+
+    def fetch(self, tickers: List[str], start: pd.Timestamp, end: pd.Timestamp) -> Dict[str, pd.DataFrame]:
+        # yfinance limita el rango por petición en intradía (p.ej. 7 días con 1m): se trocea
+        if self.interval not in YF_MAX_SPAN:
+            return self._download(tickers, pd.Timestamp(start), pd.Timestamp(end))
+        span = pd.Timedelta(days=YF_MAX_SPAN[self.interval])
+        parts: Dict[str, List[pd.DataFrame]] = {t: [] for t in tickers}
+        lo = pd.Timestamp(start)
+        while lo <= end:
+            hi = min(end, lo + span - pd.Timedelta(days=1))
+            for t, df in self._download(tickers, lo, hi).items():
+                parts[t].append(df)
+            lo = hi + pd.Timedelta(days=1)
+        return {t: pd.concat(p) if p else pd.DataFrame(columns=list(FIELDS), dtype=float) for t, p in parts.items()}
+
+    def _download(self, tickers: List[str], start: pd.Timestamp, end: pd.Timestamp) -> Dict[str, pd.DataFrame]:
+        import yfinance as yf
+        with span("yf.download", tickers=len(tickers), interval=self.interval):
+            data = yf.download(
+                tickers=tickers, start=start, end=end + pd.Timedelta(days=1),
+                auto_adjust=True, progress=False, group_by="ticker", threads=True, interval=self.interval
+            )
+        out = {}
+        with span("extract_series", tickers=len(tickers)):
+            for t in tickers:
+                df = pd.concat([extract_series(data, t, f).rename(f) for f in FIELDS], axis=1)
+                out[t] = df.dropna(subset=["Close"])
+        return out
+
+class CSVSource:
+    # Un CSV por ticker (<dir>/<TICKER>.csv) con columnas Date, Close, Volume
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def fetch(self, tickers: List[str], start: pd.Timestamp, end: pd.Timestamp) -> Dict[str, pd.DataFrame]:
+        out = {}
+        for t in tickers:
+            path = os.path.join(self.directory, f"{t}.csv")
+            if not os.path.exists(path):
+                out[t] = pd.DataFrame(columns=list(FIELDS), dtype=float)
+                continue
+            df = pd.read_csv(path, index_col=0, parse_dates=True)
+            df.index = _naive_index(df.index)
+            out[t] = df.sort_index().loc[start:end + pd.Timedelta(days=1) - pd.Timedelta(1), list(FIELDS)]
+        return out
+
+def source_from_spec(spec: Optional[str], interval: str="1d"):
+    # "yfinance" (por defecto) o "csv:<directorio>"
+    if spec and spec.startswith("csv:"):
+        return CSVSource(spec[4:])
+    return YFinanceSource(interval=interval)
+
+class PriceStore:
+    # Almacén local por ticker: <root>/<TICKER>.dates.npy (int64 ns) y <TICKER>.bars.npy (Close, Volume),
+    # leídos con mmap. `_coverage.json` guarda, por ticker, los intervalos de fechas ya consultados a la
+    # fuente (ordenados y disjuntos; una descarga de ventanas separadas deja el hueco entre ellas pendiente).
+    # Los intervalos intradía viven en <root>/<intervalo>/ y se guardan en float32 por defecto
+    # (100–400× más barras que en diario; el precio conserva ~7 cifras significativas).
+    def __init__(self, root: str, source=None, interval: str="1d", dtype=None):
+        is_intraday(interval)
+        self.interval = interval
+        self.dtype = np.dtype(dtype or (np.float32 if INTERVAL_MINUTES[interval] else np.float64))
+        root = os.path.join(root, interval) if INTERVAL_MINUTES[interval] else root
+        self.root = root
+        self.source = source if source is not None else YFinanceSource(interval)
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._meta_path = os.path.join(root, "_coverage.json")
+        self._coverage = self._read_meta()
+
+    def _read_meta(self) -> Dict[str, Dict[str, str]]:
+        if not os.path.exists(self._meta_path):
+            return {}
+        with open(self._meta_path) as f:
+            return json.load(f)
+
+    def _write_meta(self):
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._coverage, f, indent=0, sort_keys=True)
+        os.replace(tmp, self._meta_path)
+
+    def _paths(self, ticker: str) -> Tuple[str, str]:
+        safe = ticker.replace("/", "_")
+        return (os.path.join(self.root, f"{safe}.dates.npy"), os.path.join(self.root, f"{safe}.bars.npy"))
+
+    def _read(self, ticker: str, mmap: bool=True) -> Tuple[np.ndarray, np.ndarray]:
+        dpath, bpath = self._paths(ticker)
+        if not os.path.exists(dpath):
+            return np.empty(0, dtype=np.int64), np.empty((0, len(FIELDS)), dtype=self.dtype)
+        mode = "r" if mmap else None
+        return np.load(dpath, mmap_mode=mode), np.load(bpath, mmap_mode=mode)
+
+    def _merge(self, ticker: str, new: pd.DataFrame, replace: bool=False) -> bool:
+        # añade `new` a lo guardado (o lo sustituye con `replace`). Devuelve True, sin escribir nada, si en
+        # las fechas comunes ya cubiertas el cierre nuevo difiere del guardado: la historia se ajustó de nuevo
+        # en la fuente. Las barras guardadas sin cubrir (la de hoy, quizá parcial) se sobrescriben sin más
+        if new is None or new.empty:
+            return False
+        new = new.copy()
+        new.index = _naive_index(new.index)
+        new = new[list(FIELDS)].astype(float)
+        dates, bars = self._read(ticker, mmap=False)
+        if replace:
+            dates, bars = dates[:0], bars[:0]
+        old = pd.DataFrame(bars, index=pd.DatetimeIndex(dates.view("datetime64[ns]")), columns=list(FIELDS))
+        common = old.index.intersection(new.index)
+        common = common[self._covered(ticker, common)]
+        if len(common):
+            a = old.loc[common, "Close"].to_numpy(float)
+            b = new.loc[common, "Close"].to_numpy(float)
+            ok = np.isfinite(a) & np.isfinite(b) & (a != 0)
+            if ok.any() and np.max(np.abs(b[ok] / a[ok] - 1.0)) > ADJUST_RTOL:
+                return True
+        merged = pd.concat([old, new])
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        dpath, bpath = self._paths(ticker)
+        for path, arr in ((dpath, merged.index.values.astype("datetime64[ns]").view(np.int64)),
+                          (bpath, np.ascontiguousarray(merged.values, dtype=self.dtype))):
+            tmp = path + ".tmp.npy"
+            np.save(tmp, arr)
+            os.replace(tmp, path)
+        return False
+
+    def coverage(self, ticker: str) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        cov = self._coverage.get(ticker)
+        if cov is None:
+            return []
+        if isinstance(cov, dict):                       # formato antiguo: un único rango lo/hi
+            cov = [[cov["lo"], cov["hi"]]]
+        return [(pd.Timestamp(lo), pd.Timestamp(hi)) for lo, hi in cov]
+
+    def _covered(self, ticker: str, idx: pd.DatetimeIndex) -> np.ndarray:
+        # máscara de las marcas de `idx` (diarias o intradía) que caen en algún rango cubierto
+        day = idx.normalize()
+        mask = np.zeros(len(idx), dtype=bool)
+        for lo, hi in self.coverage(ticker):
+            mask |= (day >= lo) & (day <= hi)
+        return mask
+
+    def _cover(self, ticker: str, lo: pd.Timestamp, hi: pd.Timestamp):
+        # añade [lo, hi] y une los intervalos que se tocan (o entre los que solo hay fines de semana)
+        if lo > hi:
+            return
+        merged: List[List[pd.Timestamp]] = []
+        for a, b in sorted(self.coverage(ticker) + [(lo, hi)]):
+            if merged and (a <= merged[-1][1] + pd.Timedelta(days=1)
+                           or len(pd.bdate_range(merged[-1][1] + pd.Timedelta(days=1), a - pd.Timedelta(days=1))) == 0):
+                merged[-1][1] = max(merged[-1][1], b)
+            else:
+                merged.append([a, b])
+        self._coverage[ticker] = [[str(a.date()), str(b.date())] for a, b in merged]
+
+    def missing_ranges(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        gaps = []
+        cur = start
+        for lo, hi in self.coverage(ticker):
+            if hi < cur:
+                continue
+            if lo > end:
+                break
+            if lo > cur:
+                gaps.append((cur, lo - pd.Timedelta(days=1)))
+            cur = max(cur, hi + pd.Timedelta(days=1))
+        if cur <= end:
+            gaps.append((cur, end))
+        # huecos sin días hábiles (fines de semana) no justifican una llamada a la fuente
+        return [(s, e) for s, e in gaps if s <= e and len(pd.bdate_range(s, e)) > 0]
+
+    def _padded(self, start: pd.Timestamp, end: pd.Timestamp) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        lo = start - OVERLAP_PAD
+        if INTERVAL_MINUTES[self.interval]:
+            # yfinance no sirve barras intradía más antiguas que YF_MAX_AGE días
+            oldest = pd.Timestamp.today().normalize() - pd.Timedelta(days=YF_MAX_AGE[self.interval] - 1)
+            lo = min(start, max(lo, oldest))
+        return lo, end + OVERLAP_PAD
+
+    @staticmethod
+    def _rows_in(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> int:
+        idx = _naive_index(df.index)
+        return int(((idx >= start) & (idx < end + pd.Timedelta(days=1))).sum())
+
+    def _refetch(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp, covered_until: pd.Timestamp):
+        # la fuente reajustó la historia: se descarga de nuevo todo el rango cubierto y se sustituye
+        cov = self.coverage(ticker)
+        lo = min([start] + [a for a, _ in cov]); hi = max([end] + [b for _, b in cov])
+        count("store.refetch_adjusted")
+        with span("source.fetch", tickers=1, start=str(lo.date()), end=str(hi.date()), refetch=True):
+            df = self.source.fetch([ticker], lo, hi).get(ticker)
+        if df is None or df.empty:
+            return
+        self._merge(ticker, df, replace=True)
+        self._coverage[ticker] = []
+        self._cover(ticker, lo, min(hi, covered_until))
+
+    @timed("store.update")
+    def update(self, tickers: Iterable[str], start: pd.Timestamp, end: pd.Timestamp) -> int:
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        # la barra de hoy puede estar incompleta: nunca se da por cubierta
+        covered_until = min(end, pd.Timestamp.today().normalize() - pd.Timedelta(days=1))
+        with self._lock:
+            by_range: Dict[Tuple[pd.Timestamp, pd.Timestamp], List[str]] = {}
+            for t in tickers:
+                for gap in self.missing_ranges(t, start, end):
+                    by_range.setdefault(gap, []).append(t)
+            try:
+                for (s, e), group in by_range.items():
+                    count("store.fetches")
+                    lo, hi = self._padded(s, e)
+                    # si la fuente falla, la excepción sube sin marcar nada de este rango como cubierto
+                    with span("source.fetch", tickers=len(group), start=str(s.date()), end=str(e.date())):
+                        fetched = self.source.fetch(sorted(group), lo, hi)
+                    with span("store.merge", tickers=len(group)):
+                        for t in group:
+                            df = fetched.get(t)
+                            if self._merge(t, df):
+                                self._refetch(t, s, e, covered_until)
+                            elif df is not None and self._rows_in(df, s, e):
+                                # solo se cubre lo que la fuente devolvió: un ticker vacío se vuelve a pedir
+                                self._cover(t, s, min(e, covered_until))
+            finally:
+                if by_range:
+                    self._write_meta()
+            return len(by_range)
+
+    def window(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        dates, bars = self._read(ticker)
+        lo = np.searchsorted(dates, pd.Timestamp(start).value, side="left")
+        hi = np.searchsorted(dates, (pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).value, side="left")
+        idx = pd.DatetimeIndex(np.array(dates[lo:hi]).view("datetime64[ns]"), name="Date")
+        df = pd.DataFrame(np.array(bars[lo:hi]), index=idx, columns=list(FIELDS))
+        return df[self._session_rows(dates[lo:hi])] if INTERVAL_MINUTES[self.interval] else df
+
+    @staticmethod
+    def _session_rows(dates: np.ndarray) -> np.ndarray:
+        # intradía: solo la sesión regular; el pre/post mercado se guarda pero no entra en paneles ni métricas
+        return regular_session(pd.DatetimeIndex(np.asarray(dates).view("datetime64[ns]")))
+
+    def load(self, tickers: Iterable[str], start: pd.Timestamp, end: pd.Timestamp) -> Tuple[Dict[str, pd.Series], Dict[str, pd.Series]]:
+        tickers = list(tickers)
+        self.update(tickers, start, end)
+        close = {}; vol = {}
+        for t in tickers:
+            w = self.window(t, start, end)
+            close[t] = w["Close"].rename(t)
+            vol[t] = w["Volume"].rename(t)
+        return close, vol
+
+    def load_panel(self, tickers: Iterable[str], start: pd.Timestamp, end: pd.Timestamp, dtype=None) -> PricePanel:
+        # como `load`, pero directamente a un PricePanel
+        tickers = list(tickers)
+        self.update(tickers, start, end)
+        return self.panel(tickers, start, end, dtype)
+
+    @timed("store.panel")
+    def panel(self, tickers: Iterable[str], start: pd.Timestamp, end: pd.Timestamp, dtype=None) -> PricePanel:
+        # PricePanel con lo que haya en el almacén (sin consultar la fuente), desde los arrays sin Series intermedias
+        lo_v = pd.Timestamp(start).value
+        hi_v = (pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).value
+        columns = {}
+        for t in tickers:
+            dates, bars = self._read(t)
+            lo = np.searchsorted(dates, lo_v, side="left"); hi = np.searchsorted(dates, hi_v, side="left")
+            columns[t] = (dates[lo:hi], bars[lo:hi, 0], bars[lo:hi, 1])
+            if INTERVAL_MINUTES[self.interval]:
+                keep = self._session_rows(dates[lo:hi])
+                columns[t] = tuple(np.asarray(c)[keep] for c in columns[t])
+        return PricePanel.from_arrays(columns, dtype=dtype or self.dtype)
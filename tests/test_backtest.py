@@ -0,0 +1,26 @@
+import numpy as np
+
+from core.backtest import _summary, simulate_rebalanced
+
+def prices(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    rb = rng.normal(0.0003, 0.012, n)
+    base = 100 * np.cumprod(1 + rb)
+    alt = 20 * np.cumprod(1 + 3 * rb + rng.normal(0, 0.002, n))
+    return alt, base
+
+def test_notional_uses_price_at_position_open():
+    alt, base = prices()
+    hr = np.full((len(alt), 3), 3.0)
+    hr[:50, 1] = np.nan          # la cobertura empieza en la barra 50
+    hr[:, 2] = np.nan            # nunca activa
+    qty = 1000.0
+    sim = simulate_rebalanced(alt, base, hr, qty, [1, 1, 1], 0.0, 0.0)
+    summ = _summary(sim, alt, qty, 252)
+    for j, t0 in ((0, 0), (1, 50)):
+        act = sim["active"][:, j]
+        v = sim["alt_pnl"][act, j]
+        expected = np.sqrt(252 * v.var(ddof=1)) / (qty * alt[t0])
+        np.testing.assert_allclose(summ["vol_unhedged"].iloc[j], expected, rtol=1e-12)
+    assert summ["n_days"].iloc[2] == 0
+    assert np.isnan(summ["vol_unhedged"].iloc[2]) and np.isnan(summ["turnover_ann"].iloc[2])
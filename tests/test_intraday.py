@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.metrics import summarize_pair, summarize_universe
+from core.online import OnlinePairMetrics, OnlineUniverse, summarize_chunked
+from core.panel import PricePanel
+from core.store import CSVSource, PriceStore
+
+FIELDS = ("n_obs", "ret_base", "ret_alt", "vol_base", "vol_alt", "beta_alt_on_base", "corr", "r2")
+
+def bars(days=6, seed=0, gap=0.05, extended=True):
+    # 5m con pre/post mercado (08:00–19:55, o solo 09:30–15:55) y saltos nocturnos grandes frente a los
+    # retornos intradía
+    rng = np.random.default_rng(seed)
+    idx = pd.DatetimeIndex([d + pd.Timedelta(minutes=m) for d in pd.bdate_range("2024-03-04", periods=days)
+                            for m in range(8 * 60, 20 * 60, 5)])
+    day = idx.normalize()
+    jump = np.r_[False, day[1:] != day[:-1]]
+    rb = rng.normal(0, 0.001, len(idx)) + jump * rng.choice([-gap, gap], len(idx))
+    ra = 3 * rb + rng.normal(0, 0.0003, len(idx))
+    base = pd.Series(100 * np.cumprod(1 + rb), idx, name="B")
+    alt = pd.Series(30 * np.cumprod(1 + ra), idx, name="A")
+    vol = pd.Series(1000.0, idx)
+    if not extended:
+        base, alt, vol = (s.between_time("09:30", "15:55") for s in (base, alt, vol))
+        idx = base.index
+    # el ALT poco negociado no tiene la barra de apertura (09:30) de ninguna sesión
+    alt = alt[~((idx.hour == 9) & (idx.minute == 30))]
+    return base, alt, vol
+
+def assert_matches(got, ref):
+    for f in FIELDS:
+        np.testing.assert_allclose(got[f], getattr(ref, f), rtol=1e-9, err_msg=f)
+
+@pytest.mark.parametrize("extended", [False, True])
+def test_universe_matches_pair_with_missing_opening_bars(extended):
+    base, alt, vol = bars(extended=extended)
+    ref = summarize_pair(base, alt, vol, vol.reindex(alt.index), 3.0, "2024-03-04", "2024-03-11", interval="5m")
+    panel = PricePanel.from_series({"B": base, "A": alt}, {"B": vol, "A": vol.reindex(alt.index)})
+    out = summarize_universe(panel, None, [{"base": "B", "alt": "A", "target_ratio": 3.0}], "2024-03-04",
+                             "2024-03-11", interval="5m")
+    assert_matches(out.iloc[0], ref)
+    assert ref.vol_base < 0.5                   # sin saltos nocturnos ni pre/post mercado
+
+def test_panel_returns_break_per_column():
+    base, alt, _ = bars(extended=False)
+    panel = PricePanel.from_series({"B": base, "A": alt})
+    r = panel.returns_series("A")
+    assert r.abs().max() < 0.02
+    first = r.groupby(r.index.normalize()).head(1).index
+    assert (first.time == pd.Timestamp("09:40").time()).all()     # primer retorno: 09:35 → 09:40
+
+def test_chunked_matches_pair(tmp_path):
+    base, alt, vol = bars()
+    d = tmp_path / "csv"; d.mkdir()
+    pd.DataFrame({"Close": base, "Volume": vol}).rename_axis("Date").to_csv(d / "B.csv")
+    pd.DataFrame({"Close": alt, "Volume": vol.reindex(alt.index)}).rename_axis("Date").to_csv(d / "A.csv")
+    store = PriceStore(str(tmp_path / "store"), CSVSource(str(d)), interval="5m", dtype=np.float64)
+    store.update(["A", "B"], "2024-03-04", "2024-03-11")
+    ref = summarize_pair(base, alt, vol, vol, 3.0, "2024-03-04", "2024-03-11", interval="5m")
+    out = summarize_chunked(store, [{"base": "B", "alt": "A", "target_ratio": 3.0}], "2024-03-04", "2024-03-11",
+                            chunk_sessions=2)
+    assert_matches(out.iloc[0], ref)
+    panel = store.panel(["A", "B"], "2024-03-04", "2024-03-11")
+    assert panel.index.min().time() >= pd.Timestamp("09:30").time()
+    assert panel.index.max().time() < pd.Timestamp("16:00").time()
+
+def test_online_skips_extended_hours():
+    base, alt, vol = bars()
+    om = OnlinePairMetrics("B", "A", 3.0, interval="5m")
+    joint = base.index.intersection(alt.index)
+    for ts in joint:
+        om.update(ts, base[ts], alt[ts])
+    ref = summarize_pair(base, alt, vol, vol, 3.0, "2024-03-04", "2024-03-11", interval="5m")
+    got = om.metrics()
+    for f in FIELDS:
+        np.testing.assert_allclose(getattr(got, f), getattr(ref, f), rtol=1e-9, err_msg=f)
+
+def test_online_universe_from_panel_matches_pair():
+    base, alt, vol = bars()
+    panel = PricePanel.from_series({"B": base, "A": alt}, {"B": vol, "A": vol.reindex(alt.index)})
+    ou = OnlineUniverse.from_panel(panel, [{"base": "B", "alt": "A", "target_ratio": 3.0}], interval="5m")
+    ref = summarize_pair(base, alt, vol, vol, 3.0, "2024-03-04", "2024-03-11", interval="5m")
+    assert_matches(ou.metrics_frame().iloc[0], ref)
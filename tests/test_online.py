@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.hedge_adv import returns, rolling_beta
+from core.metrics import summarize_pair
+from core.online import OnlinePairMetrics, OnlineUniverse
+from core.panel import PricePanel
+
+FIELDS = ("n_obs", "ret_base", "ret_alt", "vol_base", "vol_alt", "avg_vol_base", "avg_vol_alt",
+          "beta_alt_on_base", "corr", "r2")
+
+def pair(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2022-01-03", periods=n)
+    rb = rng.normal(0.0003, 0.012, n)
+    ra = 3 * rb + rng.normal(0, 0.002, n)
+    base = pd.Series(100 * np.cumprod(1 + rb), idx, name="B")
+    alt = pd.Series(50 * np.cumprod(1 + ra), idx, name="A")
+    vb = pd.Series(rng.integers(1e5, 1e6, n).astype(float), idx)
+    va = pd.Series(rng.integers(1e5, 1e6, n).astype(float), idx)
+    return base, alt, vb, va
+
+def assert_same(om, base, alt, vb, va):
+    ref = summarize_pair(base, alt, vb, va, 3.0, str(base.index[0].date()), str(base.index[-1].date()))
+    got = om.metrics()
+    for f in FIELDS:
+        np.testing.assert_allclose(getattr(got, f), getattr(ref, f), rtol=1e-10, err_msg=f)
+    rb = rolling_beta(returns(base), returns(alt), om.window).iloc[-1]
+    np.testing.assert_allclose(om.rolling_beta(), rb, rtol=1e-9)
+
+def test_matches_batch():
+    base, alt, vb, va = pair()
+    assert_same(OnlinePairMetrics.from_history(base, alt, vb, va, 3.0), base, alt, vb, va)
+
+def test_repeated_last_bar_is_replaced():
+    base, alt, vb, va = pair()
+    om = OnlinePairMetrics.from_history(base, alt, vb, va, 3.0)
+    d = base.index[-1]
+    om.update(d, base.iloc[-1], alt.iloc[-1], vb.iloc[-1], va.iloc[-1])
+    assert_same(om, base, alt, vb, va)
+    # refresco de la barra abierta con otro precio: equivale a la historia con ese último cierre
+    base2, alt2 = base.copy(), alt.copy()
+    base2.iloc[-1] *= 1.01; alt2.iloc[-1] *= 1.03
+    om.update(d, base2.iloc[-1], alt2.iloc[-1], vb.iloc[-1], va.iloc[-1])
+    om.update(d, base2.iloc[-1], alt2.iloc[-1], vb.iloc[-1], va.iloc[-1])
+    assert_same(om, base2, alt2, vb, va)
+
+def test_replace_after_save_and_load():
+    base, alt, vb, va = pair()
+    om = OnlinePairMetrics.from_history(base, alt, vb, va, 3.0)
+    om = OnlinePairMetrics.from_dict(om.to_dict())
+    om.update(base.index[-1], base.iloc[-1], alt.iloc[-1], vb.iloc[-1], va.iloc[-1])
+    assert_same(om, base, alt, vb, va)
+
+def test_out_of_order_bar_is_rejected():
+    base, alt, vb, va = pair()
+    om = OnlinePairMetrics.from_history(base, alt, vb, va, 3.0)
+    with pytest.raises(ValueError):
+        om.update(base.index[-2], base.iloc[-2], alt.iloc[-2], vb.iloc[-2], va.iloc[-2])
+    assert_same(om, base, alt, vb, va)
+
+def gappy_panel(n=400, seed=1):
+    # calendarios desalineados y volúmenes con huecos: ALT sin algunas barras, BASE2 empieza más tarde
+    base, alt, vb, va = pair(n, seed)
+    rng = np.random.default_rng(seed)
+    alt = alt[rng.random(n) > 0.05]
+    va = va.copy(); va[rng.random(n) < 0.02] = np.nan
+    base2 = base.iloc[150:] * 0.5
+    close = {"B": base, "A": alt, "B2": base2}
+    volume = {"B": vb, "A": va.reindex(alt.index), "B2": vb.iloc[150:]}
+    pairs = [{"base": "B", "alt": "A", "target_ratio": 3.0}, {"base": "B2", "alt": "A", "target_ratio": 3.0},
+             {"base": "B", "alt": "B2", "target_ratio": 1.0}]
+    return close, volume, pairs
+
+def replayed(close, volume, pairs, end=None):
+    ou = OnlineUniverse(pairs)
+    for om in ou.pairs.values():
+        b, a = close[om.base].loc[:end], close[om.alt].loc[:end]
+        for d in b.index.intersection(a.index):
+            om.update(d, b[d], a[d], volume[om.base].get(d, np.nan), volume[om.alt].get(d, np.nan))
+    return ou
+
+def assert_same_universe(got, ref):
+    g, r = got.metrics_frame(), ref.metrics_frame()
+    pd.testing.assert_frame_equal(g, r, rtol=1e-10)
+    pd.testing.assert_series_equal(got.rolling_betas(), ref.rolling_betas(), rtol=1e-9)
+
+def test_from_panel_matches_bar_by_bar():
+    close, volume, pairs = gappy_panel()
+    ou = OnlineUniverse.from_panel(PricePanel.from_series(close, volume), pairs)
+    assert_same_universe(ou, replayed(close, volume, pairs))
+
+def test_extend_appends_and_replaces_last_bar():
+    close, volume, pairs = gappy_panel()
+    cut = close["B"].index[300]
+    panel = PricePanel.from_series(close, volume)
+    ou = OnlineUniverse.from_panel(panel.window(None, cut), pairs)
+    # la barra `cut` llegó abierta con otro cierre y se vuelve a enviar con el definitivo
+    partial = {t: s.copy() for t, s in close.items()}
+    partial["B"][cut] *= 1.02
+    ou2 = OnlineUniverse.from_panel(PricePanel.from_series(partial, volume).window(None, cut), pairs)
+    assert ou2.extend(panel) > 0
+    assert ou.extend(panel) > 0
+    ref = replayed(close, volume, pairs)
+    assert_same_universe(ou, ref)
+    assert_same_universe(ou2, ref)
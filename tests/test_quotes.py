@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.hedge import hedge_shares
+from core.quotes import QuoteService, StaticQuotes
+
+def test_get_without_thread_fetches_once_then_serves_cache():
+    backend = StaticQuotes({"SPY": 500.0, "SPXL": 150.0})
+    svc = QuoteService(backend, ttl=60.0)
+    assert svc.get(["SPY", "SPXL"], timeout=1.0) == {"SPY": 500.0, "SPXL": 150.0}
+    backend.set("SPY", 510.0)
+    assert svc.get(["SPY"], timeout=1.0) == {"SPY": 500.0}
+    assert backend.calls == 1
+
+def test_unknown_ticker_is_nan_and_not_refetched():
+    backend = StaticQuotes({"SPY": 500.0})
+    svc = QuoteService(backend)
+    out = svc.get(["SPY", "XXX"], timeout=1.0)
+    assert out["SPY"] == 500.0 and np.isnan(out["XXX"])
+    assert np.isnan(svc.get(["XXX"], timeout=1.0)["XXX"])
+    assert backend.calls == 1
+
+def test_refresh_error_keeps_previous_prices():
+    backend = StaticQuotes({"SPY": 500.0})
+    svc = QuoteService(backend)
+    svc.refresh(["SPY"])
+
+    def boom(tickers):
+        raise ConnectionError("sin red")
+    backend.last_prices = boom
+    assert svc.refresh(["SPY"]) == {}
+    assert svc.get(["SPY"]) == {"SPY": 500.0}
+    assert svc.stats()["last_error"].startswith("ConnectionError")
+
+def test_background_thread_refreshes_watched_tickers():
+    backend = StaticQuotes({"QQQ": 400.0})
+    svc = QuoteService(backend, ttl=0.0, refresh_interval=0.01).start()
+    try:
+        assert svc.get(["QQQ"], timeout=2.0) == {"QQQ": 400.0}
+        backend.set("QQQ", 410.0)
+        deadline = time.time() + 2.0
+        while svc.get(["QQQ"])["QQQ"] != 410.0 and time.time() < deadline:
+            time.sleep(0.01)
+        assert svc.get(["QQQ"]) == {"QQQ": 410.0}
+    finally:
+        svc.stop()
+
+def test_hedge_shares_aligns_series_by_label():
+    pa = pd.Series([10.0, 20.0, 30.0], index=["A", "B", "C"])
+    pb = pd.Series([100.0, 5.0], index=["B", "A"])
+    res = hedge_shares(100.0, pa, pb, 2.0)
+    shares = res["shares_base_for_qty_alt"]
+    assert list(shares.index) == ["A", "B", "C"]
+    np.testing.assert_allclose(shares.values, [400.0, 40.0, np.nan])
+    assert res["factor_shares_per_alt"]["A"] == 4.0
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.store import CSVSource, PriceStore
+
+def write_csv(directory, ticker, start="2023-01-02", end="2023-12-29", scale=1.0):
+    idx = pd.bdate_range(start, end)
+    close = scale * (100 + np.arange(len(idx), dtype=float))
+    df = pd.DataFrame({"Close": close, "Volume": 1000.0}, index=pd.Index(idx, name="Date"))
+    df.to_csv(directory / f"{ticker}.csv")
+    return df
+
+class CountingSource(CSVSource):
+    def __init__(self, directory, fail=False):
+        super().__init__(str(directory))
+        self.calls = []
+        self.fail = fail
+
+    def fetch(self, tickers, start, end):
+        self.calls.append((tuple(tickers), start, end))
+        if self.fail:
+            raise ConnectionError("fuente caída")
+        return super().fetch(tickers, start, end)
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    d = tmp_path / "csv"
+    d.mkdir()
+    return d
+
+def test_disjoint_windows_leave_hole_pending(csv_dir, tmp_path):
+    write_csv(csv_dir, "A")
+    store = PriceStore(str(tmp_path / "store"), CountingSource(csv_dir))
+    store.update(["A"], "2023-01-02", "2023-02-01")
+    store.update(["A"], "2023-11-01", "2023-12-01")
+    gaps = store.missing_ranges("A", "2023-01-02", "2023-12-01")
+    assert gaps == [(pd.Timestamp("2023-02-02"), pd.Timestamp("2023-10-31"))]
+    assert store.window("A", "2023-06-01", "2023-06-30").empty
+    store.load(["A"], "2023-01-02", "2023-12-01")
+    assert len(store.window("A", "2023-06-01", "2023-06-30")) == len(pd.bdate_range("2023-06-01", "2023-06-30"))
+    assert store.missing_ranges("A", "2023-01-02", "2023-12-01") == []
+
+def test_empty_ticker_is_not_covered(csv_dir, tmp_path):
+    write_csv(csv_dir, "A")
+    source = CountingSource(csv_dir)
+    store = PriceStore(str(tmp_path / "store"), source)
+    store.update(["A", "B"], "2023-03-01", "2023-03-31")
+    assert store.missing_ranges("A", "2023-03-01", "2023-03-31") == []
+    assert store.missing_ranges("B", "2023-03-01", "2023-03-31") != []
+    write_csv(csv_dir, "B")
+    assert store.update(["A", "B"], "2023-03-01", "2023-03-31") == 1
+    assert source.calls[-1][0] == ("B",)
+    assert len(store.window("B", "2023-03-01", "2023-03-31")) == len(pd.bdate_range("2023-03-01", "2023-03-31"))
+
+def test_failed_fetch_records_no_coverage(csv_dir, tmp_path):
+    write_csv(csv_dir, "A")
+    root = str(tmp_path / "store")
+    with pytest.raises(ConnectionError):
+        PriceStore(root, CountingSource(csv_dir, fail=True)).update(["A"], "2023-03-01", "2023-03-31")
+    store = PriceStore(root, CountingSource(csv_dir))
+    assert store.missing_ranges("A", "2023-03-01", "2023-03-31") != []
+    store.update(["A"], "2023-03-01", "2023-03-31")
+    assert not store.window("A", "2023-03-01", "2023-03-31").empty
+
+def test_readjusted_history_is_refetched(csv_dir, tmp_path):
+    write_csv(csv_dir, "A")
+    store = PriceStore(str(tmp_path / "store"), CountingSource(csv_dir))
+    store.update(["A"], "2023-01-02", "2023-06-30")
+    # split inverso 1:10 después: la fuente devuelve toda la historia con otra base de ajuste
+    fresh = write_csv(csv_dir, "A", scale=10.0)
+    store.update(["A"], "2023-01-02", "2023-09-29")
+    got = store.window("A", "2023-01-02", "2023-09-29")["Close"]
+    np.testing.assert_allclose(got.to_numpy(), fresh["Close"].loc[:"2023-09-29"].to_numpy())
+    assert store.missing_ranges("A", "2023-01-02", "2023-09-29") == []
+
+def test_unchanged_history_is_merged(csv_dir, tmp_path):
+    write_csv(csv_dir, "A")
+    source = CountingSource(csv_dir)
+    store = PriceStore(str(tmp_path / "store"), source)
+    store.update(["A"], "2023-01-02", "2023-06-30")
+    store.update(["A"], "2023-01-02", "2023-09-29")
+    assert len(source.calls) == 2
+    assert source.calls[1][1] < pd.Timestamp("2023-07-01")      # solapa con lo guardado
+
+def test_partial_today_bar_is_overwritten_without_refetch(csv_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(pd.Timestamp, "today", classmethod(lambda cls, tz=None: pd.Timestamp("2023-06-15 11:00")))
+    df = write_csv(csv_dir, "A", end="2023-06-15")
+    source = CountingSource(csv_dir)
+    store = PriceStore(str(tmp_path / "store"), source)
+    store.update(["A"], "2023-01-02", "2023-06-15")
+    assert store.missing_ranges("A", "2023-01-02", "2023-06-15") == [(pd.Timestamp("2023-06-15"),) * 2]
+    # la barra de hoy sigue moviéndose durante la sesión
+    df.loc["2023-06-15", "Close"] *= 1.02
+    df.to_csv(csv_dir / "A.csv")
+    store.update(["A"], "2023-01-02", "2023-06-15")
+    assert len(source.calls) == 2
+    assert source.calls[1][1] > pd.Timestamp("2023-06-01")      # solo el hueco de hoy, sin descarga completa
+    assert store.window("A", "2023-06-15", "2023-06-15")["Close"].iloc[0] == pytest.approx(df["Close"].iloc[-1])